@@ -202,12 +202,18 @@ if prompt := st.chat_input("Ask me anything!", key="chat_input_1"):
         try:
             response = requests.post(
                 f"{API_URL}/chat",
-                json={"message": prompt, "messages": st.session_state.messages},
+                # The server keeps the conversation context; only the first turn
+                # (before a session_id exists) sends the history
+                json={"message": prompt, "session_id": st.session_state.session_id}
+                if st.session_state.get("session_id")
+                else {"message": prompt, "messages": st.session_state.messages},
                 timeout=10
             )
             
             if response.status_code == 200:
-                data = response.json()["response"]
+                body = response.json()
+                st.session_state.session_id = body.get("session_id")
+                data = body["response"]
                 st.session_state.messages.append({"role": "assistant", "content": data})
                 st.rerun()
             else:
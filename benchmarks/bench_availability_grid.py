@@ -0,0 +1,83 @@
+# bench_availability_grid.py
+"""
+Multi-attendee slot search over a long horizon: the per-slot Python loop the
+legacy finder used, the sweep-line engine over all attendees' busy periods,
+and the NumPy grid in src.availability_grid.
+
+    python benchmarks/bench_availability_grid.py --days 30 --attendees 20
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src import availability_grid
+from src.free_slots import iter_free_slots
+
+UTC = datetime.timezone.utc
+
+
+def make_busy(start, days, attendees, per_day, seed=0):
+    rng = random.Random(seed)
+    busy = {}
+    for a in range(attendees):
+        intervals = []
+        for _ in range(days * per_day):
+            s = start + datetime.timedelta(minutes=15 * rng.randrange(days * 96))
+            intervals.append((s, s + datetime.timedelta(minutes=rng.choice((30, 60)))))
+        busy[f"attendee{a}@example.com"] = intervals
+    return busy
+
+
+def python_loop(busy, start, end, duration, step):
+    """Step through the window, testing every attendee's busy list at each candidate"""
+    all_busy = [interval for intervals in busy.values() for interval in intervals]
+    slots = []
+    current = start
+    length = datetime.timedelta(minutes=duration)
+    while current + length <= end:
+        if not any(current < e and current + length > s for s, e in all_busy):
+            slots.append((current, current + length))
+        current += datetime.timedelta(minutes=step)
+    return slots
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--attendees", type=int, default=20)
+    parser.add_argument("--per-day", type=int, default=1, help="busy blocks per attendee per day")
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--granularity", type=int, default=15)
+    args = parser.parse_args()
+
+    start = datetime.datetime(2025, 1, 1, tzinfo=UTC)
+    end = start + datetime.timedelta(days=args.days)
+    busy = make_busy(start, args.days, args.attendees, args.per_day)
+    everyone = [interval for intervals in busy.values() for interval in intervals]
+
+    rows = [
+        ("python loop", timed(lambda: python_loop(busy, start, end, args.duration, args.granularity))),
+        ("sweep line", timed(lambda: list(iter_free_slots(start, end, everyone, args.duration, args.granularity)))),
+        ("numpy grid", timed(lambda: availability_grid.find_slots(
+            busy, start, end, args.duration, args.granularity, args.granularity))),
+    ]
+    print(f"{args.days} days, {args.attendees} attendees, {len(everyone)} busy blocks")
+    for name, (ms, slots) in rows:
+        print(f"{name:12s} {ms:10.2f} ms  ({len(slots)} slots)")
+
+
+if __name__ == "__main__":
+    main()
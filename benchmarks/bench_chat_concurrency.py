@@ -0,0 +1,123 @@
+# bench_chat_concurrency.py
+"""
+p50/p99 latency of an async endpoint under N concurrent clients when its blocking
+work (a simulated Google round-trip plus parsing) runs inline on the event loop,
+versus on the bounded pools from src.async_exec.
+
+The handler mimics /chat: a short CPU-bound parse, then a blocking calendar call.
+Each app is served by uvicorn in its own process, so a blocked server loop shows
+up as client-side latency just as it would in production.
+
+    python benchmarks/bench_chat_concurrency.py --clients 50 --requests 10 --io-ms 40
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import multiprocessing
+import socket
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from src import async_exec
+from src.async_exec import run_blocking
+
+
+def build_apps(io_ms, parse_ms):
+    def parse(message):
+        deadline = time.perf_counter() + parse_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        return {"intent": "check", "raw": message}
+
+    def calendar_call(slots):
+        time.sleep(io_ms / 1000)
+        return {"response": f"checked {slots['raw']}"}
+
+    inline = FastAPI()
+    pooled = FastAPI()
+
+    @inline.post("/chat")
+    async def chat_inline(payload: dict):
+        return calendar_call(parse(payload["message"]))
+
+    @pooled.post("/chat")
+    async def chat_pooled(payload: dict):
+        slots = await run_blocking("nlu", parse, payload["message"])
+        return await run_blocking("calendar", calendar_call, slots)
+
+    return inline, pooled
+
+
+def serve(app, pool_size):
+    """Start uvicorn for app in a child process on a free local port; returns (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    def run():
+        async_exec.POOL_SIZES["calendar"] = pool_size
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+    process = multiprocessing.get_context("fork").Process(target=run, daemon=True)
+    process.start()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs")
+            break
+        except httpx.TransportError:
+            time.sleep(0.05)
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def load(base_url, clients, requests_per_client):
+    latencies = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def run_client(n, count):
+            for i in range(count):
+                started = time.perf_counter()
+                response = await client.post("/chat", json={"message": f"client {n} request {i}"})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1e3)
+
+        # Warm up: open every client connection before timing
+        await asyncio.gather(*(run_client(n, 1) for n in range(clients)))
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client(n, requests_per_client) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies), p99, len(latencies) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--io-ms", type=float, default=40, help="simulated Google API latency")
+    parser.add_argument("--parse-ms", type=float, default=2, help="simulated dateparser CPU time")
+    args = parser.parse_args()
+
+    inline, pooled = build_apps(args.io_ms, args.parse_ms)
+    for name, app in (("inline (blocking)", inline), ("thread pools", pooled)):
+        process, base_url = serve(app, max(async_exec.POOL_SIZES["calendar"], args.clients))
+        p50, p99, rps = asyncio.run(load(base_url, args.clients, args.requests))
+        process.terminate()
+        process.join()
+        print(f"{name:18s} p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench_chat_pipeline.py
+"""
+Per-message latency of the compiled agent graph that serves /chat against the
+sequential dispatch in handle_user_message (the same steps, one after another, on
+a pool thread as /chat used to run it).
+
+--lookup-ms adds a sleep to reference resolution and the calendar check, to model
+a slower store: the graph runs the two concurrently for edits, the sequential
+dispatch pays for both. Messages repeat, so parsing is served by the parse cache
+in both after the warm-up.
+
+    python benchmarks/bench_chat_pipeline.py --bookings 2000 --messages 300 --lookup-ms 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src import agent, database
+from src.async_exec import run_blocking, shutdown_executors
+
+MESSAGES = [
+    "book a meeting for planning on 3 March at 10am",
+    "am I free on 4 March at 2pm",
+    "cancel the standup",
+    "move the design review to 5 March at 4pm",
+    "list my events this week",
+    "help",
+]
+
+
+def populate(n):
+    start = datetime(2025, 1, 1, 8)
+    topics = ["Standup", "Design review", "Retro", "Lunch", "Interview"]
+    with database.transaction():
+        for i in range(n):
+            begin = start + timedelta(hours=i)
+            database.save_booking(f"{topics[i % len(topics)]} {i}", f"evt_{i}", begin.isoformat(),
+                                  (begin + timedelta(minutes=30)).isoformat(), "UTC")
+
+
+def slow_lookups(delay):
+    """Wrap the lookups the pipeline runs so each takes at least delay seconds longer"""
+    def slowed(fn):
+        def call(*args, **kwargs):
+            time.sleep(delay)
+            return fn(*args, **kwargs)
+        return call
+    agent.resolve_booking = slowed(agent.resolve_booking)
+    agent.find_conflicts = slowed(agent.find_conflicts)
+
+
+def percentile(samples, q):
+    return sorted(samples)[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def run(messages, handle):
+    latencies = []
+    for message in messages:
+        started = time.perf_counter()
+        await handle(message)
+        latencies.append((time.perf_counter() - started) * 1e3)
+    return latencies
+
+
+async def main_async(args, tmp):
+    graph = agent.build_agent()
+
+    async def sequential(message):
+        return await run_blocking("calendar", agent.handle_user_message, message)
+
+    async def pipeline(message):
+        return (await graph.ainvoke({"user_msg": message}))["result"]
+
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(args.messages)]
+    results = {}
+    for name, handle in (("sequential dispatch", sequential), ("compiled graph", pipeline)):
+        # A fresh database per run, so both see the same bookings
+        database.DB_FILE = os.path.join(tmp, f"{name.split()[0]}.db")
+        database.init_db()
+        populate(args.bookings)
+        await run(MESSAGES, handle)  # warm the parse cache and the interval index
+        results[name] = await run(messages, handle)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=2000, help="active bookings in the database")
+    parser.add_argument("--messages", type=int, default=300, help="messages per run")
+    parser.add_argument("--lookup-ms", type=float, default=0.0, help="extra time per reference/calendar lookup")
+    args = parser.parse_args()
+
+    if args.lookup_ms:
+        slow_lookups(args.lookup_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(main_async(args, tmp))
+        shutdown_executors()
+        database.close_connections()
+
+    print(f"{'':20s} {'mean ms':>9s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    for name, latencies in results.items():
+        print(f"{name:20s} {statistics.mean(latencies):9.3f} {percentile(latencies, 0.5):8.3f} "
+              f"{percentile(latencies, 0.99):8.3f}")
+    print("\nper node (graph):")
+    for node, stats in agent.node_timings.stats().items():
+        print(f"  {node:18s} {stats['count']:6d} calls, mean {stats['mean_ms']:.3f} ms, max {stats['max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
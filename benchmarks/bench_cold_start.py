@@ -0,0 +1,68 @@
+# bench_cold_start.py
+"""
+Cold-start time of the API: how long `import src.main` takes in a fresh
+interpreter, and how long `uvicorn src.main:app` takes until /health answers.
+Interactive OAuth is disabled so a missing token can never block the run.
+
+    python benchmarks/bench_cold_start.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env():
+    env = dict(os.environ, GOOGLE_OAUTH_INTERACTIVE="0", PYTHONPATH=project_root)
+    env.pop("CALENDAR_SYNC_INTERVAL", None)
+    return env
+
+
+def import_time():
+    code = "import time; t = time.perf_counter(); import src.main; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, env=_env(),
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_healthy(timeout=60):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+                                "--log-level", "warning"], cwd=project_root, env=_env())
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("server did not become healthy")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.runs)]
+    healthy = [time_to_healthy() for _ in range(args.runs)]
+    print(f"import src.main        median {statistics.median(imports) * 1e3:8.1f} ms  (min {min(imports) * 1e3:.1f})")
+    print(f"uvicorn to /health     median {statistics.median(healthy) * 1e3:8.1f} ms  (min {min(healthy) * 1e3:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench_database.py
+"""
+Compare booking-table throughput with a fresh sqlite3 connection per call (the
+old behaviour) against the pooled per-thread connections in src.database.
+
+Uvicorn runs sync work on a thread pool, so concurrency is modelled with a
+ThreadPoolExecutor issuing the same save/list/get/update mix a /chat booking does.
+
+    python benchmarks/bench_database.py --ops 2000 --threads 8
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src import database
+
+
+def _unpooled_ops(db_file):
+    """The pre-pool implementation: one connect() per database call"""
+    def save(summary, event_id, start, end, tz):
+        now = datetime.utcnow().isoformat()
+        with sqlite3.connect(db_file) as conn:
+            cur = conn.execute(
+                "INSERT INTO bookings (summary, event_id, start_time, end_time, timezone, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'active', ?, ?)",
+                (summary, event_id, start, end, tz, now, now))
+            conn.commit()
+            return cur.lastrowid
+
+    def get(booking_id):
+        with sqlite3.connect(db_file) as conn:
+            return conn.execute(
+                "SELECT id, summary, event_id, start_time, end_time, timezone, status FROM bookings WHERE id = ?",
+                (booking_id,)).fetchone()
+
+    def last():
+        with sqlite3.connect(db_file) as conn:
+            return conn.execute(
+                "SELECT id, summary, event_id, start_time, end_time, timezone, status FROM bookings "
+                "WHERE status = 'active' ORDER BY id DESC LIMIT 1").fetchone()
+
+    def update(booking_id, summary, start, end, tz):
+        with sqlite3.connect(db_file) as conn:
+            conn.execute(
+                "UPDATE bookings SET summary = ?, start_time = ?, end_time = ?, timezone = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'active'",
+                (summary, start, end, tz, datetime.utcnow().isoformat(), booking_id))
+            conn.commit()
+
+    return save, get, last, update
+
+
+def _pooled_ops():
+    return database.save_booking, database.get_booking_by_id, database.get_last_booking, database.update_booking
+
+
+def _request(ops, i):
+    save, get, last, update = ops
+    start = datetime(2025, 1, 1) + timedelta(minutes=30 * i)
+    end = start + timedelta(minutes=30)
+    booking_id = save(f"Meeting {i}", f"evt_{i}", start.isoformat(), end.isoformat(), "UTC")
+    get(booking_id)
+    last()
+    update(booking_id, f"Meeting {i} (moved)", start.isoformat(), end.isoformat(), "UTC")
+
+
+def run(ops, n_ops, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: _request(ops, i), range(n_ops)))
+    elapsed = time.perf_counter() - started
+    # Each simulated request issues four database calls
+    return 4 * n_ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="simulated /chat bookings per run")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent worker threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.db")
+        database.init_db()
+
+        before = run(_unpooled_ops(database.DB_FILE), args.ops, args.threads)
+        after = run(_pooled_ops(), args.ops, args.threads)
+        database.close_connections()
+
+    print(f"per-call connect : {before:10.0f} ops/sec")
+    print(f"pooled (WAL)     : {after:10.0f} ops/sec")
+    print(f"speedup          : {after / before:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# bench_fast_datetime.py
+"""
+Equivalence check and speedup of the fast-path datetime recognizer
+(src.fast_datetime) against dateparser on a corpus shaped like recorded traffic:
+the Streamlit form messages plus common chat phrasings.
+
+For every message the fast path recognizes, its result is compared with what
+nlu used before it: the first result of search_dates() over the whole message,
+with its am/pm repair of midnight results. They must be the same instant,
+except where the old result was a known misread:
+- an ISO date read day-first (DATE_ORDER is DMY), same span and zone;
+- the clock time dropped ("tomorrow at 10am" read as tomorrow at the current time);
+- search_dates picked another span first or split the fast path's one ("for
+  30 minutes" read as a date, "next Monday 10am" read as "Monday 10am").
+Messages search_dates cannot read at all are counted separately. A
+disagreement, or a misread that involves a zone or offset near the time,
+exits non-zero.
+
+    python benchmarks/bench_fast_datetime.py
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from dateparser.search import search_dates
+
+from src.fast_datetime import search_common_datetime
+from src.nlu import _AMPM_TIME
+
+NOW = datetime.datetime(2025, 6, 18, 9, 41, 7)  # a Wednesday
+
+
+def build_corpus(n, seed=0):
+    rng = random.Random(seed)
+    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "saturday", "sunday"]
+    templates = [
+        lambda d, t: f"Book a meeting titled 'Team Meeting' on {d} at {t} for 30 minutes",
+        lambda d, t: f"Book a meeting titled 'Sync' with alice, bob on {d} at {t} for 45 minutes",
+        lambda d, t: f"Check my availability on {d} at {t} for 60 minutes",
+        lambda d, t: f"Book a call tomorrow at {rng.randint(1, 12)}{rng.choice(['am', 'pm', ' pm'])}",
+        lambda d, t: f"am I free today at {rng.randint(0, 23)}:{rng.choice(['00', '15', '30', '45'])}",
+        lambda d, t: f"schedule standup next {rng.choice(weekdays)} {rng.randint(8, 11)}am",
+        lambda d, t: f"move it to {rng.choice(weekdays)} at {rng.randint(1, 5)}:30pm",
+        lambda d, t: "tomorrow at noon works",
+        # Offsets and zone names must reach dateparser, which keeps them
+        lambda d, t: f"{d}T{t[:8]}{rng.choice(['+05:00', '-08:00', 'Z', '+0100'])}",
+        lambda d, t: f"Book a call on {d} at {t[:5]} {rng.choice(['UTC', 'Europe/Berlin', 'America/New_York'])}",
+        lambda d, t: f"am I free today at {rng.randint(1, 12)} pm {rng.choice(['EST', 'PST', 'CEST', 'GMT+2'])}",
+        lambda d, t: f"meet {rng.choice(weekdays)} {rng.randint(8, 11)}am {rng.choice(['PST', 'utc', 'EDT'])}",
+        lambda d, t: "List my upcoming events",
+        lambda d, t: "Show me my schedule for this week",
+    ]
+    corpus = []
+    for _ in range(n):
+        day = NOW.date() + datetime.timedelta(days=rng.randint(-30, 60))
+        clock = datetime.time(rng.randint(0, 23), rng.choice([0, 15, 30, 45]), rng.randint(0, 59),
+                              rng.choice([0, rng.randint(0, 999999)]))
+        corpus.append(rng.choice(templates)(day.isoformat(), clock.isoformat()))
+    return corpus
+
+
+SEARCH_SETTINGS = {"RETURN_AS_TIMEZONE_AWARE": True, "DATE_ORDER": "DMY", "RELATIVE_BASE": NOW}
+
+
+def _day_first(value):
+    return value.replace(month=value.day, day=value.month) if value.day <= 12 else None
+
+
+def previous_datetime(message):
+    """search_dates over the whole message, the first result repaired as nlu did before the fast path"""
+    found = search_dates(message, settings=SEARCH_SETTINGS)
+    if not found:
+        return None
+    span, value = found[0]
+    time_match = _AMPM_TIME.search(message)
+    if value.hour == 0 and value.minute == 0 and time_match:
+        hour, minute = int(time_match.group(1)), int(time_match.group(2) or 0)
+        if time_match.group(3).lower() == "pm" and hour != 12:
+            hour += 12
+        elif time_match.group(3).lower() == "am" and hour == 12:
+            hour = 0
+        value = value.replace(hour=hour, minute=minute)
+    return [(span, value)] + found[1:]
+
+
+def check_equivalence(corpus):
+    """
+    Returns counts of messages that agree, that the old path misread (see the
+    module docstring), that only the fast path reads, and that fall back; plus
+    the disagreements as (message, span, fast, old span, old).
+    """
+    counts = {"agree": 0, "iso_day_first": 0, "clock_dropped": 0, "resegmented": 0, "fast_only": 0, "fallback": 0}
+    disagree = []
+    for message in corpus:
+        found = search_common_datetime(message, NOW)
+        if not found:
+            counts["fallback"] += 1
+            continue
+        span, fast = found
+        fast = fast.astimezone()  # nlu localizes the fast result like RETURN_AS_TIMEZONE_AWARE
+        old = previous_datetime(message)
+        if not old:
+            counts["fast_only"] += 1
+            continue
+        old_span, old_value = old[0]
+        if old_value == fast:
+            counts["agree"] += 1
+            continue
+        # Any zone dateparser saw around the time is one the fast path would drop
+        start = message.find(span)
+        zoned = any(value.utcoffset() != fast.utcoffset() for text, value in old
+                    if message.find(text) < start + len(span) and message.find(text) + len(text) > start)
+        if not zoned and span in old_span and old_value.replace(tzinfo=None) == _day_first(fast.replace(tzinfo=None)):
+            counts["iso_day_first"] += 1
+        elif not zoned and span in old_span and old_value.replace(tzinfo=None) == datetime.datetime.combine(
+                fast.date(), NOW.time()):
+            counts["clock_dropped"] += 1
+        elif not zoned and span not in old_span:
+            counts["resegmented"] += 1
+        else:
+            disagree.append((message, span, fast, old_span, old_value))
+    return counts, disagree
+
+
+def timed(fn, corpus):
+    started = time.perf_counter()
+    for message in corpus:
+        fn(message)
+    return (time.perf_counter() - started) / len(corpus) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages)
+    counts, disagree = check_equivalence(corpus)
+    print(f"{len(corpus)} messages: {counts['agree']} agree with search_dates, {len(disagree)} disagree, "
+          f"{counts['iso_day_first']} ISO dates it read day-first, {counts['clock_dropped']} times it dropped, "
+          f"{counts['resegmented']} it read from another "
+          f"span, {counts['fast_only']} only readable by the fast path, {counts['fallback']} fall back to dateparser")
+    for message, span, fast, old_span, old in disagree[:10]:
+        print(f"  DISAGREE {message!r}: {span!r} fast={fast} search_dates={old_span!r} {old}")
+
+    settings = {"RETURN_AS_TIMEZONE_AWARE": True, "DATE_ORDER": "DMY"}
+
+    def dateparser_only(message):
+        search_dates(message, settings=settings)
+
+    def fast_first(message):
+        if search_common_datetime(message) is None:
+            dateparser_only(message)
+
+    sample = corpus[:500]
+    before, after = timed(dateparser_only, sample), timed(fast_first, sample)
+    print(f"dateparser only     {before:10.1f} us/message")
+    print(f"fast path first     {after:10.1f} us/message  ({before / after:.1f}x)")
+    sys.exit(1 if disagree else 0)
+
+
+if __name__ == "__main__":
+    main()
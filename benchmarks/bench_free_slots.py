@@ -0,0 +1,101 @@
+# bench_free_slots.py
+"""
+Free-slot search over a busy calendar: the old per-slot loops from
+GoogleCalendarUtils.find_available_slots / find_available_slots_legacy against
+the sweep-line engine in src.free_slots.
+
+    python benchmarks/bench_free_slots.py --days 30 --events 600
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+from itertools import islice
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.free_slots import iter_free_slots, event_interval
+
+UTC = datetime.timezone.utc
+
+
+def make_events(start, days, n, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        s = start + datetime.timedelta(minutes=15 * rng.randrange(days * 96))
+        e = s + datetime.timedelta(minutes=rng.choice((30, 60, 90)))
+        events.append({'id': str(i), 'start': {'dateTime': s.isoformat()}, 'end': {'dateTime': e.isoformat()}})
+    return events
+
+
+def old_find_available_slots(events, start_time, end_time, duration_minutes):
+    slots = []
+    current_time = start_time
+    while current_time + datetime.timedelta(minutes=duration_minutes) <= end_time:
+        slot_end = current_time + datetime.timedelta(minutes=duration_minutes)
+        slot_available = True
+        for event in events:
+            event_start = datetime.datetime.fromisoformat(event['start']['dateTime'])
+            event_end = datetime.datetime.fromisoformat(event['end']['dateTime'])
+            if current_time < event_end and slot_end > event_start:
+                slot_available = False
+                break
+        if slot_available:
+            slots.append((current_time, slot_end))
+        current_time = slot_end
+    return slots
+
+
+def old_find_available_slots_legacy(busy_slots, time_min, time_max, duration_minutes):
+    current = time_min
+    available = []
+    while current + datetime.timedelta(minutes=duration_minutes) <= time_max:
+        is_available = True
+        for busy_start, busy_end in busy_slots:
+            if current <= busy_end and busy_start <= current + datetime.timedelta(minutes=duration_minutes):
+                is_available = False
+                break
+        if is_available:
+            available.append((current, current + datetime.timedelta(minutes=duration_minutes)))
+        current += datetime.timedelta(minutes=15)
+    return available
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--events", type=int, default=600)
+    parser.add_argument("--duration", type=int, default=30)
+    args = parser.parse_args()
+
+    start = datetime.datetime(2025, 1, 1, tzinfo=UTC)
+    end = start + datetime.timedelta(days=args.days)
+    events = make_events(start, args.days, args.events)
+    busy = [event_interval(e) for e in events]
+
+    rows = [
+        ("find_available_slots (old)", timed(lambda: old_find_available_slots(events, start, end, args.duration))),
+        ("sweep, step=duration", timed(lambda: list(
+            iter_free_slots(start, end, map(event_interval, events), args.duration)))),
+        ("find_available_slots_legacy (old)", timed(lambda: old_find_available_slots_legacy(busy, start, end, args.duration))),
+        ("sweep, step=15", timed(lambda: list(iter_free_slots(start, end, busy, args.duration, step=15)))),
+        ("sweep, first 3 only", timed(lambda: list(islice(iter_free_slots(start, end, busy, args.duration, step=15), 3)))),
+    ]
+    print(f"{args.days} days, {args.events} events, {args.duration} min slots")
+    for name, (ms, slots) in rows:
+        print(f"{name:36s} {ms:10.2f} ms  ({len(slots)} slots)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_intent_model.py
+"""
+Accuracy and throughput of the hashed bag-of-words intent model (src.intent_model)
+against the keyword cascade it replaced. Accuracy is measured on the held-out
+corpus in src/data/intent_test.tsv; throughput classifies messages one at a time
+and in single batched calls.
+
+    python benchmarks/bench_intent_model.py --batch 10000
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.intent_model import IntentClassifier, TEST_CORPUS, TRAIN_CORPUS, load_corpus
+from benchmarks.bench_nlu import old_extract_intent
+
+
+def report_accuracy(name, predicted, labels, messages, show_errors):
+    correct = sum(p == l for p, l in zip(predicted, labels))
+    misses = Counter(l for p, l in zip(predicted, labels) if p != l)
+    print(f"{name:16s} {correct}/{len(labels)} = {correct / len(labels):.1%}   misses by intent: {dict(misses)}")
+    if show_errors:
+        for p, l, m in zip(predicted, labels, messages):
+            if p != l:
+                print(f"    {l:>8s} -> {p:<8s} {m}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=10000, help="largest batch size to time")
+    parser.add_argument("--errors", action="store_true", help="list misclassified test messages")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    model = IntentClassifier.from_corpus(TRAIN_CORPUS)
+    print(f"trained on {TRAIN_CORPUS} in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    messages, labels = load_corpus(TEST_CORPUS)
+    report_accuracy("keyword cascade", [old_extract_intent(m) for m in messages], labels, messages, args.errors)
+    report_accuracy("intent model", model.predict(messages), labels, messages, args.errors)
+
+    sizes = [n for n in (1, 100, 1000, args.batch) if n <= args.batch]
+    print(f"\n{'messages':>9s} {'cascade':>12s} {'model, each':>12s} {'model, batch':>13s}")
+    for size in sizes:
+        batch = [messages[i % len(messages)] for i in range(size)]
+        timings = []
+        for fn in (lambda: [old_extract_intent(m) for m in batch],
+                   lambda: [model.classify(m) for m in batch],
+                   lambda: model.predict(batch)):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) / size * 1e6)
+        print(f"{size:9d} {timings[0]:9.2f} us {timings[1]:9.2f} us {timings[2]:10.2f} us   per message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench_interval_index.py
+"""
+Conflict-check latency at 100k active bookings: the old list_bookings() scan
+(string equality on start_time) and an exact overlap scan, against IntervalIndex.
+
+    python benchmarks/bench_interval_index.py --bookings 100000 --queries 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.interval_index import IntervalIndex
+
+BASE = 1_735_689_600  # 2025-01-01T00:00:00Z
+
+
+def make_bookings(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for booking_id in range(1, n + 1):
+        start = BASE + rng.randrange(0, 365 * 24 * 4) * 900
+        rows.append((booking_id, start, start + rng.choice((900, 1800, 3600, 7200))))
+    return rows
+
+
+def timed(fn, queries):
+    started = time.perf_counter()
+    hits = sum(1 for q in queries if fn(*q))
+    return (time.perf_counter() - started) / len(queries) * 1e6, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_bookings(args.bookings)
+    rng = random.Random(1)
+    queries = []
+    for _ in range(args.queries):
+        start = BASE + rng.randrange(0, 365 * 24 * 4) * 900
+        queries.append((start, start + 1800))
+
+    started = time.perf_counter()
+    index = IntervalIndex.from_intervals(rows)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    def string_scan(start, end):
+        return any(s == start for _, s, _ in rows)
+
+    def overlap_scan(start, end):
+        return [i for i, s, e in rows if s < end and e > start]
+
+    results = [
+        ("list scan, equal start (old)", timed(string_scan, queries)),
+        ("list scan, true overlap", timed(overlap_scan, queries)),
+        ("IntervalIndex.overlapping", timed(index.overlapping, queries)),
+    ]
+    # A multi-day event is kept apart from the short bookings, so their scans stay narrow
+    index.add(0, BASE, BASE + 30 * 24 * 3600)
+    results.append(("  with one 30-day event", timed(index.overlapping, queries)))
+    print(f"{args.bookings} bookings, index built in {build_ms:.1f} ms")
+    for name, (us, hits) in results:
+        print(f"{name:30s} {us:10.1f} us/query  ({hits} conflicts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# bench_nlu.py
+"""
+Micro-benchmarks for message parsing: the separate regex extractors that used to
+live in src/agent.py against the single-pass extractor in src.nlu, per field and
+for the whole slot set (datetime extraction excluded, it is benchmarked in
+bench_fast_datetime.py). Also reports how often the intent results agree.
+
+    python benchmarks/bench_nlu.py --repeat 2000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src import nlu
+
+MESSAGES = [
+    "Book a meeting titled 'Team Meeting' on 2025-01-02 at 14:30:00 for 30 minutes with alice, bob",
+    "Check my availability on 2025-01-02 at 14:30:00 for 60 minutes",
+    "Cancel the meeting titled 'Budget review'",
+    "List my upcoming events",
+    "Show me my upcoming events",
+    "reschedule it to tomorrow at 3pm Asia/Kolkata",
+    "cancel my last appointment",
+    "am I free next week for 1 hour?",
+    "how does this work",
+    "add a call about hiring with Dana and Lee for 2 hours",
+]
+
+
+# The pre-consolidation extractors, as they were in src/agent.py
+def old_extract_intent(user_msg):
+    msg = user_msg.lower()
+    if any(w in msg for w in ["cancel", "delete", "remove"]):
+        return "cancel"
+    if any(w in msg for w in ["edit", "reschedule", "move", "change"]):
+        return "edit"
+    if any(w in msg for w in ["book", "schedule", "set up", "add"]):
+        return "book"
+    if any(w in msg for w in ["list", "show", "what", "upcoming", "events", "history", "held"]):
+        return "list"
+    if any(w in msg for w in ["free", "available", "slots"]):
+        return "check"
+    if any(w in msg for w in ["help", "how"]):
+        return "help"
+    return "unknown"
+
+
+def old_extract_attendees(user_msg):
+    match = re.search(r"with ([A-Za-z ,and]+)", user_msg, re.I)
+    if match:
+        names = re.split(r",| and ", match.group(1))
+        return [n.strip().title() for n in names if n.strip()]
+    return []
+
+
+def old_extract_reference(user_msg):
+    time_match = re.search(r"(\d{1,2}(:\d{2})?\s*(am|pm)?)", user_msg, re.I)
+    summary_match = re.search(r"(event|call|appointment) (about|on|for) ([^,\\.]+)", user_msg, re.I)
+    if time_match:
+        return time_match.group(0)
+    if summary_match:
+        return summary_match.group(3).strip()
+    if "last" in user_msg.lower():
+        return "last"
+    if "next" in user_msg.lower():
+        return "next"
+    if any(w in user_msg.lower() for w in ["it", "that", "this"]):
+        return "context"
+    return None
+
+
+def old_extract_duration(user_msg):
+    duration = 30
+    if re.search(r"1 ?hour", user_msg, re.I):
+        duration = 60
+    elif re.search(r"(\d+)\s*min", user_msg, re.I):
+        duration = int(re.search(r"(\d+)\s*min", user_msg, re.I).group(1))
+    elif re.search(r"(\d+)\s*hour", user_msg, re.I):
+        duration = int(re.search(r"(\d+)\s*hour", user_msg, re.I).group(1)) * 60
+    return duration
+
+
+def old_slots(user_msg):
+    summary_match = re.search(r"for ([^,\\.;]+)", user_msg, re.I)
+    tz_match = re.search(r"([A-Za-z]+/[A-Za-z_]+)", user_msg)
+    vague_words = ["next week", "someday", "later", "soon", "whenever", "some time", "not sure"]
+    return {
+        "intent": old_extract_intent(user_msg),
+        "duration": old_extract_duration(user_msg),
+        "summary": summary_match.group(1).strip() if summary_match else "Event",
+        "timezone": tz_match.group(1) if tz_match else "UTC",
+        "attendees": old_extract_attendees(user_msg),
+        "ambiguity": any(w in user_msg.lower() for w in vague_words),
+        "reference": old_extract_reference(user_msg),
+    }
+
+
+def per_call_us(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            fn(message)
+    return (time.perf_counter() - started) / (repeat * len(MESSAGES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [
+        ("intent", old_extract_intent, nlu.extract_intent),
+        ("duration", old_extract_duration, nlu.extract_duration),
+        ("attendees", old_extract_attendees, nlu.extract_attendees),
+        ("reference", old_extract_reference, nlu.extract_reference),
+        ("all slots", old_slots, lambda m: nlu.parse_message(m, with_datetime=False)),
+    ]
+    print(f"{'field':12s} {'separate':>12s} {'single-pass':>12s}")
+    for name, old, new in cases:
+        before, after = per_call_us(old, args.repeat), per_call_us(new, args.repeat)
+        print(f"{name:12s} {before:9.2f} us {after:9.2f} us  ({before / after:.2f}x)")
+
+    agree = sum(old_extract_intent(m) == nlu.extract_intent(m) for m in MESSAGES)
+    print(f"intent agreement: {agree}/{len(MESSAGES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench_reference_index.py
+"""
+Time how long cancel/edit take to resolve a booking reference ("cancel the
+dentist", "move my 15:30") with the old approach, loading every active booking
+and substring-matching in Python, against the FTS5 trigram index in src.database.
+
+    python benchmarks/bench_reference_index.py --sizes 10000 100000 --lookups 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src import database
+
+TOPICS = ["standup", "dentist", "design review", "1:1", "lunch", "interview", "planning", "retro",
+          "budget sync", "demo", "onboarding", "board meeting", "yoga", "flight", "offsite"]
+NAMES = ["Alice", "Bob", "Carol", "Dan", "Erin", "Frank", "Grace", "Heidi"]
+
+
+def _scan_reference(reference):
+    """The pre-index find_booking_by_reference: list everything, match in Python"""
+    for b in database.list_bookings():
+        if reference in b[3] or reference.lower() in b[1].lower():
+            return b
+    return None
+
+
+def _indexed_reference(reference):
+    matches = database.find_bookings_by_reference(reference, limit=1)
+    return matches[0] if matches else None
+
+
+def populate(n, rng):
+    start = datetime(2025, 1, 1, 8)
+    with database.transaction():
+        for i in range(n):
+            begin = start + timedelta(minutes=30 * rng.randrange(n * 4))
+            database.save_booking(f"{rng.choice(TOPICS).title()} #{i}", f"evt_{i}", begin.isoformat(),
+                                  (begin + timedelta(minutes=30)).isoformat(), "UTC", rng.sample(NAMES, 2),
+                                  allow_overlap=True)
+
+
+def references(count, rng):
+    """Mix of summary words and clock times, as extract_reference produces them"""
+    refs = []
+    for _ in range(count):
+        if rng.random() < 0.7:
+            refs.append(rng.choice(TOPICS))
+        else:
+            refs.append(f"T{rng.randrange(8, 18):02d}:{rng.choice(['00', '30'])}")
+    return refs
+
+
+def timed(resolve, refs):
+    started = time.perf_counter()
+    for ref in refs:
+        resolve(ref)
+    return (time.perf_counter() - started) / len(refs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="active bookings")
+    parser.add_argument("--lookups", type=int, default=200, help="references resolved per run")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'bookings':>9s} {'scan, ms':>10s} {'indexed, ms':>12s} {'speedup':>8s}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_FILE = os.path.join(tmp, "bench.db")
+            database.init_db()
+            populate(size, rng)
+            refs = references(args.lookups, rng)
+            # The scan is slow at 100k; time it on a slice of the same references
+            scan = timed(_scan_reference, refs[:max(1, len(refs) // 10)])
+            indexed = timed(_indexed_reference, refs)
+            database.close_connections()
+        print(f"{size:9d} {scan:10.2f} {indexed:12.2f} {scan / indexed:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
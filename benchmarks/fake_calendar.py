@@ -0,0 +1,463 @@
+# fake_calendar.py
+"""
+A local stand-in for the Google Calendar API v3, for load tests that must not
+touch Google. Serves events insert/get/list/update/patch/delete (with paging and
+sync tokens, as src.calendar_sync uses them), freeBusy and HTTP batch requests,
+from memory. Every request can be delayed (--latency-ms, --jitter-ms) and fail
+with a Google-style error (--error-rate, --error-statuses).
+
+    python benchmarks/fake_calendar.py --port 8081 --events 500 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+
+Point the app at it (no OAuth token needed with GOOGLE_CALENDAR_AUTH=none):
+
+    GOOGLE_CALENDAR_API_ENDPOINT=http://127.0.0.1:8081/ GOOGLE_CALENDAR_AUTH=none uvicorn src.main:app
+
+GET /_fake/stats returns request and injected error counts per method; POST
+/_fake/config changes latency_ms, jitter_ms, error_rate and error_statuses at
+runtime; POST /_fake/reset drops every event and invalidates sync tokens (the
+next incremental sync gets a 410).
+"""
+import argparse
+import collections
+import datetime
+import email.parser
+import json
+import random
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+UTC = datetime.timezone.utc
+API_PREFIX = "/calendar/v3"
+DEFAULT_PAGE_SIZE = 250
+MAX_PAGE_SIZE = 2500
+
+# Reason and status strings of the error bodies Google sends for these codes
+ERROR_REASONS = {
+    400: ("badRequest", "INVALID_ARGUMENT"),
+    403: ("rateLimitExceeded", "PERMISSION_DENIED"),
+    404: ("notFound", "NOT_FOUND"),
+    409: ("duplicate", "ALREADY_EXISTS"),
+    410: ("fullSyncRequired", "GONE"),
+    429: ("rateLimitExceeded", "RESOURCE_EXHAUSTED"),
+    500: ("backendError", "INTERNAL"),
+    503: ("backendError", "UNAVAILABLE"),
+}
+
+TOPICS = ["Standup", "Design review", "1:1", "Lunch", "Interview", "Planning", "Retro", "Budget sync"]
+
+Response = Tuple[int, Optional[Dict[str, Any]]]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def error_body(status: int, message: str) -> Dict[str, Any]:
+    reason, code = ERROR_REASONS.get(status, ("backendError", "UNKNOWN"))
+    return {"error": {"code": status, "message": message, "status": code,
+                      "errors": [{"domain": "global", "reason": reason, "message": message}]}}
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    """RFC 3339 timestamp or date as an aware datetime; naive values are taken as UTC"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ApiError(400, f"Bad time value: {value}")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+def _event_time(when: Dict[str, Any]) -> Optional[datetime.datetime]:
+    return _parse_time(when.get("dateTime") or when.get("date"))
+
+
+def _rfc3339(value: datetime.datetime) -> str:
+    return value.astimezone(UTC).isoformat().replace("+00:00", "Z")
+
+
+class FakeCalendar:
+    """Calendars of events in memory; every change takes the next sequence number, sync tokens are positions in it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calendars: Dict[str, Dict[str, Dict[str, Any]]] = collections.defaultdict(dict)
+        self._seq = 0
+        # Tokens from before a reset are rejected with 410
+        self._generation = uuid.uuid4().hex[:8]
+
+    def reset(self):
+        with self._lock:
+            self._calendars.clear()
+            self._generation = uuid.uuid4().hex[:8]
+
+    def seed(self, count: int, around: Optional[datetime.datetime] = None, days: int = 30, rng=random):
+        """count events of 15 to 60 minutes, on the quarter hour, within +-days of around (default now)"""
+        around = (around or datetime.datetime.now(UTC)).replace(minute=0, second=0, microsecond=0)
+        for _ in range(count):
+            start = around + datetime.timedelta(minutes=15 * rng.randrange(-days * 96, days * 96))
+            end = start + datetime.timedelta(minutes=rng.choice([15, 30, 45, 60]))
+            self.insert("primary", {"summary": rng.choice(TOPICS),
+                                    "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}})
+
+    def _store(self, calendar_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        self._seq += 1
+        event["updated"] = _rfc3339(datetime.datetime.now(UTC))
+        event["etag"] = f'"{self._seq}"'
+        event["_seq"] = self._seq
+        self._calendars[calendar_id][event["id"]] = event
+        return _public(event)
+
+    def _validate(self, body: Dict[str, Any]):
+        start, end = _event_time(body.get("start") or {}), _event_time(body.get("end") or {})
+        if start is None or end is None:
+            raise ApiError(400, "Missing start or end time.")
+        if end < start:
+            raise ApiError(400, "The specified time range is empty.")
+
+    def insert(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._validate(body)
+        now = _rfc3339(datetime.datetime.now(UTC))
+        with self._lock:
+            event_id = body.get("id") or uuid.uuid4().hex
+            existing = self._calendars[calendar_id].get(event_id)
+            if existing and existing["status"] != "cancelled":
+                raise ApiError(409, "The requested identifier already exists.")
+            event = dict(body, id=event_id, kind="calendar#event", status="confirmed", created=now,
+                         htmlLink=f"https://calendar.local/event?eid={event_id}")
+            return self._store(calendar_id, event)
+
+    def _live(self, calendar_id: str, event_id: str) -> Dict[str, Any]:
+        event = self._calendars[calendar_id].get(event_id)
+        if event is None:
+            raise ApiError(404, "Not Found")
+        if event["status"] == "cancelled":
+            raise ApiError(410, "Resource has been deleted")
+        return event
+
+    def get(self, calendar_id: str, event_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return _public(self._live(calendar_id, event_id))
+
+    def update(self, calendar_id: str, event_id: str, body: Dict[str, Any], patch: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            current = self._live(calendar_id, event_id)
+            event = dict(current, **body) if patch else dict(body)
+            self._validate(event)
+            event.update(id=event_id, kind="calendar#event", status="confirmed", created=current["created"],
+                         htmlLink=current["htmlLink"])
+            return self._store(calendar_id, event)
+
+    def delete(self, calendar_id: str, event_id: str):
+        with self._lock:
+            current = self._live(calendar_id, event_id)
+            # Kept as a cancelled tombstone, so incremental syncs see the deletion
+            self._store(calendar_id, {"id": event_id, "kind": "calendar#event", "status": "cancelled",
+                                      "created": current["created"]})
+
+    def list(self, calendar_id: str, query: Dict[str, str]) -> Dict[str, Any]:
+        limit = min(int(query.get("maxResults") or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        sync_token = query.get("syncToken")
+        page_token = query.get("pageToken")
+        with self._lock:
+            if page_token:
+                # offset.position: the page's place in a listing, and the position the listing started at
+                offset, position = map(int, page_token.split("."))
+            else:
+                offset, position = 0, self._seq
+            since = self._since(sync_token) if sync_token else None
+            events = [e for e in self._calendars[calendar_id].values() if e["_seq"] <= position]
+
+        if since is not None:
+            events = [e for e in events if e["_seq"] > since]
+        else:
+            time_min, time_max = _parse_time(query.get("timeMin")), _parse_time(query.get("timeMax"))
+            show_deleted = query.get("showDeleted") == "true"
+            text = (query.get("q") or "").lower()
+            selected = []
+            for event in events:
+                if event["status"] == "cancelled":
+                    if show_deleted:
+                        selected.append(event)
+                    continue
+                start, end = _event_time(event["start"]), _event_time(event["end"])
+                if time_min and end <= time_min or time_max and start >= time_max:
+                    continue
+                if text and text not in (event.get("summary") or "").lower():
+                    continue
+                selected.append(event)
+            events = selected
+        if query.get("orderBy") == "updated":
+            events.sort(key=lambda e: e["_seq"])
+        else:
+            events.sort(key=lambda e: (_event_time(e.get("start") or {}) or datetime.datetime.min.replace(tzinfo=UTC),
+                                       e["id"]))
+
+        page = events[offset:offset + limit]
+        result = {"kind": "calendar#events", "summary": calendar_id, "timeZone": "UTC",
+                  "updated": _rfc3339(datetime.datetime.now(UTC)), "items": [_public(e) for e in page]}
+        if offset + limit < len(events):
+            result["nextPageToken"] = f"{offset + limit}.{position}"
+        else:
+            result["nextSyncToken"] = f"{self._generation}.{position}"
+        return result
+
+    def _since(self, sync_token: str) -> int:
+        generation, _, position = sync_token.partition(".")
+        if generation != self._generation or not position.isdigit():
+            raise ApiError(410, "Sync token is no longer valid, a full sync is required.")
+        return int(position)
+
+    def free_busy(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        time_min, time_max = _parse_time(body.get("timeMin")), _parse_time(body.get("timeMax"))
+        if time_min is None or time_max is None:
+            raise ApiError(400, "Missing timeMin or timeMax.")
+        calendars = {}
+        with self._lock:
+            for item in body.get("items") or []:
+                intervals = []
+                for event in self._calendars[item.get("id")].values():
+                    if event["status"] == "cancelled" or event.get("transparency") == "transparent":
+                        continue
+                    start, end = _event_time(event["start"]), _event_time(event["end"])
+                    if end > time_min and start < time_max:
+                        intervals.append((max(start, time_min), min(end, time_max)))
+                busy: List[List[datetime.datetime]] = []
+                for start, end in sorted(intervals):
+                    if busy and start <= busy[-1][1]:
+                        busy[-1][1] = max(busy[-1][1], end)
+                    else:
+                        busy.append([start, end])
+                calendars[item.get("id")] = {"busy": [{"start": _rfc3339(s), "end": _rfc3339(e)} for s, e in busy]}
+        return {"kind": "calendar#freeBusy", "timeMin": _rfc3339(time_min), "timeMax": _rfc3339(time_max),
+                "calendars": calendars}
+
+
+def _public(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in event.items() if not k.startswith("_")}
+
+
+class Faults:
+    """Injected latency and errors, changeable while the server runs"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (500, 503, 429), seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self._rng = random.Random(seed)
+
+    def configure(self, settings: Dict[str, Any]):
+        for name in ("latency_ms", "jitter_ms", "error_rate"):
+            if name in settings:
+                setattr(self, name, float(settings[name]))
+        if "error_statuses" in settings:
+            self.error_statuses = tuple(int(s) for s in settings["error_statuses"])
+
+    def settings(self) -> Dict[str, Any]:
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms, "error_rate": self.error_rate,
+                "error_statuses": list(self.error_statuses)}
+
+    def delay(self):
+        delay_ms = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def error(self) -> Optional[int]:
+        if self.error_rate and self.error_statuses and self._rng.random() < self.error_rate:
+            return self._rng.choice(self.error_statuses)
+        return None
+
+
+class FakeCalendarServer:
+    """The fake API on a ThreadingHTTPServer; start() serves it from a daemon thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, calendar: Optional[FakeCalendar] = None,
+                 faults: Optional[Faults] = None):
+        self.calendar = calendar or FakeCalendar()
+        self.faults = faults or Faults()
+        self.requests: "collections.Counter[str]" = collections.Counter()
+        self.errors: "collections.Counter[str]" = collections.Counter()
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakeCalendarServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-calendar", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {"requests": dict(self.requests), "injected_errors": dict(self.errors),
+                    "faults": self.faults.settings()}
+
+    def _count(self, method: str, injected: bool = False):
+        with self._stats_lock:
+            self.requests[method] += 1
+            if injected:
+                self.errors[method] += 1
+
+    def dispatch(self, verb: str, target: str, body: bytes) -> Response:
+        """One API call (a whole request, or one part of a batch): (status, JSON body or None)"""
+        parts = urlsplit(target)
+        path = unquote(parts.path)
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        segments = [s for s in path.split("/") if s]
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return 400, error_body(400, "Parse Error")
+
+        method, call = self._route(verb, segments, query, payload)
+        if method is None:
+            return 404, error_body(404, f"No such method: {verb} {path}")
+        status = self.faults.error()
+        self._count(method, injected=status is not None)
+        if status is not None:
+            return status, error_body(status, f"Injected {method} failure")
+        try:
+            return call()
+        except ApiError as e:
+            return e.status, error_body(e.status, str(e))
+
+    def _route(self, verb: str, segments: List[str], query: Dict[str, str], payload: Dict[str, Any]):
+        calendar = self.calendar
+        if segments == ["freeBusy"] and verb == "POST":
+            return "freebusy.query", lambda: (200, calendar.free_busy(payload))
+        if len(segments) >= 3 and segments[0] == "calendars" and segments[2] == "events":
+            calendar_id = segments[1]
+            if len(segments) == 3:
+                if verb == "GET":
+                    return "events.list", lambda: (200, calendar.list(calendar_id, query))
+                if verb == "POST":
+                    return "events.insert", lambda: (200, calendar.insert(calendar_id, payload))
+            elif len(segments) == 4:
+                event_id = segments[3]
+                if verb == "GET":
+                    return "events.get", lambda: (200, calendar.get(calendar_id, event_id))
+                if verb in ("PUT", "PATCH"):
+                    return (f"events.{'patch' if verb == 'PATCH' else 'update'}",
+                            lambda: (200, calendar.update(calendar_id, event_id, payload, patch=verb == "PATCH")))
+                if verb == "DELETE":
+                    def delete():
+                        calendar.delete(calendar_id, event_id)
+                        return 204, None
+                    return "events.delete", delete
+        return None, None
+
+    def dispatch_batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        """A multipart/mixed batch: every part is dispatched in order; returns (content type, body)"""
+        message = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        chunks = []
+        for part in message.get_payload() if message.is_multipart() else []:
+            request = part.get_payload(decode=True) or b""
+            head, _, part_body = request.replace(b"\r\n", b"\n").partition(b"\n\n")
+            request_line = head.split(b"\n", 1)[0].decode()
+            verb, target = request_line.split(" ")[:2]
+            status, payload = self.dispatch(verb, target, part_body.strip())
+            content = json.dumps(payload) if payload is not None else ""
+            content_id = (part.get("Content-ID") or "<>").strip("<>")
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(content.encode())}\r\n\r\n{content}\r\n")
+        chunks.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(chunks).encode()
+
+
+def _handler_for(server: FakeCalendarServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "application/json; charset=UTF-8"):
+            self.send_response(status)
+            if status != 204:
+                self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, payload: Optional[Dict[str, Any]]):
+            self._send(status, json.dumps(payload).encode() if payload is not None else b"")
+
+        def _handle(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            path = urlsplit(self.path).path
+            if path.startswith("/_fake/"):
+                return self._control(path, body)
+            server.faults.delay()
+            if path.rstrip("/").endswith("/batch") or "/batch/" in path:
+                content_type, response = server.dispatch_batch(self.headers.get("Content-Type", ""), body)
+                return self._send(200, response, content_type)
+            self._send_json(*server.dispatch(self.command, self.path, body))
+
+        def _control(self, path: str, body: bytes):
+            if path == "/_fake/stats":
+                return self._send_json(200, server.stats())
+            if path == "/_fake/config" and self.command == "POST":
+                server.faults.configure(json.loads(body or b"{}"))
+                return self._send_json(200, server.faults.settings())
+            if path == "/_fake/reset" and self.command == "POST":
+                server.calendar.reset()
+                return self._send_json(200, {"reset": True})
+            self._send_json(404, error_body(404, "Not Found"))
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--events", type=int, default=0, help="events to seed in 'primary' around now")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay, up to this")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=[500, 503, 429])
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.error_statuses, args.seed)
+    server = FakeCalendarServer(args.host, args.port, faults=faults)
+    server.calendar.seed(args.events, rng=random.Random(args.seed))
+    print(f"fake Calendar API at {server.url} ({args.events} events)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
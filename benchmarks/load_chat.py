@@ -0,0 +1,299 @@
+# load_chat.py
+"""
+Closed-loop load test of /chat: --concurrency clients each send a mix of book,
+check, list, cancel and edit messages back to back (keeping their session_id,
+as the frontend does) for --duration seconds or --requests in total, then the
+run reports throughput and latency percentiles, overall and per kind.
+
+By default the app is started here: uvicorn serving src.main:app in a child
+process, in a scratch directory with its own bookings.db (--bookings seeded
+around now), and the Calendar API pointed at a fake server from
+benchmarks/fake_calendar.py running in this process, so nothing reaches Google.
+--url targets an app that is already running instead.
+
+/chat and /chat/batch read only SQLite; --batch N sends N messages per
+/chat/batch request, and --sync-interval turns on the mirror's background sync
+against the fake API.
+
+    python benchmarks/load_chat.py --concurrency 32 --duration 30
+    python benchmarks/load_chat.py --batch 20 --concurrency 8 --calendar-latency-ms 40 --calendar-error-rate 0.02
+    python benchmarks/load_chat.py --url http://127.0.0.1:8000 --mix book=1,check=3,list=2,cancel=1,edit=1
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import httpx
+
+from benchmarks.fake_calendar import FakeCalendarServer, Faults
+from src import database
+
+TOPICS = ["standup", "design review", "planning", "retro", "interview", "budget sync", "lunch", "1:1"]
+NAMES = ["Alice", "Bob", "Carol", "Dan", "Erin"]
+DEFAULT_MIX = "book=3,check=3,list=2,cancel=1,edit=1"
+
+
+def when(rng: random.Random) -> str:
+    day = datetime.date.today() + datetime.timedelta(days=rng.randrange(1, 60))
+    hour = rng.randrange(8, 18)
+    return f"{day.day} {day.strftime('%B')} at {hour % 12 or 12}{'am' if hour < 12 else 'pm'}"
+
+
+def make_message(kind: str, rng: random.Random) -> str:
+    topic = rng.choice(TOPICS)
+    if kind == "book":
+        return f"book a meeting for {topic} with {rng.choice(NAMES)} on {when(rng)}"
+    if kind == "check":
+        return f"am I free on {when(rng)}"
+    if kind == "list":
+        return rng.choice(["list my events this week", "what's on my schedule today", f"list my events on {when(rng)}"])
+    if kind == "cancel":
+        return f"cancel the {topic}"
+    if kind == "edit":
+        return f"move the {topic} to {when(rng)}"
+    raise ValueError(f"Unknown message kind: {kind}")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        make_message(kind.strip(), random.Random())  # rejects unknown kinds
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(samples, q):
+    return sorted(samples)[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def seed_bookings(db_file: str, count: int, rng: random.Random):
+    """count bookings within a month either side of now, in the database the app will open"""
+    database.DB_FILE = db_file
+    database.init_db()
+    now = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    with database.transaction():
+        for i in range(count):
+            start = now + datetime.timedelta(minutes=30 * rng.randrange(-1440, 1440))
+            database.save_booking(rng.choice(TOPICS).title(), f"evt_seed_{i}", start.isoformat(),
+                                  (start + datetime.timedelta(minutes=30)).isoformat(), "UTC", allow_overlap=True)
+    database.close_connections()
+
+
+def start_app(workdir: str, env: Dict[str, str]):
+    """uvicorn serving src.main:app from workdir on a free local port; returns (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    log = open(os.path.join(workdir, "server.log"), "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=workdir, env={**os.environ, "PYTHONPATH": project_root, **env}, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            httpx.get(f"{base_url}/health")
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    with open(log.name) as f:
+        raise RuntimeError(f"The app did not start:\n{f.read()[-2000:]}")
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = collections.defaultdict(list)
+        self.errors: "collections.Counter[str]" = collections.Counter()
+        self.messages = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> Dict[str, dict]:
+        elapsed = self.elapsed
+        rows = {}
+        every = [ms for samples in self.latencies.values() for ms in samples]
+        for kind, samples in sorted(self.latencies.items()) + [("all", every)]:
+            if not samples:
+                continue
+            rows[kind] = {
+                "count": len(samples),
+                "mean_ms": round(statistics.fmean(samples), 3),
+                "p50_ms": round(percentile(samples, 0.5), 3),
+                "p90_ms": round(percentile(samples, 0.9), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+                "max_ms": round(max(samples), 3),
+            }
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": len(every),
+            "messages": self.messages,
+            "requests_per_s": round(len(every) / elapsed, 2) if elapsed else None,
+            "messages_per_s": round(self.messages / elapsed, 2) if elapsed else None,
+            "errors": dict(self.errors),
+            "latency": rows,
+        }
+
+
+async def run_load(base_url: str, args, mix: Dict[str, float]) -> Results:
+    results = Results()
+    kinds, weights = list(mix), list(mix.values())
+    deadline = None
+    remaining = [args.requests] if args.requests else None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        async def send(kind_messages, session_id, record=True):
+            """One /chat or /chat/batch request; returns the session_id to keep using"""
+            started = time.perf_counter()
+            try:
+                if args.batch:
+                    items = [{"message": message, "session_id": session_id} for _, message in kind_messages]
+                    response = await client.post("/chat/batch", json={"items": items})
+                else:
+                    payload = {"message": kind_messages[0][1]}
+                    if session_id:
+                        payload["session_id"] = session_id
+                    response = await client.post("/chat", json=payload)
+            except httpx.HTTPError as e:
+                if record:
+                    results.errors[type(e).__name__] += 1
+                return session_id
+            elapsed = (time.perf_counter() - started) * 1e3
+            if not record:
+                return session_id
+            kind = "batch" if args.batch else kind_messages[0][0]
+            if response.status_code != 200:
+                results.errors[f"http_{response.status_code}"] += 1
+                return session_id
+            results.latencies[kind].append(elapsed)
+            results.messages += len(kind_messages)
+            if not args.batch:
+                session_id = response.json().get("session_id") or session_id
+            return session_id
+
+        def take() -> bool:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+            return True
+
+        async def client_loop(n: int):
+            rng = random.Random(args.seed * 1000 + n)
+            session_id = f"load-{n}" if args.batch else None
+            while take():
+                picked = rng.choices(kinds, weights, k=max(1, args.batch))
+                session_id = await send([(kind, make_message(kind, rng)) for kind in picked], session_id)
+
+        # Warm up (untimed): the first parse loads dateparser's data, the first lookups build indexes
+        rng = random.Random(args.seed)
+        for kind in kinds:
+            await send([(kind, make_message(kind, rng))], None, record=False)
+
+        started = time.perf_counter()
+        deadline = started + args.duration if args.duration else None
+        await asyncio.gather(*(client_loop(n) for n in range(args.concurrency)))
+        results.elapsed = time.perf_counter() - started
+    return results
+
+
+def print_report(report: Dict[str, dict], server: Optional[dict], fake: Optional[dict]):
+    print(f"\n{report['requests']} requests ({report['messages']} messages) in {report['elapsed_s']:.1f} s: "
+          f"{report['requests_per_s']} req/s, {report['messages_per_s']} msg/s")
+    if report["errors"]:
+        print("errors: " + ", ".join(f"{k} x{v}" for k, v in sorted(report["errors"].items())))
+    print(f"\n{'':8s} {'count':>7s} {'mean ms':>9s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for kind, row in report["latency"].items():
+        print(f"{kind:8s} {row['count']:7d} {row['mean_ms']:9.1f} {row['p50_ms']:9.1f} {row['p90_ms']:9.1f} "
+              f"{row['p99_ms']:9.1f} {row['max_ms']:9.1f}")
+    if server:
+        print("\nper node (server):")
+        for node, stats in server.items():
+            print(f"  {node:18s} {stats['count']:7d} calls, mean {stats['mean_ms']:.3f} ms, max {stats['max_ms']:.3f} ms")
+    if fake:
+        print("\nfake Calendar API:" + ("" if fake["requests"] else " no requests"))
+        for method, count in sorted(fake["requests"].items()):
+            print(f"  {method:18s} {count:7d} requests, {fake['injected_errors'].get(method, 0)} injected errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running app; by default one is started with a fake calendar")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients sending requests back to back")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run (0: until --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="total requests to send (0: until --duration)")
+    parser.add_argument("--batch", type=int, default=0, help="messages per /chat/batch request (0: use /chat)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight pairs of book, check, list, cancel, edit")
+    parser.add_argument("--bookings", type=int, default=1000, help="bookings seeded into the started app's database")
+    parser.add_argument("--calendar-events", type=int, default=500, help="events seeded into the fake calendar")
+    parser.add_argument("--calendar-latency-ms", type=float, default=40.0)
+    parser.add_argument("--calendar-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--calendar-error-rate", type=float, default=0.0)
+    parser.add_argument("--sync-interval", type=float, help="CALENDAR_SYNC_INTERVAL for the started app")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report here as JSON")
+    args = parser.parse_args()
+    if not args.duration and not args.requests:
+        parser.error("give --duration or --requests")
+    mix = parse_mix(args.mix)
+
+    fake = process = None
+    with tempfile.TemporaryDirectory() as workdir:
+        base_url = args.url
+        if not base_url:
+            rng = random.Random(args.seed)
+            fake = FakeCalendarServer(faults=Faults(args.calendar_latency_ms, args.calendar_jitter_ms,
+                                                    args.calendar_error_rate, seed=args.seed)).start()
+            fake.calendar.seed(args.calendar_events, rng=rng)
+            seed_bookings(os.path.join(workdir, "bookings.db"), args.bookings, rng)
+            env = {"GOOGLE_CALENDAR_API_ENDPOINT": fake.url, "GOOGLE_CALENDAR_AUTH": "none"}
+            if args.sync_interval:
+                env["CALENDAR_SYNC_INTERVAL"] = str(args.sync_interval)
+            process, base_url = start_app(workdir, env)
+            print(f"app at {base_url}, fake Calendar API at {fake.url}", flush=True)
+        try:
+            results = asyncio.run(run_load(base_url, args, mix))
+            try:
+                server_stats = httpx.get(f"{base_url}/pipeline/stats").json()
+            except (httpx.HTTPError, ValueError):
+                server_stats = None
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+            if fake:
+                fake.stop()
+
+    report = results.summary()
+    report["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+    fake_stats = fake.stats() if fake else None
+    print_report(report, server_stats, fake_stats)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(report, server=server_stats, fake_calendar=fake_stats), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# replay_chat.py
+"""
+Replays /chat turns recorded by src.capture (CHAT_CAPTURE_FILE) through the parse
+and dispatch pipeline /chat runs (the compiled agent graph), offline: a scratch
+database (empty, or a copy of --db), and the Calendar API pointed at the fake
+server from benchmarks/fake_calendar.py, so nothing reaches Google. Turns run one
+at a time in capture order, each with the message and context event it was
+captured with; rotated files (chat.jsonl.N) are read first, oldest first.
+
+The replay's slots, replies and timings are written to --output and compared
+with the capture itself or, with --compare, with an earlier replay, e.g. of the
+previous version on the same log. Dates in turns that refer to "today",
+"tomorrow" and the like are compared relative to the day each run parsed them.
+Turns whose text was sanitized at capture (an email address replaced by <email>)
+can parse differently from the live turn; two replays of a log see the same text.
+
+    CHAT_CAPTURE_FILE=captures/chat.jsonl uvicorn src.main:app
+    git checkout <old> && python benchmarks/replay_chat.py captures/chat.jsonl --output /tmp/replay-old.json
+    git checkout <new> && python benchmarks/replay_chat.py captures/chat.jsonl --compare /tmp/replay-old.json
+
+With --compare, the exit status is 1 if a pipeline stage's median slowed down by
+more than --threshold.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.fake_calendar import FakeCalendarServer, Faults
+
+_ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:[+-]\d{2}:\d{2}|Z)?")
+
+
+def capture_files(path: str) -> List[str]:
+    """path's rotated files, oldest first, then path itself"""
+    rotated = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        rotated.append(f"{path}.{index}")
+        index += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def read_turns(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        for file_path in capture_files(path):
+            with open(file_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def percentile(samples, q):
+    return sorted(samples)[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def replay(turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    from src.agent import build_agent
+
+    graph = build_agent()
+    results = []
+    for index, turn in enumerate(turns):
+        started = time.perf_counter()
+        try:
+            state = await graph.ainvoke({"user_msg": turn["message"], "context_event": turn.get("context_event")})
+            response, error = state["result"], None
+        except Exception as e:
+            state, response, error = {}, None, str(e)
+        total_ms = (time.perf_counter() - started) * 1e3
+        result = {"index": index, "ts": time.time(), "message": turn["message"], "slots": state.get("slots"),
+                  "response": response, "timing_ms": state.get("timings_ms") or {}, "total_ms": round(total_ms, 3)}
+        if error is not None:
+            result["error"] = error
+        results.append(result)
+    return results
+
+
+def _relative(text: str, day: datetime.date) -> str:
+    """ISO datetimes in text as days from day plus the time"""
+    def shift(match):
+        value = datetime.datetime.fromisoformat(match.group(0).replace("Z", "+00:00"))
+        return f"day{(value.date() - day).days:+d} {value.strftime('%H:%M')}"
+    return _ISO_DATETIME.sub(shift, text)
+
+
+def comparable(turn: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a turn's outcome two runs should agree on"""
+    from src.parse_cache import is_time_stable
+
+    slots = turn.get("slots") or {}
+    response = (turn.get("response") or {}).get("response")
+    outcome = {
+        "intent": slots.get("intent"),
+        "summary": slots.get("summary"),
+        "datetime": slots.get("datetime"),
+        "duration": slots.get("duration"),
+        "attendees": slots.get("attendees"),
+        "response": response,
+        "error": turn.get("error"),
+    }
+    if not is_time_stable(turn["message"]):
+        day = datetime.datetime.fromtimestamp(turn["ts"]).date()
+        for key in ("datetime", "response"):
+            if isinstance(outcome[key], str):
+                outcome[key] = _relative(outcome[key], day)
+    return outcome
+
+
+def latency_table(turns: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    samples: Dict[str, List[float]] = {"total": [t["total_ms"] for t in turns if t.get("total_ms") is not None]}
+    for turn in turns:
+        for stage, ms in (turn.get("timing_ms") or {}).items():
+            samples.setdefault(stage, []).append(ms)
+    return {stage: {"count": len(values), "p50_ms": round(percentile(values, 0.5), 3),
+                    "p95_ms": round(percentile(values, 0.95), 3), "mean_ms": round(statistics.fmean(values), 3)}
+            for stage, values in samples.items() if values}
+
+
+def compare(baseline: List[Dict[str, Any]], current: List[Dict[str, Any]], label: str,
+            threshold: float, show: int) -> List[str]:
+    """Print output differences and latency ratios; returns the stages slower by more than threshold"""
+    pairs = list(zip(baseline, current))
+    differing = []
+    for before, after in pairs:
+        old, new = comparable(before), comparable(after)
+        fields = [key for key in old if old[key] != new[key]]
+        if fields:
+            differing.append((after["message"], fields, old, new))
+    print(f"\noutputs vs {label}: {len(pairs) - len(differing)}/{len(pairs)} turns identical")
+    for message, fields, old, new in differing[:show]:
+        print(f"  {message!r}")
+        for key in fields:
+            print(f"    {key}: {old[key]!r}\n    {' ' * len(key)}  -> {new[key]!r}")
+    if len(differing) > show:
+        print(f"  ...and {len(differing) - show} more")
+
+    before_table, after_table = latency_table(baseline), latency_table(current)
+    regressions = []
+    print(f"\n{'latency vs ' + label:28s} {'p50 before':>11s} {'p50 now':>9s} {'ratio':>7s} {'p95 before':>11s} {'p95 now':>9s}")
+    for stage, after in after_table.items():
+        before = before_table.get(stage)
+        if not before:
+            continue
+        ratio = after["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  slower"
+            regressions.append(stage)
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"  {stage:26s} {before['p50_ms']:11.3f} {after['p50_ms']:9.3f} {ratio:6.2f}x "
+              f"{before['p95_ms']:11.3f} {after['p95_ms']:9.3f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="capture files written with CHAT_CAPTURE_FILE")
+    parser.add_argument("--db", help="replay against a copy of this bookings database instead of an empty one")
+    parser.add_argument("--limit", type=int, help="replay at most this many turns")
+    parser.add_argument("--output", help="write the replay's turns and latency summary here as JSON")
+    parser.add_argument("--compare", help="an earlier --output to compare with, instead of the capture")
+    parser.add_argument("--threshold", type=float, default=0.25, help="median slowdown ratio flagged per stage")
+    parser.add_argument("--show", type=int, default=10, help="differing turns to print")
+    parser.add_argument("--calendar-latency-ms", type=float, default=0.0, help="latency of the fake Calendar API")
+    args = parser.parse_args()
+
+    turns = list(read_turns(args.captures))[:args.limit]
+    if not turns:
+        parser.error("no captured turns found")
+
+    # The fake API is set up before src is imported, so every client built during the replay uses it
+    fake = FakeCalendarServer(faults=Faults(args.calendar_latency_ms)).start()
+    os.environ.update(GOOGLE_CALENDAR_API_ENDPOINT=fake.url, GOOGLE_CALENDAR_AUTH="none")
+    import logging
+    logging.disable(logging.INFO)
+    from src import database
+    from src.async_exec import shutdown_executors
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bookings.db")
+        if args.db:
+            shutil.copyfile(args.db, database.DB_FILE)
+        database.init_db()
+        started = time.perf_counter()
+        results = asyncio.run(replay(turns))
+        elapsed = time.perf_counter() - started
+        shutdown_executors()
+        database.close_connections()
+    fake.stop()
+
+    versions = sorted({str(t.get("version")) for t in turns})
+    print(f"replayed {len(results)} turns (captured by version {', '.join(versions)}) in {elapsed:.1f} s, "
+          f"{sum('error' in r for r in results)} errors")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": {"commit": git_commit(), "created": datetime.datetime.now().isoformat(),
+                                "captures": args.captures, "turns": len(results)},
+                       "latency": latency_table(results), "turns": results}, f, indent=2, default=str)
+        print(f"replay written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            earlier = json.load(f)
+        label = f"replay {earlier['meta'].get('commit') or args.compare}"
+        regressions = compare(earlier["turns"], results, label, args.threshold, args.show)
+    else:
+        # Captured latencies are from the live server (pools shared with other requests), so only indicative
+        regressions = []
+        compare(turns, results, "capture", args.threshold, args.show)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+# suite.py
+"""
+Repeatable micro-benchmark suite for the parsing, slot-finding and storage hot
+paths. Every case runs at each requested dataset size it applies to: bookings in
+a scratch SQLite database, busy events for slot finding, messages of chat history.
+Results are written as JSON; with --baseline, medians are compared against a
+stored run and cases slower by more than --threshold are flagged (exit status 1).
+
+    python benchmarks/suite.py --sizes 100 10000 --output benchmarks/results/latest.json
+    python benchmarks/suite.py --sizes 100 10000 --save-baseline benchmarks/results/baseline.json
+    python benchmarks/suite.py --sizes 100 10000 --baseline benchmarks/results/baseline.json
+    python benchmarks/suite.py --sizes 1000000 --filter 'db\\.'
+
+Datasets are generated from --seed, so runs at the same sizes are comparable.
+"""
+import argparse
+import datetime
+import inspect
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src import agent, database, nlu
+from src.calendar_utils import GoogleCalendarUtils
+from src.parse_cache import parse_cache
+from src.utils import format_event_natural
+
+UTC = datetime.timezone.utc
+DEFAULT_SIZES = [100, 10_000, 100_000]
+# Slot finding and chat history stop growing here; larger sizes reuse the cap
+MAX_EVENTS = 10_000
+MAX_HISTORY = 10_000
+MAX_MIRROR = 100_000
+
+EPOCH = datetime.datetime(2025, 1, 1, 8, tzinfo=UTC)
+TOPICS = ["Standup", "Design review", "1:1", "Lunch", "Interview", "Planning", "Retro", "Budget sync",
+          "Demo", "Onboarding", "Board meeting", "Yoga", "Flight", "Offsite", "Dentist"]
+NAMES = ["Alice", "Bob", "Carol", "Dan", "Erin", "Frank", "Grace", "Heidi"]
+MESSAGES = [
+    "Book a meeting with Alice tomorrow at 2pm",
+    "book a 45 minute call for design review on 12/03/2025 at 10:30",
+    "Am I free on Friday at 3pm?",
+    "cancel the standup",
+    "move my 1:1 to next Tuesday at 9am",
+    "what's on my schedule this week",
+    "list my events today",
+    "help",
+    "Schedule a meeting titled 'Budget sync' with Bob and Carol on 5 March at 16:00 for 1 hour",
+    "reschedule it to 4pm",
+]
+REFERENCES = ["standup", "design review", "dentist", "T09:30", "yoga", "last", "next", "context", "ret"]
+
+
+class Case:
+    """
+    A benchmark: make(ctx, size) returns a callable taking the iteration number.
+    dimension says what size scales ('bookings', 'events', 'history') or None
+    for cases that run once, at size 0. Cases cycling through inputs warm up
+    (and run at least) once per input, so every input is in the sample.
+    """
+
+    def __init__(self, name: str, dimension: Optional[str], make: Callable[["Context", int], Callable[[int], Any]],
+                 warmup: int = 1):
+        self.name = name
+        self.dimension = dimension
+        self.make = make
+        self.warmup = warmup
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, dimension: Optional[str] = None, warmup: int = 1):
+    def register(make):
+        CASES.append(Case(name, dimension, make, warmup))
+        return make
+    return register
+
+
+class Context:
+    """Datasets shared by the cases of one size"""
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.rng = rng
+        self.booking_ids: List[int] = []
+        self.first_id = 0
+
+    def pick_id(self, i: int) -> int:
+        return self.first_id + (i * 7919) % max(1, self.size)
+
+
+# --- datasets ---------------------------------------------------------------
+
+def booking_time(i: int) -> datetime.datetime:
+    return EPOCH + datetime.timedelta(minutes=30 * i)
+
+
+def populate_bookings(n: int, rng: random.Random):
+    """n active bookings, 30 minutes apart, inserted in one transaction per chunk (FTS triggers included)"""
+    now = datetime.datetime.utcnow().isoformat()
+    chunk = 50_000
+    for offset in range(0, n, chunk):
+        rows = []
+        for i in range(offset, min(n, offset + chunk)):
+            start, end = booking_time(i), booking_time(i) + datetime.timedelta(minutes=30)
+            rows.append((f"{rng.choice(TOPICS)} #{i}", f"evt_{i}", start.isoformat(), end.isoformat(), "UTC",
+                         now, now, int(start.timestamp()), int(end.timestamp()), ", ".join(rng.sample(NAMES, 2))))
+        with database.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO bookings (summary, event_id, start_time, end_time, timezone, status, created_at,
+                                      updated_at, start_epoch, end_epoch, attendees)
+                VALUES (?, ?, ?, ?, ?, 'active', ?, ?, ?, ?, ?)
+            """, rows)
+    database.reset_booking_index()
+
+
+def make_events(n: int) -> List[dict]:
+    """n Calendar API event resources spread over a window that keeps about half the time busy"""
+    rng = random.Random(n)
+    window_minutes = max(n * 60, 24 * 60)
+    events = []
+    for i in range(n):
+        start = EPOCH + datetime.timedelta(minutes=15 * rng.randrange(window_minutes // 15))
+        end = start + datetime.timedelta(minutes=rng.choice([15, 30, 45, 60]))
+        events.append({"id": f"e{i}", "summary": rng.choice(TOPICS),
+                       "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}})
+    return events
+
+
+def populate_mirror(n: int):
+    """n events in the 'primary' calendar's mirror"""
+    events = make_events(n)
+    for offset in range(0, len(events), 5000):
+        database.apply_mirror_changes("primary", events[offset:offset + 5000])
+
+
+def make_history(n: int) -> List[Dict[str, str]]:
+    """n chat messages whose only event reply is the first one, so a backwards scan reads them all"""
+    history = [{"role": "assistant", "content": "Event 'Standup' booked for 2025-03-04T09:00:00 (UTC)."}]
+    for i in range(1, n):
+        role = "user" if i % 2 else "assistant"
+        history.append({"role": role, "content": MESSAGES[i % len(MESSAGES)] if role == "user" else "Done."})
+    return history
+
+
+# --- parsing ----------------------------------------------------------------
+
+@case("nlu.extract_intent", warmup=len(MESSAGES))
+def _extract_intent(ctx, size):
+    return lambda i: nlu.extract_intent(MESSAGES[i % len(MESSAGES)])
+
+
+@case("agent.extract_slots[uncached]", warmup=len(MESSAGES))
+def _extract_slots_uncached(ctx, size):
+    parse = inspect.unwrap(agent.extract_slots)
+    return lambda i: parse(MESSAGES[i % len(MESSAGES)])
+
+
+@case("agent.extract_slots[cached]", warmup=len(MESSAGES))
+def _extract_slots_cached(ctx, size):
+    parse_cache.clear()
+    return lambda i: agent.extract_slots(MESSAGES[i % len(MESSAGES)])
+
+
+@case("agent.get_context_event_from_history", "history")
+def _context_from_history(ctx, size):
+    history = make_history(min(size, MAX_HISTORY))
+    return lambda i: agent.get_context_event_from_history(history)
+
+
+@case("utils.format_event_natural")
+def _format_event_natural(ctx, size):
+    row = (1, "Standup", "evt_1", "2025-03-04T09:00:00", "2025-03-04T09:30:00", "Europe/London", "active")
+    event = {"summary": "Standup", "start_time": row[3], "end_time": row[4], "timezone": "America/New_York"}
+    return lambda i: format_event_natural(row if i % 2 else event)
+
+
+# --- slot finding -----------------------------------------------------------
+
+def _offline_calendar(events: List[dict]) -> GoogleCalendarUtils:
+    """A calendar client whose reads return events instead of calling Google"""
+    calendar = GoogleCalendarUtils()
+    busy = [(datetime.datetime.fromisoformat(e["start"]["dateTime"]),
+             datetime.datetime.fromisoformat(e["end"]["dateTime"])) for e in events]
+    calendar.get_calendar_events = lambda start, end: events
+    calendar.get_free_busy = lambda time_min, time_max, timezone='UTC': busy
+    return calendar
+
+
+@case("calendar.find_available_slots", "events")
+def _find_available_slots(ctx, size):
+    events = make_events(min(size, MAX_EVENTS))
+    calendar = _offline_calendar(events)
+    end = EPOCH + datetime.timedelta(days=7)
+    return lambda i: calendar.find_available_slots(EPOCH, end, 30)
+
+
+@case("calendar.find_available_slots_legacy", "events")
+def _find_available_slots_legacy(ctx, size):
+    events = make_events(min(size, MAX_EVENTS))
+    calendar = _offline_calendar(events)
+    end = EPOCH + datetime.timedelta(days=7)
+    return lambda i: calendar.find_available_slots_legacy(EPOCH, end, 30)
+
+
+# --- bookings ---------------------------------------------------------------
+
+@case("agent.find_booking_by_reference", "bookings")
+def _find_booking_by_reference(ctx, size):
+    context_event = {"summary": "Retro", "datetime": booking_time(size // 2).isoformat()}
+    return lambda i: agent.find_booking_by_reference(REFERENCES[i % len(REFERENCES)], context_event)
+
+
+def _window(ctx, i, hours=24):
+    start = booking_time(ctx.pick_id(i) - ctx.first_id)
+    return start, start + datetime.timedelta(hours=hours)
+
+
+@case("db.to_epoch")
+def _to_epoch(ctx, size):
+    values = ["2025-03-04T09:00:00", "2025-03-04T09:00:00+01:00", EPOCH, 1741078800]
+    return lambda i: database.to_epoch(values[i % len(values)])
+
+
+@case("db.save_booking", "bookings")
+def _save_booking(ctx, size):
+    def run(i):
+        start = booking_time(size + i)
+        database.save_booking("Bench", f"bench_{i}", start.isoformat(),
+                              (start + datetime.timedelta(minutes=30)).isoformat(), "UTC", ["Alice"])
+    return run
+
+
+@case("db.list_bookings", "bookings")
+def _list_bookings(ctx, size):
+    return lambda i: database.list_bookings()
+
+
+@case("db.list_bookings_between", "bookings")
+def _list_bookings_between(ctx, size):
+    return lambda i: database.list_bookings_between(*_window(ctx, i))
+
+
+@case("db.list_bookings_page", "bookings")
+def _list_bookings_page(ctx, size):
+    def run(i):
+        start = booking_time(ctx.pick_id(i) - ctx.first_id)
+        cursor = database.encode_cursor(int(start.timestamp()), 0)
+        return database.list_bookings_page(cursor=cursor, limit=database.PAGE_SIZE)
+    return run
+
+
+@case("db.iter_bookings[500 rows]", "bookings")
+def _iter_bookings(ctx, size):
+    def run(i):
+        start, end = _window(ctx, i, hours=250)
+        for _ in database.iter_bookings(start=start, end=end, page_size=database.PAGE_SIZE):
+            pass
+    return run
+
+
+@case("db.count_bookings_between", "bookings")
+def _count_bookings_between(ctx, size):
+    return lambda i: database.count_bookings_between(*_window(ctx, i))
+
+
+@case("db.find_overlapping_bookings", "bookings")
+def _find_overlapping_bookings(ctx, size):
+    database.find_overlapping_bookings(EPOCH, EPOCH)  # build the interval index outside the timing
+    return lambda i: database.find_overlapping_bookings(*_window(ctx, i, hours=1))
+
+
+@case("db.get_booking_by_id", "bookings")
+def _get_booking_by_id(ctx, size):
+    return lambda i: database.get_booking_by_id(ctx.pick_id(i))
+
+
+@case("db.get_last_booking", "bookings")
+def _get_last_booking(ctx, size):
+    return lambda i: database.get_last_booking()
+
+
+@case("db.get_earliest_booking", "bookings")
+def _get_earliest_booking(ctx, size):
+    return lambda i: database.get_earliest_booking()
+
+
+@case("db.get_latest_booking", "bookings")
+def _get_latest_booking(ctx, size):
+    return lambda i: database.get_latest_booking()
+
+
+@case("db.find_bookings_by_reference", "bookings")
+def _find_bookings_by_reference(ctx, size):
+    return lambda i: database.find_bookings_by_reference(REFERENCES[i % 5], limit=1)
+
+
+@case("db.update_booking", "bookings")
+def _update_booking(ctx, size):
+    def run(i):
+        booking_id = ctx.pick_id(i)
+        start = booking_time(booking_id - ctx.first_id)
+        database.update_booking(booking_id, f"Moved {i}", start.isoformat(),
+                                (start + datetime.timedelta(minutes=30)).isoformat(), "UTC")
+    return run
+
+
+@case("db.cancel_booking", "bookings")
+def _cancel_booking(ctx, size):
+    # Registered after the booking reads, so the rows it cancels don't change what they measure
+    return lambda i: database.cancel_booking(ctx.first_id + i % max(1, size))
+
+
+@case("db.apply_mirror_changes", "bookings")
+def _apply_mirror_changes(ctx, size):
+    pages = [make_events(50) for _ in range(4)]
+    return lambda i: database.apply_mirror_changes("bench", pages[i % len(pages)])
+
+
+@case("db.list_mirror_events_between", "bookings")
+def _list_mirror_events_between(ctx, size):
+    return lambda i: database.list_mirror_events_between("primary", EPOCH + datetime.timedelta(hours=i % 500),
+                                                         EPOCH + datetime.timedelta(hours=i % 500 + 24))
+
+
+@case("db.search_mirror_events", "bookings")
+def _search_mirror_events(ctx, size):
+    return lambda i: database.search_mirror_events("primary", TOPICS[i % len(TOPICS)].lower())
+
+
+@case("db.count_mirror_events", "bookings")
+def _count_mirror_events(ctx, size):
+    return lambda i: database.count_mirror_events("primary")
+
+
+@case("db.save_sync_state", "bookings")
+def _save_sync_state(ctx, size):
+    return lambda i: database.save_sync_state("primary", sync_token=f"token-{i}")
+
+
+@case("db.get_sync_state", "bookings")
+def _get_sync_state(ctx, size):
+    return lambda i: database.get_sync_state("primary")
+
+
+@case("db.save_session", "bookings")
+def _save_session(ctx, size):
+    history = make_history(20)
+    context_event = {"summary": "Standup", "datetime": "2025-03-04T09:00:00", "duration": 30}
+    return lambda i: database.save_session(f"s{i % 1000}", context_event, history, time.time())
+
+
+@case("db.load_session", "bookings")
+def _load_session(ctx, size):
+    return lambda i: database.load_session(f"s{i % 1000}")
+
+
+@case("db.count_sessions", "bookings")
+def _count_sessions(ctx, size):
+    return lambda i: database.count_sessions()
+
+
+@case("db.delete_session", "bookings")
+def _delete_session(ctx, size):
+    return lambda i: database.delete_session(f"s{i % 1000}")
+
+
+@case("db.purge_sessions", "bookings")
+def _purge_sessions(ctx, size):
+    return lambda i: database.purge_sessions(time.time() - 3600, 500)
+
+
+# --- runner -----------------------------------------------------------------
+
+def measure(fn: Callable[[int], Any], min_time: float, min_iterations: int, max_iterations: int,
+            warmup: int = 1) -> Dict[str, Any]:
+    """Per-call times of fn until both min_time and min_iterations are reached"""
+    for i in range(warmup):
+        fn(i)
+    min_iterations = max(min_iterations, warmup)
+    samples = []
+    started = time.perf_counter()
+    i = warmup
+    while len(samples) < max_iterations and (len(samples) < min_iterations or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        samples.append((time.perf_counter_ns() - t0) / 1e3)
+        i += 1
+    samples.sort()
+    return {
+        "iterations": len(samples),
+        "median_us": round(statistics.median(samples), 3),
+        "mean_us": round(statistics.fmean(samples), 3),
+        "p95_us": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "min_us": round(samples[0], 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: List[int], pattern: Optional[str], seed: int, min_time: float,
+              min_iterations: int, max_iterations: int) -> Dict[str, Any]:
+    selected = [c for c in CASES if not pattern or re.search(pattern, c.name)]
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def record(c: Case, size: int, ctx: Context):
+        key = f"{c.name}@{size}"
+        result = measure(c.make(ctx, size), min_time, min_iterations, max_iterations, c.warmup)
+        results[key] = {"case": c.name, "size": size, **result}
+        print(f"{key:50s} {result['median_us']:12.2f} us  p95 {result['p95_us']:12.2f}  n={result['iterations']}",
+              flush=True)
+
+    for c in selected:
+        if c.dimension is None:
+            record(c, 0, Context(0, random.Random(seed)))
+
+    for size in sizes:
+        for c in selected:
+            if c.dimension in ("events", "history"):
+                record(c, size, Context(size, random.Random(seed)))
+
+        booking_cases = [c for c in selected if c.dimension == "bookings"]
+        if not booking_cases:
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            database.close_connections()
+            database.DB_FILE = os.path.join(tmp, f"suite-{size}.db")
+            database.init_db()
+            ctx = Context(size, random.Random(seed))
+            started = time.perf_counter()
+            populate_bookings(size, ctx.rng)
+            populate_mirror(min(size, MAX_MIRROR))
+            ctx.first_id = database.get_connection().execute("SELECT MIN(id) FROM bookings").fetchone()[0] or 1
+            print(f"-- {size} bookings ready in {time.perf_counter() - started:.1f} s", flush=True)
+            for c in booking_cases:
+                record(c, size, ctx)
+            database.close_connections()
+
+    return {
+        "meta": {
+            "created": datetime.datetime.now(UTC).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "sizes": sizes,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print median ratios against the baseline; returns the keys slower by more than threshold"""
+    regressions = []
+    print(f"\n{'case@size':50s} {'baseline us':>12s} {'now us':>12s} {'ratio':>7s}")
+    for key, result in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before:
+            continue
+        ratio = result["median_us"] / before["median_us"] if before["median_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"{key:50s} {before['median_us']:12.2f} {result['median_us']:12.2f} {ratio:6.2f}x{flag}")
+    print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="dataset sizes: bookings, busy events and history messages (e.g. 100 ... 1000000)")
+    parser.add_argument("--filter", help="regular expression selecting case names")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=20000)
+    parser.add_argument("--output", default=os.path.join(project_root, "benchmarks", "results", "latest.json"))
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slowdown ratio flagged as a regression")
+    parser.add_argument("--save-baseline", help="also write the results here, for later --baseline runs")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for c in CASES:
+            print(f"{c.name:50s} {c.dimension or '-'}")
+        return
+
+    # Parse timings are not what this suite measures through the log
+    import logging
+    logging.disable(logging.INFO)
+
+    current = run_suite(args.sizes, args.filter, args.seed, args.min_time, args.min_iterations, args.max_iterations)
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
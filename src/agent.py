@@ -1,6 +1,8 @@
-from langgraph import StateGraph, State
-from typing import Dict, Any, Optional, List
+from langgraph.graph import StateGraph, END
+from typing import Dict, Any, Optional, List, Annotated, TypedDict
 import datetime
+import threading
+import time
 import pytz
 import dateparser
 import re
@@ -10,108 +12,79 @@ from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 import os
+from itertools import islice
 from dotenv import load_dotenv
 
+from src.async_exec import run_blocking
+from src.fast_datetime import parse_common_datetime
+from src.free_slots import iter_free_slots
+from src.metrics import CHAT_STAGE_SECONDS
+from src.tracing import span, traced
+from src.nlu import parse_message, extract_intent, extract_duration, extract_attendees, extract_reference
+from src.parse_cache import parse_cache
+from src.database import (
+    save_booking, list_bookings_page, count_bookings_between,
+    find_overlapping_bookings, get_last_booking, cancel_booking, update_booking,
+    get_earliest_booking, get_latest_booking, find_bookings_by_reference, list_bookings_between, transaction,
+    get_booking_by_id, BookingConflict,
+)
+
 # Load environment variables
 load_dotenv()
 
 # Google Calendar API credentials
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
-class BookingState(State):
-    slots: Dict[str, Any] = {}
-    response: Optional[str] = None
-    busy: bool = False
-    context_event: Optional[Dict[str, Any]] = None
-
-def parse_input_node(state: Dict[str, Any], user_msg: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
-    """Parse user input and extract relevant information"""
-    try:
-        # Extract intent
-        intent = extract_intent(user_msg)
-        
-        # Extract datetime
-        datetime_obj = extract_datetime(user_msg)
-        
-        # Extract duration
-        duration = extract_duration(user_msg)
-        
-        # Extract attendees
-        attendees = extract_attendees(user_msg)
-        
-        # Format response
-        state["slots"] = {
-            "intent": intent,
-            "datetime": datetime_obj.isoformat() if datetime_obj else None,
-            "duration": duration,
-            "attendees": attendees,
-            "raw": user_msg
-        }
-        
-        return state
-    except Exception as e:
-        state["response"] = f"Error parsing input: {str(e)}"
-        return state
-
-def extract_intent(user_msg: str) -> str:
-    """Extract intent from user message"""
-    msg = user_msg.lower()
-    if any(w in msg for w in ["cancel", "delete", "remove"]):
-        return "cancel"
-    if any(w in msg for w in ["edit", "reschedule", "move", "change"]):
-        return "edit"
-    if any(w in msg for w in ["book", "schedule", "set up", "add"]):
-        return "book"
-    if any(w in msg for w in ["list", "show", "what", "upcoming", "events", "history", "held"]):
-        return "list"
-    if any(w in msg for w in ["free", "available", "slots"]):
-        return "check"
-    if any(w in msg for w in ["help", "how"]):
-        return "help"
-    return "unknown"
-
+# Number of free slots offered when the requested time is busy, searched for in
+# the ALTERNATIVES_WINDOW after it on a quarter-hour grid
+MAX_ALTERNATIVES = 3
+ALTERNATIVES_WINDOW = datetime.timedelta(hours=2)
+ALTERNATIVES_STEP_MINUTES = 15
+
+# Intents that change bookings
+WRITE_INTENTS = ("book", "cancel", "edit")
+
+# Bookings shown in a chat list reply; the rest are paged via /bookings
+LIST_PAGE_SIZE = 20
+
+def _merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    return {**(left or {}), **(right or {})}
+
+class BookingState(TypedDict, total=False):
+    """State of one /chat turn as it moves through the agent graph"""
+    user_msg: str
+    context_event: Optional[Dict[str, Any]]
+    slots: Dict[str, Any]
+    booking: Optional[tuple]  # bookings row a cancel/edit refers to
+    conflicts: List[int]      # ids of active bookings overlapping the requested time
+    looked_up: bool           # booking and conflicts were looked up by the caller (chat batch)
+    result: Dict[str, Any]    # the reply
+    # Parallel nodes each add their own entry, so updates are merged
+    timings_ms: Annotated[Dict[str, float], _merge_timings]
+
+@parse_cache.memoize
 def extract_datetime(text: str) -> Optional[datetime.datetime]:
-    """Extract datetime from text using dateparser"""
+    """Extract datetime from text: common forms via the fast path, anything else via dateparser"""
+    fast = parse_common_datetime(text)
+    if fast is not None:
+        return fast
     try:
         return dateparser.parse(text)
     except:
         return None
 
-def extract_duration(text: str) -> int:
-    """Extract duration in minutes from text"""
-    duration = re.search(r'(\d+)\s*(?:hour|hr|minute|min)', text.lower())
-    if duration:
-        value = int(duration.group(1))
-        unit = "hour" if "hour" in text.lower() else "minute"
-        return value * 60 if unit == "hour" else value
-    return 30  # Default duration
-
-def extract_attendees(text: str) -> List[str]:
-    """Extract attendees from text"""
-    attendees = re.findall(r'with\s+([\w\s]+)', text.lower())
-    return [a.strip() for a in attendees if a.strip()]
-
 def parse_input_node(user_msg: str, history: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Parse user input and extract relevant information"""
     try:
-        # Extract intent
-        intent = extract_intent(user_msg)
-        
-        # Extract datetime
-        datetime_obj = extract_datetime(user_msg)
-        
-        # Extract duration
-        duration = extract_duration(user_msg)
-        
-        # Extract attendees
-        attendees = extract_attendees(user_msg)
+        # Extract intent, datetime, duration and attendees in one pass
+        parsed = extract_slots(user_msg)
         
         # Format response
         response = {
-            "intent": intent,
-            "datetime": datetime_obj.isoformat() if datetime_obj else None,
-            "duration": duration,
-            "attendees": attendees,
+            "intent": parsed["intent"],
+            "datetime": parsed["datetime"],
+            "duration": parsed["duration"],
+            "attendees": parsed["attendees"],
             "raw": user_msg
         }
         
@@ -122,462 +95,378 @@ def parse_input_node(user_msg: str, history: List[Dict[str, Any]]) -> Dict[str,
             "details": f"Failed to parse input: {str(e)}"
         }
 
-def handle_user_message(parsed_input: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle user message based on parsed input"""
-    try:
-        intent = parsed_input.get("intent", "unknown")
-        
-        if intent == "book":
-            return handle_booking(parsed_input)
-        elif intent == "check":
-            return handle_availability_check(parsed_input)
-        elif intent == "cancel":
-            return handle_cancellation(parsed_input)
-        elif intent == "view":
-            return handle_view_schedule(parsed_input)
-        else:
-            return {
-                "operation": "unknown_intent",
-                "details": "I'm not sure what you want to do. Please try again."
-            }
-    except Exception as e:
-        return {
-            "operation": "error",
-            "details": f"Failed to handle message: {str(e)}"
-        }
-
-def handle_booking(parsed_input: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle booking a new event"""
-    try:
-        # Extract booking details
-        summary = parsed_input.get("summary", "Meeting")
-        start_time = parsed_input.get("datetime")
-        duration = parsed_input.get("duration", 30)
-        attendees = parsed_input.get("attendees", [])
-        
-        if not calendar_available:
-            return {
-                "operation": "warning",
-                "details": "Calendar service is not available. Running in simulation mode."
-            }
-            
-        # Create event details
-        event = {
-            'summary': summary,
-            'start': {
-                'dateTime': start_time.isoformat(),
-                'timeZone': parsed_input.get("timezone", "UTC")
-            },
-            'end': {
-                'dateTime': (start_time + datetime.timedelta(minutes=duration)).isoformat(),
-                'timeZone': parsed_input.get("timezone", "UTC")
-            },
-            'attendees': [{'email': attendee} for attendee in attendees]
-        }
-        
-        # Create the event
-        created_event = calendar_utils.create_event(event)
-        
-        return {
-            "operation": "booked",
-            "details": f"Successfully booked meeting: {summary} at {start_time.strftime('%I:%M %p')}"
-        }
-    except Exception as e:
-        return {
-            "operation": "error",
-            "details": f"Failed to book meeting: {str(e)}"
-        }
-
-def handle_availability_check(parsed_input: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle checking calendar availability"""
-    try:
-        start_time = parsed_input.get("datetime")
-        duration = parsed_input.get("duration", 30)
-        
-        if not calendar_available:
-            return {
-                "operation": "warning",
-                "details": "Calendar service is not available. Running in simulation mode."
-            }
-            
-        end_time = start_time + datetime.timedelta(minutes=duration)
-        
-        events = calendar_utils.get_calendar_events(start_time, end_time)
-        
-        if not events:
-            return {
-                "operation": "available",
-                "details": f"You are free from {start_time.strftime('%I:%M %p')} to {end_time.strftime('%I:%M %p')}"
-            }
-        else:
-            return {
-                "operation": "busy",
-                "details": f"You have meetings during that time: {', '.join(e['summary'] for e in events)}"
-            }
-    except Exception as e:
-        return {
-            "operation": "error",
-            "details": f"Failed to check availability: {str(e)}"
-        }
-
-def handle_cancellation(parsed_input: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle canceling an event"""
-    try:
-        summary = parsed_input.get("summary", "Meeting")
-        
-        if not calendar_available:
-            return {
-                "operation": "warning",
-                "details": "Calendar service is not available. Running in simulation mode."
-            }
-            
-        # Find and delete the event
-        events = calendar_utils.get_calendar_events(
-            datetime.datetime.now() - datetime.timedelta(days=7),
-            datetime.datetime.now() + datetime.timedelta(days=7)
-        )
-        
-        for event in events:
-            if event['summary'].lower() == summary.lower():
-                calendar_utils.delete_event(event['id'])
-                return {
-                    "operation": "canceled",
-                    "details": f"Successfully canceled meeting: {summary}"
-                }
-        
-        return {
-            "operation": "not_found",
-            "details": f"No meeting found with title: {summary}"
-        }
-    except Exception as e:
-        return {
-            "operation": "error",
-            "details": f"Failed to cancel meeting: {str(e)}"
-        }
+@traced("nlu.extract_slots")
+@parse_cache.memoize
+def extract_slots(user_msg, context_event=None):
+    """Intent and every slot of a message in one pass; see nlu.parse_message"""
+    return parse_message(user_msg, context_event)
 
-def handle_view_schedule(parsed_input: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle viewing calendar schedule"""
-    try:
-        start_time = parsed_input.get("datetime")
-        duration = parsed_input.get("duration", 1440)  # Default to full day
-        
-        if not calendar_available:
-            return {
-                "operation": "warning",
-                "details": "Calendar service is not available. Running in simulation mode."
-            }
-            
-        end_time = start_time + datetime.timedelta(minutes=duration)
-        
-        events = calendar_utils.get_calendar_events(start_time, end_time)
-        
-        if not events:
-            return {
-                "operation": "viewed",
-                "details": "No meetings scheduled during that time"
-            }
-        else:
-            event_list = "\n".join([
-                f"- {e['summary']} at {datetime.datetime.fromisoformat(e['start']['dateTime']).strftime('%I:%M %p')}"
-                for e in events
-            ])
-            return {
-                "operation": "viewed",
-                "details": f"Your meetings:\n{event_list}"
-            }
-    except Exception as e:
-        return {
-            "operation": "error",
-            "details": f"Failed to view schedule: {str(e)}"
-        }
 
-def ask_for_missing_info_node(state: dict):
-    slots = state.get("slots", {})
-    if not slots.get("date/time"):
-        state["response"] = "When would you like to schedule it?"
-    elif not slots.get("intent"):
-        state["response"] = "Would you like to book a meeting or just check availability?"
-    return state
+def find_booking_by_reference(reference, context_event=None):
+    """Resolve a cancel/edit reference to an active booking with indexed queries, best match first"""
+    if reference == "last":
+        return get_latest_booking()
+    if reference == "next":
+        return get_earliest_booking()
+    if reference == "context":
+        # The event the conversation is about: by its summary, else its time, nearest to that time
+        near = (context_event or {}).get("datetime")
+        for text in ((context_event or {}).get("summary"), near):
+            matches = find_bookings_by_reference(text, near=near, limit=1) if text else []
+            if matches:
+                return matches[0]
+        return None
+    matches = find_bookings_by_reference(reference, limit=1)
+    return matches[0] if matches else None
 
 
-def check_calendar_node(state: dict):
-    slots = state.get("slots", {})
-    try:
-        dt = datetime.datetime.fromisoformat(slots["date/time"])
-        duration = slots.get("duration", 30)
-        end = dt + datetime.timedelta(minutes=duration)
-        busy = calendar_utils.get_free_busy(dt, end)
-        state["busy"] = bool(busy)
-    except Exception as e:
-        state["response"] = f"Couldn't parse date/time: {e}"
-    return state
+def extract_list_window(user_msg):
+    """
+    Return the (start, end) window a list request asks for, or None for all upcoming
+    events. Days are UTC days, like the bookings' default timezone, and the bounds
+    are aware so to_epoch does not reinterpret a local midnight as UTC.
+    """
+    msg = user_msg.lower()
+    utc = datetime.timezone.utc
+    today = datetime.datetime.combine(datetime.datetime.now(utc).date(), datetime.time.min, tzinfo=utc)
+    if "today" in msg:
+        return today, today + datetime.timedelta(days=1)
+    if "tomorrow" in msg:
+        return today + datetime.timedelta(days=1), today + datetime.timedelta(days=2)
+    if "next week" in msg:
+        return today + datetime.timedelta(days=7), today + datetime.timedelta(days=14)
+    if "week" in msg:
+        return today, today + datetime.timedelta(days=7)
+    return None
 
 
-def suggest_alternatives_node(state: dict):
-    slots = state.get("slots", {})
-    dt = datetime.datetime.fromisoformat(slots["date/time"])
-    duration = slots.get("duration", 30)
-    end = dt + datetime.timedelta(hours=2)
+def format_booking_line(booking):
+    """One line of a list response for a bookings row"""
+    return f"- {booking[1]} at {booking[3]} ({booking[5]})\n"
 
-    alternatives = calendar_utils.find_available_slots(dt, end, duration)
-    if alternatives:
-        times = [f"{s[0].strftime('%A %I:%M %p')} - {s[1].strftime('%I:%M %p')}" for s in alternatives]
-        state["response"] = "You're busy at that time. Available options: " + ", ".join(times)
-    else:
-        state["response"] = "No alternative free slots found."
-    return state
 
+def check_availability(start_time, end_time):
+    """True when no active booking overlaps [start_time, end_time)"""
+    return count_bookings_between(start_time, end_time) == 0
 
-def confirm_booking_node(state: dict):
-    slots = state.get("slots", {})
-    try:
-        dt = datetime.datetime.fromisoformat(slots["date/time"])
-        duration = slots.get("duration", 30)
-        end = dt + datetime.timedelta(minutes=duration)
-        summary = slots.get("summary", "Meeting")
 
-        event = calendar_utils.create_event(dt, end, summary)
-        if 'error' in event:
-            state["response"] = f"Failed to book: {event['error']}"
-        else:
-            state["response"] = f"✅ Meeting '{summary}' booked on {dt.strftime('%A, %B %d at %I:%M %p')}"
-    except Exception:
-        state["response"] = "Booking failed. Please try again."
-    return state
+# The time runs up to the "(timezone)" suffix or the closing period; ISO times keep their - and +
+_CONTEXT_REPLY = re.compile(r"'(.+?)' (?:booked|scheduled|updated|cancelled).*?for ([\w, :+.-]+?)(?: \(|\.?$)")
 
 
-def end_conversation_node(state: dict):
-    if not state.get("response"):
-        state["response"] = "Let me know if you want to schedule another meeting."
-    return state
+def context_event_from_reply(content):
+    """The event an assistant reply is about ("'Standup' booked for ..."), or None"""
+    if not isinstance(content, str) or "event" not in content.lower():
+        return None
+    # This is a simple heuristic; the session store keeps the structured result per turn
+    match = _CONTEXT_REPLY.search(content)
+    if not match:
+        return None
+    dt = dateparser.parse(match.group(2))
+    return {
+        "summary": match.group(1),
+        "datetime": dt.isoformat() if dt else None,
+        "duration": 30,
+        "timezone": "UTC",
+        "attendees": []
+    }
 
 
-def build_agent():
-    graph = StateGraph(BookingState)
+def get_context_event_from_history(messages):
+    # Find the last assistant message with a booking or event in the response
+    for msg in reversed(messages):
+        if msg["role"] == "assistant":
+            context_event = context_event_from_reply(msg["content"])
+            if context_event:
+                return context_event
+    return None
 
-    graph.add_node("parse_input", parse_input_node)
-    graph.add_node("ask_for_missing_info", ask_for_missing_info_node)
-    graph.add_node("check_calendar", check_calendar_node)
-    graph.add_node("suggest_alternatives", suggest_alternatives_node)
-    graph.add_node("confirm_booking", confirm_booking_node)
-    graph.add_node("end_conversation", end_conversation_node)
 
-    graph.add_edge("parse_input", "ask_for_missing_info")
-    graph.add_edge("ask_for_missing_info", "check_calendar")
-    graph.add_conditional_edges(
-        "check_calendar",
-        lambda s: "suggest_alternatives" if s.get("busy") else "confirm_booking"
-    )
-    graph.add_edge("suggest_alternatives", "end_conversation")
-    graph.add_edge("confirm_booking", "end_conversation")
+def slot_window(slots):
+    """(start, end) ISO strings of the time the slots ask about"""
+    start = datetime.datetime.fromisoformat(slots["datetime"])
+    return slots["datetime"], (start + datetime.timedelta(minutes=slots["duration"])).isoformat()
 
-    graph.set_entry_point("parse_input")
-    graph.set_finish_point("end_conversation")
 
-    return graph.compile(), None
+def resolve_booking(slots, context_event=None):
+    """The booking a cancel/edit refers to, or the most recently created one"""
+    ref = slots.get("reference")
+    return find_booking_by_reference(ref, context_event) if ref else get_last_booking()
 
 
-def extract_intent(user_msg):
-    msg = user_msg.lower()
-    if any(w in msg for w in ["cancel", "delete", "remove"]):
-        return "cancel"
-    if any(w in msg for w in ["edit", "reschedule", "move", "change"]):
-        return "edit"
-    if any(w in msg for w in ["book", "schedule", "set up", "add"]):
-        return "book"
-    if any(w in msg for w in ["list", "show", "what", "upcoming", "events", "history", "held"]):
-        return "list"
-    if any(w in msg for w in ["free", "available", "slots"]):
-        return "check"
-    if any(w in msg for w in ["help", "how"]):
-        return "help"
-    return "unknown"
-
-
-def extract_attendees(user_msg):
-    match = re.search(r"with ([A-Za-z ,and]+)", user_msg, re.I)
-    if match:
-        names = re.split(r",| and ", match.group(1))
-        return [n.strip().title() for n in names if n.strip()]
-    return []
-
-
-def extract_reference(user_msg):
-    time_match = re.search(r"(\d{1,2}(:\d{2})?\s*(am|pm)?)", user_msg, re.I)
-    summary_match = re.search(r"(event|call|appointment) (about|on|for) ([^,\\.]+)", user_msg, re.I)
-    if time_match:
-        return time_match.group(0)
-    if summary_match:
-        return summary_match.group(3).strip()
-    if "last" in user_msg.lower():
-        return "last"
-    if "next" in user_msg.lower():
-        return "next"
-    if any(w in user_msg.lower() for w in ["it", "that", "this"]):
-        return "context"
-    return None
+def current_booking(booking, slots, context_event=None):
+    """
+    The booking row as it is now, or the reference resolved again if another turn
+    cancelled it since it was looked up. Call inside the write's transaction, so
+    nothing can change it before the write.
+    """
+    row = get_booking_by_id(booking[0])
+    if row and row[6] == "active":
+        return row
+    return resolve_booking(slots, context_event)
 
 
-def extract_slots(user_msg, context_event=None):
-    import logging
-    found = search_dates(user_msg, settings={"RETURN_AS_TIMEZONE_AWARE": True, "DATE_ORDER": "DMY"})
-    dt = None
-    if found:
-        dt = found[0][1]
-        # If time is missing, try to extract it manually
-        if dt.hour == 0 and dt.minute == 0:
-            time_match = re.search(r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)', user_msg, re.I)
-            if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2) or 0)
-                ampm = time_match.group(3).lower()
-                if ampm == 'pm' and hour != 12:
-                    hour += 12
-                elif ampm == 'am' and hour == 12:
-                    hour = 0
-                dt = dt.replace(hour=hour, minute=minute)
-    duration = 30
-    if re.search(r"1 ?hour", user_msg, re.I):
-        duration = 60
-    elif re.search(r"(\d+)\s*min", user_msg, re.I):
-        duration = int(re.search(r"(\d+)\s*min", user_msg, re.I).group(1))
-    elif re.search(r"(\d+)\s*hour", user_msg, re.I):
-        duration = int(re.search(r"(\d+)\s*hour", user_msg, re.I).group(1)) * 60
-    elif context_event and context_event.get("duration"):
-        duration = context_event["duration"]
-    summary_match = re.search(r"for ([^,\\.;]+)", user_msg, re.I)
-    summary = summary_match.group(1).strip() if summary_match else (context_event["summary"] if context_event and context_event.get("summary") else "Event")
-    tz_match = re.search(r"([A-Za-z]+/[A-Za-z_]+)", user_msg)
-    timezone = tz_match.group(1) if tz_match else (context_event["timezone"] if context_event and context_event.get("timezone") else "UTC")
-    attendees = extract_attendees(user_msg) or (context_event["attendees"] if context_event and context_event.get("attendees") else [])
-    vague_words = ["next week", "someday", "later", "soon", "whenever", "some time", "not sure"]
-    ambiguity = (dt is None) or any(w in user_msg.lower() for w in vague_words)
-    reference = extract_reference(user_msg)
-    # Logging for debugging
-    logging.info(f"Parsed datetime: {dt}, duration: {duration}, timezone: {timezone}, ambiguity: {ambiguity}")
-    return {
-        "datetime": dt.isoformat() if dt else None,
-        "duration": duration,
-        "summary": summary,
-        "timezone": timezone,
-        "attendees": attendees,
-        "ambiguity": ambiguity,
-        "reference": reference
-    }
+def find_conflicts(slots):
+    """Ids of active bookings overlapping the time the slots ask about"""
+    return find_overlapping_bookings(*slot_window(slots))
 
 
-def find_booking_by_reference(reference, context_event=None):
-    bookings = list_bookings()
-    if not bookings:
-        return None
-    if reference == "last":
-        return bookings[-1]
-    if reference == "next":
-        return bookings[0]
-    if reference == "context" and context_event:
-        # Try to match by context event's summary and time
-        for b in bookings:
-            if (context_event.get("summary") and context_event["summary"].lower() in b[1].lower()) or \
-               (context_event.get("datetime") and context_event["datetime"] in b[3]):
-                return b
-    for b in bookings:
-        if reference and (reference in b[3] or reference.lower() in b[1].lower()):
-            return b
-    return None
+def is_write(slots):
+    """True for turns that book, cancel or edit, whose lookups must not be made ahead of other writes"""
+    return slots.get("intent") in WRITE_INTENTS
 
 
+def lookup_many(slots_list, context_events):
+    """
+    The lookups reply_for needs for many parsed read-only turns, read in one
+    transaction (one snapshot) with each distinct reference and time window looked
+    up once. Returns one dict per turn holding the "booking" and/or "conflicts" its
+    intent needs, or None for a write turn: other turns may change what it refers
+    to or overlaps before it runs, so it looks them up itself when it does.
+    """
+    bookings, conflicts, found = {}, {}, []
+    with transaction(immediate=False):
+        for slots, context_event in zip(slots_list, context_events):
+            if is_write(slots):
+                found.append(None)
+                continue
+            needs = _stages_for(slots)
+            lookups = {}
+            if "resolve_reference" in needs:
+                # Only a "context" reference depends on the context event
+                ref = slots.get("reference")
+                key = (ref, json.dumps(context_event, sort_keys=True, default=str) if ref == "context" else None)
+                if key not in bookings:
+                    bookings[key] = resolve_booking(slots, context_event)
+                lookups["booking"] = bookings[key]
+            if "check_calendar" in needs:
+                window = slot_window(slots)
+                if window not in conflicts:
+                    conflicts[window] = find_conflicts(slots)
+                lookups["conflicts"] = conflicts[window]
+            found.append(lookups)
+    return found
+
+
+def suggest_alternatives(slots, ignore=()):
+    """Up to MAX_ALTERNATIVES free (start, end) slots of the requested length after a busy time, from local bookings"""
+    start = datetime.datetime.fromisoformat(slots["datetime"])
+    window_end = start + ALTERNATIVES_WINDOW
+    busy = [(datetime.datetime.fromisoformat(b[3]), datetime.datetime.fromisoformat(b[4]))
+            for b in list_bookings_between(start, window_end) if b[0] not in ignore]
+    # Only the first few alternatives are shown, so stop the sweep early
+    return list(islice(iter_free_slots(start, window_end, busy, slots["duration"], step=ALTERNATIVES_STEP_MINUTES),
+                       MAX_ALTERNATIVES))
+
+
+def busy_reply(slots, ignore=()):
+    """Reply for a requested time that overlaps other bookings, offering free slots after it"""
+    alternatives = suggest_alternatives(slots, ignore)
+    if not alternatives:
+        return {"response": "You already have an event at that time. No alternative free slots found."}
+    times = [f"{s[0].strftime('%A %I:%M %p')} - {s[1].strftime('%I:%M %p')}" for s in alternatives]
+    return {"response": "You already have an event at that time. Available options: " + ", ".join(times),
+            "alternatives": [[s[0].isoformat(), s[1].isoformat()] for s in alternatives]}
+
+
+def reply_for(user_msg, slots, booking=None, conflicts=(), context_event=None):
+    """
+    Carry out the parsed intent and return the reply. booking and conflicts are the
+    resolved reference and overlapping booking ids, looked up beforehand. conflicts
+    only short-cuts a busy reply: bookings and edits are checked again in the write's
+    own transaction, since another turn may have booked the time since, and a
+    cancel or edit re-reads its booking there (see current_booking).
+    """
+    intent = slots["intent"]
+
+    if intent == "book":
+        if slots["ambiguity"]:
+            return {"response": "Please specify a clear date and time for your event."}
+        if conflicts:
+            return busy_reply(slots)
+        start_time, end_time = slot_window(slots)
+        event_id = f"evt_{int(datetime.datetime.now().timestamp())}"
+        try:
+            save_booking(slots["summary"], event_id, start_time, end_time, slots["timezone"], slots["attendees"])
+        except BookingConflict:
+            return busy_reply(slots)
+        response = f"Event '{slots['summary']}' booked for {start_time} ({slots['timezone']})."
+        if slots["attendees"]:
+            response += f" Attendees: {', '.join(slots['attendees'])}."
+        return {"response": response}
+
+    elif intent == "cancel":
+        if not booking:
+            return {"response": "No matching event found to cancel."}
+        with transaction():
+            booking = current_booking(booking, slots, context_event)
+            if booking:
+                cancel_booking(booking[0])
+        if booking:
+            return {"response": f"Cancelled event: '{booking[1]}' at {booking[3]}"}
+        return {"response": "No matching event found to cancel."}
 
-def get_context_event_from_history(messages):
-    # Find the last assistant message with a booking or event in the response
-    for msg in reversed(messages):
-        if msg["role"] == "assistant" and "event" in msg["content"].lower():
-            # Try to extract event details from the message
-            # This is a simple heuristic; you can make it more robust if you store structured data in the session
-            match = re.search(r"'(.+?)' (?:booked|scheduled|updated|cancelled).*?for ([\w, :]+)", msg["content"])
-            if match:
-                summary = match.group(1)
-                dt_str = match.group(2)
-                dt = dateparser.parse(dt_str)
-                return {
-                    "summary": summary,
-                    "datetime": dt.isoformat() if dt else None,
-                    "duration": 30,
-                    "timezone": "UTC",
-                    "attendees": []
-                }
-    return None
+    elif intent == "edit":
+        if not booking:
+            return {"response": "No matching event found to edit."}
+        if slots["ambiguity"]:
+            return {"response": "Please specify the new date/time or summary for your event."}
+        # The event being moved may overlap its own old time
+        if set(conflicts) - {booking[0]}:
+            return busy_reply(slots, ignore={booking[0]})
+        start_time, end_time = slot_window(slots)
+        try:
+            with transaction():
+                booking = current_booking(booking, slots, context_event)
+                if booking:
+                    update_booking(booking[0], slots["summary"], start_time, end_time, slots["timezone"])
+        except BookingConflict:
+            return busy_reply(slots, ignore={booking[0]})
+        if booking:
+            return {"response": f"Updated event to '{slots['summary']}' at {start_time} ({slots['timezone']})."}
+        return {"response": "No matching event found to edit."}
+
+    elif intent == "list":
+        window = extract_list_window(user_msg) or (None, None)
+        bookings, next_cursor = list_bookings_page(limit=LIST_PAGE_SIZE, start=window[0], end=window[1])
+        if not bookings:
+            return {"response": "No events found."}
+        response = "Your events:\n" + "".join(format_booking_line(b) for b in bookings)
+        if next_cursor:
+            response += "...and more. Use /bookings or /bookings/stream to see the rest.\n"
+        return {"response": response, "next_cursor": next_cursor}
+
+    elif intent == "check":
+        if not slots["datetime"]:
+            return {"response": "Please specify a clear date and time to check."}
+        start_time, end_time = slot_window(slots)
+        # The index pre-check can miss bookings made by another worker; SQL confirms a free time
+        if not conflicts and check_availability(start_time, end_time):
+            return {"response": f"You are free from {start_time} to {end_time}"}
+        return {"response": f"You have events during that time"}
+
+    elif intent == "help":
+        return {"response": "I can help you with:\n- Booking new events\n- Cancelling events\n- Editing events\n- Listing your events\n- Checking availability\nJust let me know what you'd like to do!"}
+
+    return {"response": "I'm not sure what you want to do. Try asking for help."}
 
 
 def handle_user_message(user_msg, messages=None):
     """
     user_msg: str, the current user message
     messages: list of dicts, the chat history (each dict: {"role": "user"/"assistant", "content": str})
+
+    Every step in sequence on the calling thread; /chat runs the same steps through
+    the graph from build_agent().
     """
     try:
         context_event = get_context_event_from_history(messages) if messages else None
-        intent = extract_intent(user_msg)
         slots = extract_slots(user_msg, context_event)
-        result = {}
-
-        if intent == "book":
-            if slots["ambiguity"]:
-                return {"response": "Please specify a clear date and time for your event."}
-            
-            start_time = slots["datetime"]
-            end_time = (dateparser.parse(slots["datetime"]) + datetime.timedelta(minutes=slots["duration"])).isoformat()
-            
-            for b in list_bookings():
-                if b[3] == start_time and b[6] == 'active':
-                    return {"response": "You already have an event at that time."}
-            
-            event_id = f"evt_{int(datetime.now().timestamp())}"
-            save_booking(slots["summary"], event_id, start_time, end_time, slots["timezone"])
-            response = f"Event '{slots['summary']}' booked for {start_time} ({slots['timezone']})."
-            if slots["attendees"]:
-                response += f" Attendees: {', '.join(slots['attendees'])}."
-            return {"response": response}
-        
-        elif intent == "cancel":
-            ref = slots.get("reference")
-            booking = find_booking_by_reference(ref, context_event) if ref else get_last_booking()
-            if booking:
-                cancel_booking(booking[0])
-                return {"response": f"Cancelled event: '{booking[1]}' at {booking[3]}"}
-            return {"response": "No matching event found to cancel."}
-        
-        elif intent == "edit":
-            ref = slots.get("reference")
-            booking = find_booking_by_reference(ref, context_event) if ref else get_last_booking()
-            if booking:
-                if slots["ambiguity"]:
-                    return {"response": "Please specify the new date/time or summary for your event."}
-                
-                start_time = slots["datetime"]
-                end_time = (dateparser.parse(slots["datetime"]) + datetime.timedelta(minutes=slots["duration"])).isoformat()
-                update_booking(booking[0], slots["summary"], start_time, end_time, slots["timezone"])
-                return {"response": f"Updated event to '{slots['summary']}' at {start_time} ({slots['timezone']})."}
-            return {"response": "No matching event found to edit."}
-        
-        elif intent == "list":
-            bookings = list_bookings()
-            if not bookings:
-                return {"response": "No events found."}
-            response = "Your events:\n"
-            for b in bookings:
-                response += f"- {b[1]} at {b[3]} ({b[5]})\n"
-            return {"response": response}
-        
-        elif intent == "check":
-            start_time = slots["datetime"]
-            end_time = (dateparser.parse(slots["datetime"]) + datetime.timedelta(minutes=slots["duration"])).isoformat()
-            available = check_availability(start_time, end_time)
-            if available:
-                return {"response": f"You are free from {start_time} to {end_time}"}
-            return {"response": f"You have events during that time"}
-        
-        elif intent == "help":
-            return {"response": "I can help you with:\n- Booking new events\n- Cancelling events\n- Editing events\n- Listing your events\n- Checking availability\nJust let me know what you'd like to do!"}
-        
-        return {"response": "I'm not sure what you want to do. Try asking for help."}
+        needs = _stages_for(slots)
+        booking = resolve_booking(slots, context_event) if "resolve_reference" in needs else None
+        conflicts = find_conflicts(slots) if "check_calendar" in needs else []
+        return reply_for(user_msg, slots, booking, conflicts, context_event)
     except Exception as e:
         return {"response": f"Error processing request: {str(e)}"}
+
+
+class NodeTimings:
+    """Call count, total and worst wall time per graph node since startup"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, node: str, elapsed_ms: float):
+        with self._lock:
+            stats = self._stats.setdefault(node, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                node: {"count": s["count"], "mean_ms": round(s["total_ms"] / s["count"], 3),
+                       "max_ms": round(s["max_ms"], 3), "total_ms": round(s["total_ms"], 3)}
+                for node, s in self._stats.items()
+            }
+
+
+node_timings = NodeTimings()
+
+
+def _timed(name, node):
+    """Wrap an async node in a chat.<name> span; its wall time lands in the turn's timings_ms, node_timings and /metrics"""
+    series = CHAT_STAGE_SECONDS.labels(name)
+
+    async def run(state: BookingState) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with span(f"chat.{name}"):
+            update = await node(state)
+        elapsed = (time.perf_counter() - started) * 1e3
+        series.observe(elapsed / 1e3)
+        node_timings.record(name, elapsed)
+        return {**update, "timings_ms": {name: round(elapsed, 3)}}
+    run.__name__ = name
+    return run
+
+
+def _stages_for(slots):
+    """Lookups the reply needs; they are independent and run concurrently in the graph"""
+    intent = slots.get("intent")
+    stages = []
+    if intent in ("cancel", "edit"):
+        stages.append("resolve_reference")
+    if intent in ("book", "edit", "check") and slots.get("datetime"):
+        stages.append("check_calendar")
+    return stages
+
+
+async def parse_node(state: BookingState) -> Dict[str, Any]:
+    if state.get("slots"):
+        return {}  # parsed by the caller (chat batch)
+    return {"slots": await run_blocking("nlu", extract_slots, state["user_msg"], state.get("context_event"))}
+
+
+async def resolve_reference_node(state: BookingState) -> Dict[str, Any]:
+    return {"booking": await run_blocking("db", resolve_booking, state["slots"], state.get("context_event"))}
+
+
+async def check_calendar_node(state: BookingState) -> Dict[str, Any]:
+    return {"conflicts": await run_blocking("db", find_conflicts, state["slots"])}
+
+
+async def respond_node(state: BookingState) -> Dict[str, Any]:
+    slots = state["slots"]
+    result = await run_blocking("db", reply_for, state.get("user_msg") or slots.get("raw", ""), slots,
+                                state.get("booking"), state.get("conflicts") or [], state.get("context_event"))
+    return {"result": result}
+
+
+def build_agent():
+    """
+    Compile the /chat pipeline: parse, then the reference and calendar lookups the
+    intent needs (concurrently, in one step), then respond. Turns passed in with
+    slots and looked_up (chat batch) only run respond. Compile once and reuse;
+    every node's time is recorded in the turn's timings_ms and in node_timings.
+    """
+    graph = StateGraph(BookingState)
+
+    graph.add_node("parse", _timed("parse", parse_node))
+    graph.add_node("resolve_reference", _timed("resolve_reference", resolve_reference_node))
+    graph.add_node("check_calendar", _timed("check_calendar", check_calendar_node))
+    graph.add_node("respond", _timed("respond", respond_node))
+
+    graph.set_entry_point("parse")
+    graph.add_conditional_edges(
+        "parse",
+        lambda s: (not s.get("looked_up") and _stages_for(s["slots"])) or ["respond"],
+        ["resolve_reference", "check_calendar", "respond"]
+    )
+    # Branches started together finish in the same step, so respond runs once after both
+    graph.add_edge("resolve_reference", "respond")
+    graph.add_edge("check_calendar", "respond")
+    graph.add_edge("respond", END)
+
+    return graph.compile()
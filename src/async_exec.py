@@ -0,0 +1,69 @@
+# async_exec.py
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Bounded worker pools for blocking work, so a slow Google call or SQLite lock
+# only ties up its own pool instead of the event loop
+POOL_SIZES = {
+    "calendar": int(os.getenv("CALENDAR_POOL_SIZE", "16")),  # googleapiclient round-trips
+    "db": int(os.getenv("DB_POOL_SIZE", "4")),               # sqlite3, one connection per worker thread
+    "nlu": int(os.getenv("NLU_POOL_SIZE", "4")),             # dateparser / regex parsing
+}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(pool: str) -> ThreadPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=POOL_SIZES[pool], thread_name_prefix=f"{pool}-pool")
+            _executors[pool] = executor
+        return executor
+
+
+async def run_blocking(pool: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call on the named pool and await its result, in a copy of the caller's context"""
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not carry contextvars over; the copy keeps the current trace span
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(pool), call)
+
+
+def shutdown_executors(wait: bool = True):
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=wait)
+        _executors.clear()
+
+
+class AsyncFacade:
+    """
+    Awaitable view of a blocking object or module: every callable attribute becomes a
+    coroutine function that runs on the given pool. Plain attributes pass through.
+
+        calendar = AsyncFacade(calendar_utils, "calendar")
+        events = await calendar.get_calendar_events(start, end)
+    """
+
+    def __init__(self, target: Any, pool: str):
+        self._target = target
+        self._pool = pool
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await run_blocking(self._pool, attr, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
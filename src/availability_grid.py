@@ -0,0 +1,101 @@
+# availability_grid.py
+import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+
+def _epoch(dt: datetime.datetime) -> float:
+    """Epoch seconds; naive datetimes are treated as UTC like the rest of the app"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+def grid_size(window_start: datetime.datetime, window_end: datetime.datetime, granularity_minutes: int) -> int:
+    """Number of cells needed to cover [window_start, window_end)"""
+    span = _epoch(window_end) - _epoch(window_start)
+    return max(0, int(np.ceil(span / (granularity_minutes * 60))))
+
+
+def rasterize(busy: Iterable[Interval], window_start: datetime.datetime, window_end: datetime.datetime,
+              granularity_minutes: int = 15) -> np.ndarray:
+    """
+    Rasterize busy intervals into a boolean array with one cell per `granularity_minutes`
+    starting at window_start. A cell is busy if any interval overlaps it at all.
+    """
+    size = grid_size(window_start, window_end, granularity_minutes)
+    intervals = np.array([(_epoch(s), _epoch(e)) for s, e in busy], dtype=np.float64).reshape(-1, 2)
+    if size == 0 or len(intervals) == 0:
+        return np.zeros(size, dtype=bool)
+
+    cell = granularity_minutes * 60
+    offsets = (intervals - _epoch(window_start)) / cell
+    first = np.clip(np.floor(offsets[:, 0]).astype(np.int64), 0, size)
+    last = np.clip(np.ceil(offsets[:, 1]).astype(np.int64), 0, size)
+    keep = last > first
+    # Difference array: +1 where an interval starts covering cells, -1 where it stops
+    coverage = np.zeros(size + 1, dtype=np.int32)
+    np.add.at(coverage, first[keep], 1)
+    np.add.at(coverage, last[keep], -1)
+    return np.cumsum(coverage[:-1]) > 0
+
+
+def combine(busy_grids: Sequence[np.ndarray], require: str = "all") -> np.ndarray:
+    """
+    Merge per-participant busy grids into one free grid.
+    require="all": free only when every participant is free (AND of free cells);
+    require="any": free when at least one participant is free (OR of free cells).
+    """
+    stacked = np.vstack(busy_grids)
+    if require == "all":
+        return ~np.any(stacked, axis=0)
+    if require == "any":
+        return ~np.all(stacked, axis=0)
+    raise ValueError(f"require must be 'all' or 'any', not {require!r}")
+
+
+def free_runs(free: np.ndarray, min_cells: int = 1) -> np.ndarray:
+    """(start, end) cell indexes of maximal free runs at least min_cells long, as an (n, 2) array"""
+    padded = np.concatenate(([False], free, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    runs = edges.reshape(-1, 2)
+    return runs[(runs[:, 1] - runs[:, 0]) >= min_cells]
+
+
+def slot_starts(runs: np.ndarray, duration_cells: int, step_cells: int) -> np.ndarray:
+    """Cell indexes of every slot start that fits inside the runs, on multiples of step_cells"""
+    if len(runs) == 0:
+        return np.empty(0, dtype=np.int64)
+    first = -(-runs[:, 0] // step_cells) * step_cells  # round run starts up to the step grid
+    counts = np.maximum(0, (runs[:, 1] - first - duration_cells) // step_cells + 1)
+    # Position of each slot within its run: 0, 1, 2, ... restarting at every run
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(first, counts) + offsets * step_cells
+
+
+def find_slots(busy_by_participant: Dict[str, Iterable[Interval]], window_start: datetime.datetime,
+               window_end: datetime.datetime, duration_minutes: int = 30, granularity_minutes: int = 15,
+               step_minutes: int = None, require: str = "all") -> List[Interval]:
+    """
+    Vectorized multi-participant slot search. Busy intervals are rounded outward to the
+    grid, so results are conservative at the chosen granularity. Slot starts lie on a
+    step_minutes grid (default: the duration) anchored at window_start, as in free_slots.
+    """
+    duration_cells = int(np.ceil(duration_minutes / granularity_minutes))
+    step_cells = max(1, int(np.ceil((step_minutes or duration_minutes) / granularity_minutes)))
+    size = grid_size(window_start, window_end, granularity_minutes)
+    grids = [rasterize(busy, window_start, window_end, granularity_minutes)
+             for busy in busy_by_participant.values()] or [np.zeros(size, dtype=bool)]
+
+    free = combine(grids, require)
+    # The final cell may be partial; it is only usable if the window covers it fully
+    full_cells = int((_epoch(window_end) - _epoch(window_start)) // (granularity_minutes * 60))
+    free[full_cells:] = False
+
+    cell = datetime.timedelta(minutes=granularity_minutes)
+    duration = datetime.timedelta(minutes=duration_minutes)
+    starts = slot_starts(free_runs(free, duration_cells), duration_cells, step_cells)
+    return [(window_start + int(i) * cell, window_start + int(i) * cell + duration) for i in starts]
@@ -0,0 +1,129 @@
+# calendar_cache.py
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.free_slots import event_interval
+
+
+def _epoch(dt: datetime.datetime) -> float:
+    """Epoch seconds; naive datetimes are treated as UTC like get_calendar_events does"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+class RangeCache:
+    """
+    TTL + LRU cache of calendar reads keyed by (kind, calendar) and a time range.
+
+    A lookup for [start, end) is served from any fresh entry whose range covers it,
+    narrowing the cached items with the `subset` function given to get(). Entries are
+    evicted least-recently-used once max_entries is reached, and dropped by
+    invalidate() when our own writes change the calendar.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        # (scope, start, end) -> (fetched_at, items); scope is (kind, calendar_id, ...)
+        self._entries: "OrderedDict[Tuple[Hashable, float, float], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, scope: Hashable, start: datetime.datetime, end: datetime.datetime,
+            subset: Callable[[Any, float, float], Any]) -> Optional[Any]:
+        """Cached items for [start, end) within scope, or None on a miss"""
+        lo, hi = _epoch(start), _epoch(end)
+        now = self._clock()
+        with self._lock:
+            best = None
+            for key in list(self._entries):
+                key_scope, key_start, key_end = key
+                if key_scope != scope:
+                    continue
+                fetched_at, items = self._entries[key]
+                if now - fetched_at > self.ttl_seconds:
+                    del self._entries[key]
+                    continue
+                if key_start <= lo and key_end >= hi and (best is None or key_end - key_start < best[2] - best[1]):
+                    best = key
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            items = self._entries[best][1]
+        if (best[1], best[2]) == (lo, hi):
+            return items
+        return subset(items, lo, hi)
+
+    def put(self, scope: Hashable, start: datetime.datetime, end: datetime.datetime, items: Any):
+        key = (scope, _epoch(start), _epoch(end))
+        with self._lock:
+            self._entries[key] = (self._clock(), items)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, calendar_id: Optional[str] = None, start: Optional[datetime.datetime] = None,
+                   end: Optional[datetime.datetime] = None):
+        """
+        Drop entries for calendar_id (every calendar if None). With start/end, only
+        entries whose range overlaps [start, end) are dropped.
+        """
+        lo = _epoch(start) if start is not None else float('-inf')
+        hi = _epoch(end) if end is not None else float('inf')
+        with self._lock:
+            for key in list(self._entries):
+                scope, key_start, key_end = key
+                if calendar_id is not None and scope[1] != calendar_id:
+                    continue
+                if key_start < hi and key_end > lo:
+                    del self._entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
+
+
+def events_in_range(events: List[dict], lo: float, hi: float) -> List[dict]:
+    """Events (Calendar API resources) overlapping [lo, hi) epoch seconds"""
+    selected = []
+    for event in events:
+        interval = event_interval(event)
+        if interval and _epoch(interval[0]) < hi and _epoch(interval[1]) > lo:
+            selected.append(event)
+    return selected
+
+
+def busy_in_range(busy: List[Tuple[datetime.datetime, datetime.datetime]], lo: float, hi: float):
+    """(start, end) busy periods overlapping [lo, hi), clipped to it as freeBusy would"""
+    selected = []
+    for start, end in busy:
+        if _epoch(start) < hi and _epoch(end) > lo:
+            clip_lo = datetime.datetime.fromtimestamp(lo, start.tzinfo or datetime.timezone.utc)
+            clip_hi = datetime.datetime.fromtimestamp(hi, end.tzinfo or datetime.timezone.utc)
+            if start.tzinfo is None:
+                clip_lo, clip_hi = clip_lo.replace(tzinfo=None), clip_hi.replace(tzinfo=None)
+            selected.append((max(start, clip_lo), min(end, clip_hi)))
+    return selected
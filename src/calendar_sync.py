@@ -0,0 +1,140 @@
+# calendar_sync.py
+import datetime
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from googleapiclient.errors import HttpError
+
+from src.database import (
+    apply_mirror_changes, replace_mirror, list_mirror_events_between, search_mirror_events,
+    count_mirror_events, get_sync_state, save_sync_state,
+)
+from src.free_slots import event_interval, merge_intervals
+from src.metrics import execute_api
+
+# Events per events().list page (API maximum is 2500)
+SYNC_PAGE_SIZE = 250
+
+
+class CalendarMirror:
+    """
+    Keeps the events_mirror table current with a Google Calendar.
+
+    The first sync() lists every event and stores the returned nextSyncToken; later
+    calls send only that token and apply the changes (including deletions). A 410
+    Gone reply means the token expired, so the mirror is rebuilt with a full sync.
+    A full sync is built in a staging table and swapped in when its last page is
+    stored, so readers never see a partly rebuilt mirror. Reads are served from
+    SQLite once the mirror is fresh (synced within max_lag_seconds).
+    """
+
+    def __init__(self, calendar_utils, calendar_id: str = 'primary', max_lag_seconds: float = 300):
+        self.calendar_utils = calendar_utils
+        self.calendar_id = calendar_id
+        self.max_lag_seconds = max_lag_seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync(self) -> Dict[str, Any]:
+        """Run one incremental sync (full on first run or after 410); returns sync_status()"""
+        with self._lock:
+            service = self.calendar_utils.service
+            if not service:
+                return self.sync_status()
+            state = get_sync_state(self.calendar_id) or {}
+            try:
+                try:
+                    self._sync_pages(service, state.get("sync_token"))
+                except HttpError as e:
+                    if e.resp.status != 410 or not state.get("sync_token"):
+                        raise
+                    logging.info(f"Sync token for {self.calendar_id} expired, running a full sync")
+                    self._sync_pages(service, None)
+            except Exception as e:
+                logging.error(f"Failed to sync calendar {self.calendar_id}: {str(e)}")
+                save_sync_state(self.calendar_id, error=str(e))
+            return self.sync_status()
+
+    def _sync_pages(self, service, sync_token: Optional[str]):
+        full_sync = sync_token is None
+        page_token = None
+        first_page = True
+        while True:
+            params = {"calendarId": self.calendar_id, "singleEvents": True, "maxResults": SYNC_PAGE_SIZE}
+            if page_token:
+                params["pageToken"] = page_token
+            if sync_token:
+                params["syncToken"] = sync_token
+            result = execute_api("events.list", service.events().list(**params))
+            # A full sync starts from an empty staging table; increments go straight to the mirror
+            apply_mirror_changes(self.calendar_id, result.get("items", []), reset=full_sync and first_page,
+                                 staging=full_sync)
+            first_page = False
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+        if full_sync:
+            replace_mirror(self.calendar_id, result.get("nextSyncToken"))
+        else:
+            save_sync_state(self.calendar_id, result.get("nextSyncToken"))
+        self.calendar_utils.cache.invalidate(self.calendar_id)
+
+    def lag_seconds(self) -> Optional[float]:
+        """Seconds since the last successful sync, or None if it never ran"""
+        state = get_sync_state(self.calendar_id)
+        if not state or not state["last_sync"]:
+            return None
+        return (datetime.datetime.utcnow() - datetime.datetime.fromisoformat(state["last_sync"])).total_seconds()
+
+    def is_fresh(self) -> bool:
+        lag = self.lag_seconds()
+        return lag is not None and lag <= self.max_lag_seconds
+
+    def sync_status(self) -> Dict[str, Any]:
+        state = get_sync_state(self.calendar_id) or {}
+        return {
+            "calendar_id": self.calendar_id,
+            "has_sync_token": bool(state.get("sync_token")),
+            "last_full_sync": state.get("last_full_sync"),
+            "last_sync": state.get("last_sync"),
+            "last_error": state.get("last_error"),
+            "lag_seconds": self.lag_seconds(),
+            "fresh": self.is_fresh(),
+            "events": count_mirror_events(self.calendar_id),
+            "background": bool(self._thread and self._thread.is_alive()),
+        }
+
+    def events_between(self, start_time: datetime.datetime, end_time: datetime.datetime):
+        return list_mirror_events_between(self.calendar_id, start_time, end_time)
+
+    def busy_between(self, start_time: datetime.datetime, end_time: datetime.datetime):
+        """Merged (start, end) periods of mirrored events that block time in the range, as freeBusy reports them"""
+        busy = []
+        for event in self.events_between(start_time, end_time):
+            interval = event_interval(event) if event.get("transparency") != "transparent" else None
+            if interval:
+                # All-day dates are naive; they are UTC, as in the mirror's epochs
+                busy.append(tuple(dt if dt.tzinfo else dt.replace(tzinfo=datetime.timezone.utc) for dt in interval))
+        return merge_intervals(busy)
+
+    def search(self, text: str, limit: int = 20):
+        return search_mirror_events(self.calendar_id, text, limit)
+
+    def start(self, interval_seconds: float = 60):
+        """Sync now and then every interval_seconds on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.sync()
+                self._stop.wait(interval_seconds)
+
+        self._thread = threading.Thread(target=run, name=f"calendar-sync-{self.calendar_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -7,58 +7,164 @@ import dateparser
 import pytz
 import logging
 import json
+import threading
+from itertools import islice
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from google.auth.credentials import AnonymousCredentials
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
 from google.auth.transport.requests import Request
 from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
 
-from src.database import save_booking, get_last_booking, cancel_booking, update_booking, list_bookings
+from src.free_slots import iter_free_slots, event_interval
+from src.calendar_cache import RangeCache, events_in_range, busy_in_range
+from src.calendar_sync import CalendarMirror
+from src import availability_grid
+from src.metrics import execute_api
+from src.database import apply_mirror_changes, save_booking, get_last_booking, cancel_booking, update_booking, list_bookings, list_bookings_between
 from src.utils import extract_intent, extract_slots
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Calendar API limit on calls per HTTP batch request
+CALENDAR_BATCH_LIMIT = 50
+
+# Refresh the access token this long before it expires
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
 class GoogleCalendarUtils:
     """
     Utility class for authenticating with Google Calendar, checking availability, and booking events.
     """
     def __init__(self):
-        self.service = None
-        self.authenticate()
+        # The API client is built lazily on first use of .service; see authenticate()
+        self._service = None
+        self._authenticated = False
+        self._auth_lock = threading.Lock()
+        # Why the last authentication left no service, for /sync/status
+        self.auth_error: Optional[str] = None
+        self._refresh_timer: Optional[threading.Timer] = None
+        # Alternate API root (e.g. a local fake server); batches are sent to its /batch/calendar/v3
+        self.api_endpoint = os.getenv('GOOGLE_CALENDAR_API_ENDPOINT')
+        self.cache = RangeCache(
+            ttl_seconds=float(os.getenv('CALENDAR_CACHE_TTL', '60')),
+            max_entries=int(os.getenv('CALENDAR_CACHE_SIZE', '256'))
+        )
+        # Local events_mirror copy of the calendar; enabled by start_mirror()
+        self.mirror: Optional[CalendarMirror] = None
+
+    @property
+    def service(self):
+        """The Calendar API client, authenticating once on first access"""
+        if not self._authenticated:
+            with self._auth_lock:
+                if not self._authenticated:
+                    self._authenticate()
+        return self._service
 
-    def authenticate(self):
-        """Authenticate with Google Calendar API"""
+    @service.setter
+    def service(self, value):
+        self._service = value
+        self._authenticated = True
+
+    def authenticate(self, interactive: Optional[bool] = None) -> bool:
+        """
+        Authenticate with Google Calendar API (again, if already done); True on success.
+        interactive allows the browser OAuth flow when there is no usable token; it
+        defaults to GOOGLE_OAUTH_INTERACTIVE, which is off so a server never blocks on it.
+        """
+        with self._auth_lock:
+            self._authenticate(interactive)
+        return self._service is not None
+
+    def _authenticate(self, interactive: Optional[bool] = None):
         creds = None
         token_path = os.getenv('GOOGLE_TOKEN_PATH', 'token.json')
+        if interactive is None:
+            interactive = os.getenv('GOOGLE_OAUTH_INTERACTIVE', '0') == '1'
+        self.auth_error = None
         
         try:
+            if self.api_endpoint and os.getenv('GOOGLE_CALENDAR_AUTH') == 'none':
+                # Unauthenticated client for a local fake server (benchmarks/fake_calendar.py)
+                self._service = self._build_service(AnonymousCredentials())
+                logging.info(f"Using Google Calendar API at {self.api_endpoint} without credentials")
+                return
+
             if os.path.exists(token_path):
                 creds = Credentials.from_authorized_user_file(token_path, SCOPES)
             
             if not creds or not creds.valid:
                 if creds and creds.expired and creds.refresh_token:
                     creds.refresh(Request())
-                else:
+                elif interactive:
                     flow = InstalledAppFlow.from_client_secrets_file(
                         os.getenv('GOOGLE_CLIENT_SECRET_PATH', 'credentials.json'),
                         SCOPES
                     )
                     creds = flow.run_local_server(port=0)
+                else:
+                    # Lazy authentication runs inside requests, so never wait on a browser there
+                    raise RuntimeError(
+                        f"No valid Google Calendar token in {token_path}. Create one with "
+                        f"`python -m src.calendar_utils` (opens a browser), or set GOOGLE_OAUTH_INTERACTIVE=1 "
+                        f"for a local single-user run")
                 
                 with open(token_path, 'w') as token:
                     token.write(creds.to_json())
             
-            self.service = build('calendar', 'v3', credentials=creds)
+            self._service = self._build_service(creds)
+            self._schedule_refresh(creds, token_path)
             logging.info("Successfully authenticated with Google Calendar")
             
         except Exception as e:
             logging.error(f"Failed to authenticate with Google Calendar: {str(e)}")
-            self.service = None
+            self.auth_error = str(e)
+            self._service = None
+        finally:
+            self._authenticated = True
+
+    def _build_service(self, creds):
+        """
+        Build the API client without fetching the discovery document over the network:
+        from GOOGLE_CALENDAR_DISCOVERY_PATH if set, else the copy bundled with googleapiclient.
+        """
+        client_options = {'api_endpoint': self.api_endpoint} if self.api_endpoint else None
+        discovery_path = os.getenv('GOOGLE_CALENDAR_DISCOVERY_PATH')
+        if discovery_path and os.path.exists(discovery_path):
+            with open(discovery_path) as f:
+                return build_from_document(f.read(), credentials=creds, client_options=client_options)
+        return build('calendar', 'v3', credentials=creds, client_options=client_options,
+                     static_discovery=True, cache_discovery=False)
+
+    def _schedule_refresh(self, creds, token_path: str):
+        """Refresh the token on a background timer shortly before it expires, so requests never wait on it"""
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+        if not creds or not creds.refresh_token or not creds.expiry:
+            return
+        delay = (creds.expiry - datetime.datetime.utcnow() - TOKEN_REFRESH_MARGIN).total_seconds()
+
+        def refresh():
+            try:
+                creds.refresh(Request())
+                with open(token_path, 'w') as token:
+                    token.write(creds.to_json())
+                logging.info("Refreshed Google Calendar token")
+            except Exception as e:
+                logging.error(f"Failed to refresh Google Calendar token: {str(e)}")
+                return
+            self._schedule_refresh(creds, token_path)
+
+        self._refresh_timer = threading.Timer(max(delay, 0), refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
 
     def create_event(self, event_details: dict) -> dict:
         """Create a new calendar event"""
@@ -66,7 +172,8 @@ class GoogleCalendarUtils:
             if not self.service:
                 return {"error": "Calendar service not available"}
             
-            event = self.service.events().insert(calendarId='primary', body=event_details).execute()
+            event = execute_api('events.insert', self.service.events().insert(calendarId='primary', body=event_details))
+            self._invalidate_for(event)
             return {
                 "id": event['id'],
                 "summary": event['summary'],
@@ -78,24 +185,34 @@ class GoogleCalendarUtils:
             return {"error": str(e)}
 
     def get_calendar_events(self, start_time: datetime.datetime, end_time: datetime.datetime) -> List[dict]:
-        """Get events within a time range"""
+        """Get events within a time range, served from the range cache when a cached range covers it"""
         try:
             if not self.service:
                 return []
             
+            if self.mirror and self.mirror.is_fresh():
+                return self.mirror.events_between(start_time, end_time)
+            
+            scope = ('events', 'primary')
+            cached = self.cache.get(scope, start_time, end_time, events_in_range)
+            if cached is not None:
+                return cached
+            
             timezone = pytz.timezone('UTC')
             start_time = timezone.localize(start_time)
             end_time = timezone.localize(end_time)
             
-            events_result = self.service.events().list(
+            events_result = execute_api('events.list', self.service.events().list(
                 calendarId='primary',
                 timeMin=start_time.isoformat(),
                 timeMax=end_time.isoformat(),
                 singleEvents=True,
                 orderBy='startTime'
-            ).execute()
+            ))
             
-            return events_result.get('items', [])
+            items = events_result.get('items', [])
+            self.cache.put(scope, start_time, end_time, items)
+            return items
         except Exception as e:
             logging.error(f"Failed to get events: {str(e)}")
             return []
@@ -106,7 +223,9 @@ class GoogleCalendarUtils:
             if not self.service:
                 return False
             
-            self.service.events().delete(calendarId='primary', eventId=event_id).execute()
+            execute_api('events.delete', self.service.events().delete(calendarId='primary', eventId=event_id))
+            self.cache.invalidate('primary')
+            self._mirror_apply([{'id': event_id, 'status': 'cancelled'}])
             return True
         except Exception as e:
             logging.error(f"Failed to delete event: {str(e)}")
@@ -118,11 +237,14 @@ class GoogleCalendarUtils:
             if not self.service:
                 return {"error": "Calendar service not available"}
             
-            event = self.service.events().update(
+            event = execute_api('events.update', self.service.events().update(
                 calendarId='primary',
                 eventId=event_id,
                 body=event_details
-            ).execute()
+            ))
+            # The event's previous time range is unknown here, so drop the whole calendar
+            self.cache.invalidate('primary')
+            self._mirror_apply([event])
             return {
                 "id": event['id'],
                 "summary": event['summary'],
@@ -133,58 +255,30 @@ class GoogleCalendarUtils:
             logging.error(f"Failed to update event: {str(e)}")
             return {"error": str(e)}
 
-    def get_free_busy(self, start_time: datetime.datetime, end_time: datetime.datetime) -> dict:
-        """Check if a time slot is free"""
-        try:
-            if not self.service:
-                return {"busy": True}
-            
-            timezone = pytz.timezone('UTC')
-            start_time = timezone.localize(start_time)
-            end_time = timezone.localize(end_time)
-            
-            body = {
-                "timeMin": start_time.isoformat(),
-                "timeMax": end_time.isoformat(),
-                "items": [{"id": 'primary'}]
-            }
-            
-            result = self.service.freebusy().query(body=body).execute()
-            return result['calendars']['primary']
-        except Exception as e:
-            logging.error(f"Failed to check free/busy: {str(e)}")
-            return {"busy": True}
+    def iter_available_slots(self, start_time: datetime.datetime, end_time: datetime.datetime,
+                             duration_minutes: int = 30, step_minutes: Optional[int] = None,
+                             anchor: Optional[datetime.datetime] = None,
+                             busy: Optional[List[Tuple[datetime.datetime, datetime.datetime]]] = None):
+        """
+        Lazily yield free (start, end) slots within the given time range.
+        Busy periods come from the calendar's events unless passed in; see free_slots.iter_free_slots.
+        """
+        if busy is None:
+            events = self.get_calendar_events(start_time, end_time)
+            busy = [interval for interval in map(event_interval, events) if interval]
+        return iter_free_slots(start_time, end_time, busy, duration_minutes, step_minutes, anchor)
 
     def find_available_slots(self, start_time: datetime.datetime, end_time: datetime.datetime,
-                           duration_minutes: int = 30) -> List[Dict[str, Any]]:
+                           duration_minutes: int = 30, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Find available time slots within the given time range"""
-        events = self.get_calendar_events(start_time, end_time)
         slots = []
-        
-        current_time = start_time
-        while current_time + datetime.timedelta(minutes=duration_minutes) <= end_time:
-            slot_end = current_time + datetime.timedelta(minutes=duration_minutes)
-            
-            # Check if this slot overlaps with any existing events
-            slot_available = True
-            for event in events:
-                event_start = datetime.datetime.fromisoformat(event['start']['dateTime'])
-                event_end = datetime.datetime.fromisoformat(event['end']['dateTime'])
-                
-                if (current_time < event_end and slot_end > event_start):
-                    slot_available = False
-                    break
-            
-            if slot_available:
-                slots.append({
-                    'start': current_time,
-                    'end': slot_end,
-                    'formatted': f"{current_time.strftime('%I:%M %p')} - {slot_end.strftime('%I:%M %p')}",
-                    'duration': duration_minutes
-                })
-            
-            current_time = slot_end
-        
+        for slot_start, slot_end in islice(self.iter_available_slots(start_time, end_time, duration_minutes), limit):
+            slots.append({
+                'start': slot_start,
+                'end': slot_end,
+                'formatted': f"{slot_start.strftime('%I:%M %p')} - {slot_end.strftime('%I:%M %p')}",
+                'duration': duration_minutes
+            })
         return slots
 
     def format_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
@@ -227,21 +321,32 @@ class GoogleCalendarUtils:
         Returns a list of (start, end) tuples for busy periods.
         """
         try:
+            mirrored = self._mirror_busy('primary', time_min, time_max, timezone)
+            if mirrored is not None:
+                return mirrored
+            
+            scope = ('freebusy', 'primary', timezone)
+            cached = self.cache.get(scope, time_min, time_max, busy_in_range)
+            if cached is not None:
+                return cached
+            
             body = {
                 "timeMin": time_min.isoformat(),
                 "timeMax": time_max.isoformat(),
                 "timeZone": timezone,
                 "items": [{"id": "primary"}]
             }
-            response = self.service.freebusy().query(body=body).execute()
+            response = execute_api('freebusy.query', self.service.freebusy().query(body=body))
             
+            busy = []
             if "calendars" in response and "primary" in response["calendars"]:
                 busy_slots = response["calendars"]["primary"].get("busy", [])
-                return [(datetime.datetime.fromisoformat(slot["start"]), datetime.datetime.fromisoformat(slot["end"])) for slot in busy_slots]
+                busy = [(datetime.datetime.fromisoformat(slot["start"]), datetime.datetime.fromisoformat(slot["end"])) for slot in busy_slots]
             
-            return []
+            self.cache.put(scope, time_min, time_max, busy)
+            return busy
         except Exception as e:
-            print(f"Error getting free/busy: {e}")
+            logging.error(f"Failed to get free/busy: {str(e)}")
             return []
 
     def find_available_slots_legacy(self, time_min: datetime.datetime, time_max: datetime.datetime, duration_minutes: int, timezone: str = 'UTC'):
@@ -250,22 +355,63 @@ class GoogleCalendarUtils:
         Returns a list of (start, end) tuples for available periods.
         """
         busy_slots = self.get_free_busy(time_min, time_max, timezone)
-        current = time_min
-        available = []
-        
-        while current + datetime.timedelta(minutes=duration_minutes) <= time_max:
-            is_available = True
-            for busy_start, busy_end in busy_slots:
-                if (current <= busy_end and busy_start <= current + datetime.timedelta(minutes=duration_minutes)):
-                    is_available = False
-                    break
-            
-            if is_available:
-                available.append((current, current + datetime.timedelta(minutes=duration_minutes)))
+        return list(iter_free_slots(time_min, time_max, busy_slots, duration_minutes, step=15))
+
+    def get_free_busy_many(self, time_min: datetime.datetime, time_max: datetime.datetime,
+                           calendar_ids: List[str], timezone: str = 'UTC') -> Dict[str, List[Tuple[datetime.datetime, datetime.datetime]]]:
+        """
+        Query several calendars' busy periods in one freeBusy request.
+        Calendars with a cached covering range are not re-queried.
+        Returns a dict of calendar id -> list of (start, end) tuples.
+        """
+        try:
+            result = {}
+            for calendar_id in calendar_ids:
+                cached = self._mirror_busy(calendar_id, time_min, time_max, timezone)
+                if cached is None:
+                    cached = self.cache.get(('freebusy', calendar_id, timezone), time_min, time_max, busy_in_range)
+                if cached is not None:
+                    result[calendar_id] = cached
+            missing = [calendar_id for calendar_id in calendar_ids if calendar_id not in result]
+            if not missing:
+                return result
             
-            current += datetime.timedelta(minutes=15)
-        
-        return available
+            body = {
+                "timeMin": time_min.isoformat(),
+                "timeMax": time_max.isoformat(),
+                "timeZone": timezone,
+                "items": [{"id": calendar_id} for calendar_id in missing]
+            }
+            response = execute_api('freebusy.query', self.service.freebusy().query(body=body))
+            calendars = response.get("calendars", {})
+            for calendar_id in missing:
+                busy = [(datetime.datetime.fromisoformat(slot["start"]), datetime.datetime.fromisoformat(slot["end"]))
+                        for slot in calendars.get(calendar_id, {}).get("busy", [])]
+                self.cache.put(('freebusy', calendar_id, timezone), time_min, time_max, busy)
+                result[calendar_id] = busy
+            return result
+        except Exception as e:
+            logging.error(f"Failed to get free/busy for {len(calendar_ids)} calendars: {str(e)}")
+            return {calendar_id: [] for calendar_id in calendar_ids}
+
+    def find_available_slots_grid(self, time_min: datetime.datetime, time_max: datetime.datetime, duration_minutes: int,
+                                  calendar_ids: Optional[List[str]] = None, granularity_minutes: int = 15,
+                                  step_minutes: Optional[int] = None, include_bookings: bool = True,
+                                  require: str = 'all', timezone: str = 'UTC'):
+        """
+        Vectorized availability search for long horizons and many attendees.
+        Busy periods from every calendar (and the local bookings table) are rasterized
+        to a NumPy grid and combined; require='all' finds times when everyone is free.
+        Returns a list of (start, end) tuples.
+        """
+        busy = self.get_free_busy_many(time_min, time_max, calendar_ids or ['primary'], timezone)
+        if include_bookings:
+            busy['local:bookings'] = [
+                (datetime.datetime.fromisoformat(b[3]), datetime.datetime.fromisoformat(b[4]))
+                for b in list_bookings_between(time_min, time_max)
+            ]
+        return availability_grid.find_slots(busy, time_min, time_max, duration_minutes,
+                                            granularity_minutes, step_minutes or granularity_minutes, require)
 
     def create_event_legacy(self, start: datetime.datetime, end: datetime.datetime, summary: str, description: Optional[str] = None, attendees: Optional[List[str]] = None, timezone: str = 'UTC'):
         """
@@ -289,12 +435,155 @@ class GoogleCalendarUtils:
             event['attendees'] = [{'email': email} for email in attendees]
 
         try:
-            created_event = self.service.events().insert(calendarId='primary', body=event).execute()
+            created_event = execute_api('events.insert', self.service.events().insert(calendarId='primary', body=event))
+            self._invalidate_for(created_event)
             return created_event
         except Exception as e:
             print(f"Error creating event: {e}")
             return {'error': str(e)}
 
+    def start_mirror(self, interval_seconds: float = 60, max_lag_seconds: float = 300) -> CalendarMirror:
+        """
+        Mirror the primary calendar into SQLite and keep it current with sync tokens.
+        While the mirror is fresh, get_calendar_events, get_free_busy, get_free_busy_many
+        and search_events read from it instead of the API.
+        """
+        if self.mirror is None:
+            self.mirror = CalendarMirror(self, 'primary', max_lag_seconds)
+        self.mirror.start(interval_seconds)
+        return self.mirror
+
+    def _mirror_busy(self, calendar_id: str, time_min: datetime.datetime, time_max: datetime.datetime,
+                     timezone: str = 'UTC') -> Optional[List[Tuple[datetime.datetime, datetime.datetime]]]:
+        """Busy periods of a mirrored calendar from SQLite, or None unless its mirror is fresh"""
+        if not self.mirror or self.mirror.calendar_id != calendar_id or not self.mirror.is_fresh():
+            return None
+        tz = pytz.timezone(timezone)
+        return [(start.astimezone(tz), end.astimezone(tz)) for start, end in self.mirror.busy_between(time_min, time_max)]
+
+    def search_events(self, text: str, limit: int = 20) -> List[dict]:
+        """Events whose summary contains text, from the mirror while it is fresh, else from the API"""
+        try:
+            if self.mirror and self.mirror.is_fresh():
+                return self.mirror.search(text, limit)
+            if not self.service:
+                return []
+            # The API's q also matches descriptions and attendees, so keep summary matches only
+            events_result = execute_api('events.list', self.service.events().list(
+                calendarId='primary', q=text, singleEvents=True, orderBy='startTime', maxResults=limit
+            ))
+            return [event for event in events_result.get('items', [])
+                    if text.lower() in (event.get('summary') or '').lower()]
+        except Exception as e:
+            logging.error(f"Failed to search events: {str(e)}")
+            return []
+
+    def sync_status(self) -> Dict[str, Any]:
+        if self.mirror is None:
+            return {"enabled": False, "auth_error": self.auth_error}
+        return dict(self.mirror.sync_status(), enabled=True, auth_error=self.auth_error)
+
+    def _new_batch(self, callback) -> BatchHttpRequest:
+        if self.api_endpoint:
+            return BatchHttpRequest(callback=callback, batch_uri=self.api_endpoint.rstrip('/') + '/batch/calendar/v3')
+        return self.service.new_batch_http_request(callback=callback)
+
+    def _execute_batched(self, requests: list, on_result) -> list:
+        """
+        Execute API requests in HTTP batches of at most CALENDAR_BATCH_LIMIT calls.
+        on_result(response) converts each successful response; failed items become {"error": ...}.
+        Results are returned in request order.
+        """
+        results = [None] * len(requests)
+
+        def callback(request_id, response, exception):
+            index = int(request_id)
+            if exception is not None:
+                results[index] = {"error": str(exception)}
+            else:
+                try:
+                    results[index] = on_result(response)
+                except Exception as e:
+                    results[index] = {"error": str(e)}
+
+        for offset in range(0, len(requests), CALENDAR_BATCH_LIMIT):
+            batch = self._new_batch(callback)
+            for index, request in enumerate(requests[offset:offset + CALENDAR_BATCH_LIMIT], offset):
+                batch.add(request, request_id=str(index))
+            try:
+                execute_api('batch', batch)
+            except Exception as e:
+                logging.error(f"Failed to execute batch at item {offset}: {str(e)}")
+                for index in range(offset, min(offset + CALENDAR_BATCH_LIMIT, len(requests))):
+                    if results[index] is None:
+                        results[index] = {"error": str(e)}
+        return results
+
+    @staticmethod
+    def _event_summary(event: dict) -> dict:
+        return {
+            "id": event['id'],
+            "summary": event['summary'],
+            "start": event['start']['dateTime'],
+            "end": event['end']['dateTime']
+        }
+
+    def create_events(self, events: List[dict]) -> List[dict]:
+        """Create many events using batch requests; returns one create_event-style result per event"""
+        if not self.service:
+            return [{"error": "Calendar service not available"} for _ in events]
+        requests = [self.service.events().insert(calendarId='primary', body=event) for event in events]
+        results = self._execute_batched(requests, self._event_summary)
+        self.cache.invalidate('primary')
+        self._mirror_resync()
+        return results
+
+    def update_events(self, updates: List[Tuple[str, dict]]) -> List[dict]:
+        """Update many (event_id, event_details) pairs using batch requests"""
+        if not self.service:
+            return [{"error": "Calendar service not available"} for _ in updates]
+        requests = [self.service.events().update(calendarId='primary', eventId=event_id, body=details)
+                    for event_id, details in updates]
+        results = self._execute_batched(requests, self._event_summary)
+        self.cache.invalidate('primary')
+        self._mirror_resync()
+        return results
+
+    def delete_events(self, event_ids: List[str]) -> List[bool]:
+        """Delete many events using batch requests; returns True per event that was deleted"""
+        if not self.service:
+            return [False for _ in event_ids]
+        requests = [self.service.events().delete(calendarId='primary', eventId=event_id) for event_id in event_ids]
+        results = self._execute_batched(requests, lambda response: True)
+        self.cache.invalidate('primary')
+        self._mirror_resync()
+        for event_id, result in zip(event_ids, results):
+            if result is not True:
+                logging.error(f"Failed to delete event {event_id}: {result['error']}")
+        return [result is True for result in results]
+
+    def _mirror_apply(self, events: List[dict]):
+        """Reflect our own writes in the mirror right away; the next sync reconciles them"""
+        if self.mirror:
+            apply_mirror_changes(self.mirror.calendar_id, events)
+
+    def _mirror_resync(self):
+        if self.mirror:
+            self.mirror.sync()
+
+    def _invalidate_for(self, event: dict):
+        """Drop cached ranges touched by an event we just wrote"""
+        self._mirror_apply([event])
+        interval = event_interval(event)
+        if interval:
+            self.cache.invalidate('primary', *interval)
+        else:
+            self.cache.invalidate('primary')
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for the events and free/busy cache"""
+        return self.cache.stats()
+
     def check_availability(self, start: datetime.datetime, end: datetime.datetime):
         """Return busy slots between start and end."""
         return self.get_free_busy(start, end)
@@ -311,4 +600,10 @@ def handle_user_message(user_msg):
     slots = extract_slots(user_msg)
     # Use intent and slots to call DB functions and return response
     # Example: if intent == "cancel", call cancel_booking(...)
-    # Return a dict with the result and a user-friendly message
\ No newline at end of file
+    # Return a dict with the result and a user-friendly message
+
+
+if __name__ == '__main__':
+    # Run the browser OAuth flow once to create the token file servers authenticate with
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(0 if GoogleCalendarUtils().authenticate(interactive=True) else 1)
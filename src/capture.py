@@ -0,0 +1,167 @@
+# capture.py
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Opt-in recording of /chat traffic for offline replay (benchmarks/replay_chat.py).
+# With CHAT_CAPTURE_FILE set, each turn (or a CHAT_CAPTURE_SAMPLE_RATE fraction of
+# them) is appended to that file as one JSON line: the message, the context it was
+# parsed with, the slots, the reply and the stage timings. Text is sanitized first
+# (emails, phone numbers, long digit runs, URLs) and session ids are hashed. The
+# file rotates at CHAT_CAPTURE_MAX_BYTES, keeping CHAT_CAPTURE_BACKUPS old files
+# (chat.jsonl.1 is the newest of them). Turns are queued to a writer thread, which
+# sanitizes, writes and rotates, so disk latency never reaches the event loop.
+
+CAPTURE_FILE = os.getenv("CHAT_CAPTURE_FILE")
+CAPTURE_SAMPLE_RATE = float(os.getenv("CHAT_CAPTURE_SAMPLE_RATE", "1"))
+CAPTURE_MAX_BYTES = int(os.getenv("CHAT_CAPTURE_MAX_BYTES", str(10 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.getenv("CHAT_CAPTURE_BACKUPS", "5"))
+# Build the captures came from; Render sets RENDER_GIT_COMMIT
+APP_VERSION = os.getenv("APP_VERSION") or os.getenv("RENDER_GIT_COMMIT")
+
+# Histories longer than this are cut to their newest messages
+MAX_HISTORY_MESSAGES = 50
+
+_REDACTIONS = (
+    (re.compile(r"https?://\S+"), "<url>"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*"), "<email>"),  # also the truncated addresses slots can hold
+    # +44 20 7946 0958, (555) 123-4567, 555.123.4567; dates such as 2025-03-04 are left alone
+    (re.compile(r"(?<![\w+])(?:\+\d[\d\s().-]{6,}\d|\(?\d{3}\)?[\s.-]\d{3}[\s.-]\d{4})(?!\w)"), "<phone>"),
+    (re.compile(r"(?<!\w)\d{9,}(?!\w)"), "<number>"),
+)
+
+
+def sanitize(value: Any) -> Any:
+    """value with personal data in its strings replaced by placeholders, recursively"""
+    if isinstance(value, str):
+        for pattern, placeholder in _REDACTIONS:
+            value = pattern.sub(placeholder, value)
+        return value
+    if isinstance(value, dict):
+        return {k: sanitize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [sanitize(v) for v in value]
+    return value
+
+
+def hash_session(session_id: Optional[str]) -> Optional[str]:
+    """A stable pseudonym for a session id, so replays can keep a session's turns together"""
+    return hashlib.sha256(session_id.encode()).hexdigest()[:16] if session_id else None
+
+
+class ChatCapture:
+    """Appends sanitized /chat turns to a size-rotated JSONL file from a writer thread"""
+
+    def __init__(self, path: Optional[str] = CAPTURE_FILE, sample_rate: float = CAPTURE_SAMPLE_RATE,
+                 max_bytes: int = CAPTURE_MAX_BYTES, backups: int = CAPTURE_BACKUPS,
+                 version: Optional[str] = APP_VERSION):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.version = version
+        self.written = 0
+        self._lock = threading.Lock()
+        self._file = None
+        # Entries waiting for the writer thread; None stops it
+        self._pending: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def should_capture(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def record(self, message: str, session_id: Optional[str], new_session: bool, history,
+               context_event: Optional[Dict[str, Any]], slots: Optional[Dict[str, Any]],
+               response: Optional[Dict[str, Any]], timing_ms: Optional[Dict[str, float]], total_ms: float,
+               error: Optional[str] = None):
+        """Queue one turn for writing; history is only kept for turns parsed without a stored session"""
+        entry = {
+            "ts": time.time(),
+            "version": self.version,
+            "session": hash_session(session_id),
+            "new_session": new_session,
+            "message": message,
+            "history": history[-MAX_HISTORY_MESSAGES:] if history else None,
+            "context_event": context_event,
+            "slots": slots,
+            "response": response,
+            "timing_ms": timing_ms,
+            "total_ms": round(total_ms, 3),
+        }
+        if error is not None:
+            entry["error"] = error
+        self.write(entry)
+
+    def write(self, entry: Dict[str, Any]):
+        """Queue an entry; the writer thread sanitizes and appends it"""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_entries, name="chat-capture", daemon=True)
+                self._writer.start()
+        self._pending.put(entry)
+
+    def _write_entries(self):
+        """Writer thread: append queued entries until close() sends None"""
+        while True:
+            entries = [self._pending.get()]
+            while not self._pending.empty():
+                entries.append(self._pending.get())
+            for entry in entries:
+                if entry is not None:
+                    self._append(json.dumps(sanitize(entry), default=str) + "\n")
+            if None in entries:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _append(self, line: str):
+        """Write one line, rotating first if it would pass max_bytes; a failed write is logged, never raised"""
+        try:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            if self._file.tell() and self._file.tell() + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self.written += 1
+        except OSError as e:
+            logging.error(f"Failed to write chat capture to {self.path}: {str(e)}")
+            self._file = None
+
+    def _rotate(self):
+        """chat.jsonl -> chat.jsonl.1 -> ... -> chat.jsonl.<backups>, dropping the oldest"""
+        self._file.close()
+        if self.backups:
+            for index in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{index}"):
+                    os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued entries and stop the writer thread"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._pending.put(None)
+            writer.join(timeout)
+
+
+chat_capture = ChatCapture()
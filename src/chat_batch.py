@@ -0,0 +1,155 @@
+# chat_batch.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.async_exec import POOL_SIZES, run_blocking
+
+# Processing for POST /chat/batch. Items are parsed in bulk on the nlu pool, the
+# bookings the first read-only item of each session needs are looked up in one
+# grouped db call, then items run concurrently: one task per session, items of the
+# same session in order, carrying its context event from one item to the next.
+# Items that book, cancel or edit run one at a time across the whole batch and
+# make their own lookups, so each sees what the writes before it did.
+
+MAX_BATCH_ITEMS = int(os.getenv("CHAT_BATCH_LIMIT", "500"))
+
+
+def normalize_items(payload: Any) -> List[Dict[str, Any]]:
+    """
+    Accepts {"items": [...]} or a bare list. Each item is a message string or
+    {"message": str, "session_id": optional str, "messages": optional history}.
+    Raises ValueError for a malformed or oversized batch.
+    """
+    items = payload.get("items") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        raise ValueError("Provide a non-empty 'items' list")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise ValueError(f"At most {MAX_BATCH_ITEMS} items per batch")
+    normalized = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"message": item}
+        if not isinstance(item, dict):
+            raise ValueError(f"Item {index} must be a string or an object")
+        normalized.append({
+            "index": index,
+            "message": item.get("message") or "",
+            "session_id": item.get("session_id"),
+            "messages": item.get("messages") or [],
+        })
+    return normalized
+
+
+def _chunks(items: Sequence[Any], count: int) -> List[Sequence[Any]]:
+    size = max(1, -(-len(items) // max(1, count)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def process_batch(items: List[Dict[str, Any]],
+                        parse: Callable[[List[str], List[Optional[Dict[str, Any]]]], List[Dict[str, Any]]],
+                        context_of: Callable[[List[Dict[str, str]]], Optional[Dict[str, Any]]],
+                        load_session: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+                        lookup: Callable[[List[Dict[str, Any]], List[Optional[Dict[str, Any]]]], List[Dict[str, Any]]],
+                        respond: Callable[..., Awaitable[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]],
+                        is_write: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+    """
+    Run normalized items (see normalize_items) and return per-item results in input
+    order with timings. Each item of a session is parsed with the context event the
+    previous one left, as consecutive /chat turns would be. parse and context_of are
+    blocking and run on the nlu pool, lookup (grouped reference and overlap lookups,
+    see agent.lookup_many) on the db pool. load_session(session_id) is awaited once
+    per session; respond(item, slots, context_event, lookups) once per item, returning
+    the reply and the context event for the session's next item. lookups is None
+    when respond has to look them up itself. Items whose slots is_write run one
+    after another, never alongside another write.
+    """
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = [
+        {"index": item["index"], "session_id": item["session_id"]} for item in items
+    ]
+    runnable = [item for item in items if item["message"]]
+    for item in items:
+        if not item["message"]:
+            results[item["index"]].update(status="error", response={"response": "Please provide a message"})
+
+    # One task per session keeps its items in order; items without a session run alone
+    sessions: "OrderedDict[Any, List[Dict[str, Any]]]" = OrderedDict()
+    for item in runnable:
+        key = ("session", item["session_id"]) if item["session_id"] is not None else ("item", item["index"])
+        sessions.setdefault(key, []).append(item)
+
+    # A stored session's context applies to all its items until one of them changes it
+    session_ids = [key[1] for key in sessions if key[0] == "session"]
+    stored = dict(zip(session_ids, await asyncio.gather(*(load_session(sid) for sid in session_ids))))
+    known: Dict[int, Optional[Dict[str, Any]]] = {}
+    for key, session_items in sessions.items():
+        session = stored.get(key[1]) if key[0] == "session" else None
+        for position, item in enumerate(session_items):
+            if session is not None:
+                known[item["index"]] = session["context_event"]
+            elif position:
+                known[item["index"]] = None  # parsed again once the first items have run
+
+    # Bulk parse: contexts, then messages, split across the nlu pool
+    def parse_chunk(chunk):
+        contexts = [known[item["index"]] if item["index"] in known
+                    else context_of(item["messages"]) if item["messages"] else None for item in chunk]
+        return contexts, parse([item["message"] for item in chunk], contexts)
+
+    chunks = _chunks(runnable, POOL_SIZES["nlu"])
+    parsed = await asyncio.gather(*(run_blocking("nlu", parse_chunk, chunk) for chunk in chunks))
+    parsed_with, slots_of = {}, {}
+    for chunk, (contexts, chunk_slots) in zip(chunks, parsed):
+        for item, context_event, slots in zip(chunk, contexts, chunk_slots):
+            parsed_with[item["index"]], slots_of[item["index"]] = context_event, slots
+    parsed_at = time.perf_counter()
+
+    # Lookups for every session's first item in one db call, for read-only intents
+    # (lookup returns None for writes); later items depend on what the earlier ones
+    # book, cancel or edit and look up their own
+    heads = [session_items[0]["index"] for session_items in sessions.values()]
+    looked_up = await run_blocking("db", lookup, [slots_of[i] for i in heads], [parsed_with[i] for i in heads])
+    lookups_of = dict(zip(heads, looked_up))
+    looked_up_at = time.perf_counter()
+    write_lock = asyncio.Lock()
+
+    async def run_session(session_items):
+        context_event = parsed_with[session_items[0]["index"]]
+        for item in session_items:
+            slots = slots_of[item["index"]]
+            item_started = time.perf_counter()
+            try:
+                if context_event != parsed_with[item["index"]]:
+                    # An earlier item of the session changed the context this one was parsed with
+                    slots = (await run_blocking("nlu", parse, [item["message"]], [context_event]))[0]
+                if is_write(slots):
+                    async with write_lock:
+                        response, context_event = await respond(item, slots, context_event)
+                else:
+                    response, context_event = await respond(item, slots, context_event,
+                                                            lookups_of.get(item["index"]))
+                results[item["index"]].update(status="ok", intent=slots.get("intent"), response=response)
+            except Exception as e:
+                logging.error(f"Batch item {item['index']} failed: {str(e)}")
+                results[item["index"]].update(status="error", intent=slots.get("intent"),
+                                              response={"response": f"Error processing request: {str(e)}"})
+            results[item["index"]]["elapsed_ms"] = round((time.perf_counter() - item_started) * 1e3, 3)
+
+    await asyncio.gather(*(run_session(session_items) for session_items in sessions.values()))
+    finished = time.perf_counter()
+
+    return {
+        "results": results,
+        "count": len(items),
+        "sessions": len(sessions),
+        "timing_ms": {
+            "parse": round((parsed_at - started) * 1e3, 3),
+            "lookup": round((looked_up_at - parsed_at) * 1e3, 3),
+            "handle": round((finished - looked_up_at) * 1e3, 3),
+            "total": round((finished - started) * 1e3, 3),
+        },
+    }
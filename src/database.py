@@ -1,17 +1,280 @@
 # database.py
 
+import inspect
+import json
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional, Any
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from typing import List, Dict, Optional, Any, Tuple, Union
 
-from src.utils import extract_intent, extract_slots, extract_attendees, extract_reference, find_booking_by_reference, format_event_natural
+from src.interval_index import IntervalIndex
+from src.metrics import DB_OPERATION_SECONDS, timed
+from src.tracing import traced
 
 DB_FILE = "bookings.db"
 
+# Pragmas applied once to every new connection. WAL lets readers run while a
+# writer holds the lock; NORMAL sync is durable across app crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Size of sqlite3's per-connection prepared statement cache
+STATEMENT_CACHE_SIZE = 128
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_local = threading.local()
+_connections_lock = threading.Lock()
+_connections: List[sqlite3.Connection] = []
+
+
+# Arguments copied onto an operation's trace span
+_SPAN_ARGUMENTS = ("start", "end", "start_time", "end_time", "status", "calendar_id", "limit", "cursor")
+
+
+def _span_attributes(fn):
+    signature = inspect.signature(fn)
+
+    def describe(args, kwargs, result):
+        bound = signature.bind_partial(*args, **kwargs).arguments
+        attributes = {name: str(bound[name]) for name in _SPAN_ARGUMENTS if bound.get(name) is not None}
+        # Row counts for queries: a list of rows, or the rows of a (rows, cursor) page
+        if isinstance(result, list):
+            attributes["rows"] = len(result)
+        elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+            attributes["rows"] = len(result[0])
+        return attributes
+    return describe
+
+
+def _operation(fn):
+    """Time every call into calmate_db_operation_seconds and trace it as db.<function name>"""
+    return traced(f"db.{fn.__name__}", _span_attributes(fn))(timed(DB_OPERATION_SECONDS, fn.__name__)(fn))
+
+
+def _connect(db_file: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_file,
+        check_same_thread=False,
+        isolation_level=None,  # transactions are opened explicitly in transaction()
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return the calling thread's long-lived connection, opening it on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.db_file != DB_FILE:
+        conn = _connect(DB_FILE)
+        _local.conn = conn
+        _local.db_file = DB_FILE
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+def close_connections():
+    """Close every pooled connection (shutdown, or after changing DB_FILE)"""
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        _connections.clear()
+    _local.__dict__.clear()
+    reset_booking_index()
+
+
+@contextmanager
+def transaction(immediate: bool = True):
+    """
+    Run the enclosed statements in one explicit transaction on the thread's connection.
+    Commits on success and rolls back on error; nested uses join the outer transaction.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+
+
+def to_epoch(value: Union[str, datetime, int, float, None]) -> Optional[int]:
+    """
+    Normalize an ISO string, datetime or epoch number to integer UTC epoch seconds.
+    Naive values are treated as UTC, matching format_event_natural. Returns None if unparseable.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return int(value.timestamp())
+
+
+_SELECT_COLUMNS = "SELECT id, summary, event_id, start_time, end_time, timezone, status FROM bookings"
+
+_INSERT_BOOKING = """
+    INSERT INTO bookings (summary, event_id, start_time, end_time, timezone, status, created_at, updated_at,
+                          start_epoch, end_epoch, attendees)
+    VALUES (?, ?, ?, ?, ?, 'active', ?, ?, ?, ?, ?)
+"""
+_LIST_BOOKINGS = _SELECT_COLUMNS + " WHERE status = ? ORDER BY start_epoch ASC, id ASC"
+# Overlap test against [start, end): served by idx_bookings_status_end / idx_bookings_status_start
+_LIST_BOOKINGS_BETWEEN = _SELECT_COLUMNS + """
+    WHERE status = ? AND end_epoch > ? AND start_epoch < ?
+    ORDER BY start_epoch ASC, id ASC
+"""
+# Keyset pages ordered by (start_epoch, id): the row-value comparison seeks into
+# idx_bookings_status_start instead of scanning past OFFSET rows. start_epoch is
+# selected last for the next cursor and stripped from the returned rows.
+_PAGE_COLUMNS = "SELECT id, summary, event_id, start_time, end_time, timezone, status, start_epoch FROM bookings"
+_LIST_BOOKINGS_PAGE = _PAGE_COLUMNS + """
+    WHERE status = ? AND (start_epoch, id) > (?, ?)
+    ORDER BY start_epoch ASC, id ASC LIMIT ?
+"""
+_LIST_BOOKINGS_PAGE_BETWEEN = _PAGE_COLUMNS + """
+    WHERE status = ? AND (start_epoch, id) > (?, ?) AND end_epoch > ? AND start_epoch < ?
+    ORDER BY start_epoch ASC, id ASC LIMIT ?
+"""
+_COUNT_BOOKINGS_BETWEEN = """
+    SELECT COUNT(*) FROM bookings
+    WHERE status = ? AND end_epoch > ? AND start_epoch < ?
+"""
+# Overlap check run inside a booking write's transaction; `id IS NOT ?` with NULL excludes nothing
+_OVERLAPPING_BOOKING_IDS = """
+    SELECT id FROM bookings
+    WHERE status = 'active' AND end_epoch > ? AND start_epoch < ? AND id IS NOT ?
+    ORDER BY start_epoch ASC, id ASC
+"""
+_ACTIVE_INTERVALS = "SELECT id, start_epoch, end_epoch FROM bookings WHERE status = 'active'"
+_GET_BOOKING_BY_ID = _SELECT_COLUMNS + " WHERE id = ?"
+_GET_LAST_BOOKING = _SELECT_COLUMNS + " WHERE status = 'active' ORDER BY id DESC LIMIT 1"
+_GET_EARLIEST_BOOKING = _SELECT_COLUMNS + " WHERE status = 'active' ORDER BY start_epoch ASC, id ASC LIMIT 1"
+_GET_LATEST_BOOKING = _SELECT_COLUMNS + " WHERE status = 'active' ORDER BY start_epoch DESC, id DESC LIMIT 1"
+# Reference candidates: text rank (bm25 is negative, lower is better; summary hits weigh
+# most) plus a penalty per day between the booking and the anchor time
+_REFERENCE_COLUMNS = "SELECT b.id, b.summary, b.event_id, b.start_time, b.end_time, b.timezone, b.status"
+_FIND_BY_REFERENCE = _REFERENCE_COLUMNS + """
+    FROM bookings_fts JOIN bookings b ON b.id = bookings_fts.rowid
+    WHERE bookings_fts MATCH ? AND b.status = 'active'
+    ORDER BY bm25(bookings_fts, 10.0, 5.0, 1.0) + ? * ABS(COALESCE(b.start_epoch, 0) - ?) / 86400.0, b.id
+    LIMIT ?
+"""
+# Trigrams need at least three characters; shorter references (and sqlite builds
+# without FTS5) scan with LIKE, ranked by summary hit and time distance
+_FIND_BY_REFERENCE_LIKE = _REFERENCE_COLUMNS + """
+    FROM bookings b
+    WHERE b.status = 'active' AND (b.summary LIKE ?1 ESCAPE '\\' OR b.attendees LIKE ?1 ESCAPE '\\'
+                                   OR b.start_time LIKE ?1 ESCAPE '\\')
+    ORDER BY b.summary LIKE ?1 ESCAPE '\\' DESC, ABS(COALESCE(b.start_epoch, 0) - ?2), b.id
+    LIMIT ?3
+"""
+_CANCEL_BOOKING = """
+    UPDATE bookings SET status = 'cancelled', updated_at = ?
+    WHERE id = ? AND status = 'active'
+"""
+_UPDATE_BOOKING = """
+    UPDATE bookings
+    SET summary = ?, start_time = ?, end_time = ?, timezone = ?, updated_at = ?,
+        start_epoch = ?, end_epoch = ?
+    WHERE id = ? AND status = 'active'
+"""
+
+# In-memory overlap index over active bookings, built lazily per DB_FILE and kept
+# in sync by save_booking/update_booking/cancel_booking. It only serves the fast
+# pre-check in find_overlapping_bookings: writes made by other processes are not
+# seen, so the SQL check inside each booking write stays the authority. It is
+# rebuilt from disk when that check finds bookings it did not know about, or on
+# reset_booking_index().
+_booking_index: Optional[IntervalIndex] = None
+_booking_index_file: Optional[str] = None
+_booking_index_lock = threading.Lock()
+
+# False when the sqlite build lacks FTS5; set by init_db
+_fts_enabled = True
+# Rank penalty per day between a reference candidate and the anchor time; a
+# stronger text match outweighs a few days of distance
+REFERENCE_DAY_WEIGHT = 0.05
+
+
+class BookingConflict(Exception):
+    """A booking write refused because the time overlaps active bookings (their ids in booking_ids)"""
+
+    def __init__(self, booking_ids: List[int]):
+        super().__init__(f"Overlaps active bookings {booking_ids}")
+        self.booking_ids = booking_ids
+
+
+def get_booking_index() -> IntervalIndex:
+    """Return the active-booking interval index, loading it from the database on first use"""
+    global _booking_index, _booking_index_file
+    with _booking_index_lock:
+        if _booking_index is None or _booking_index_file != DB_FILE:
+            _booking_index = IntervalIndex.from_intervals(get_connection().execute(_ACTIVE_INTERVALS))
+            _booking_index_file = DB_FILE
+        return _booking_index
+
+
+def reset_booking_index():
+    global _booking_index, _booking_index_file
+    with _booking_index_lock:
+        _booking_index = None
+        _booking_index_file = None
+
+
+def _note_overlaps(booking_ids):
+    """Drop the interval index if SQL found overlapping bookings it is missing (written by another process)"""
+    global _booking_index
+    with _booking_index_lock:
+        if _booking_index is not None and any(booking_id not in _booking_index for booking_id in booking_ids):
+            _booking_index = None
+
+def _index_booking(booking_id, start_time, end_time):
+    start, end = to_epoch(start_time), to_epoch(end_time)
+    with _booking_index_lock:
+        if _booking_index is None or _booking_index_file != DB_FILE:
+            return  # built from disk on next use
+        if start is None or end is None:
+            _booking_index.remove(booking_id)
+        else:
+            _booking_index.add(booking_id, start, end)
+
+
+def _unindex_booking(booking_id):
+    with _booking_index_lock:
+        if _booking_index is not None and _booking_index_file == DB_FILE:
+            _booking_index.remove(booking_id)
+
+
+@_operation
 def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
+    with transaction() as conn:
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS bookings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 summary TEXT,
@@ -21,67 +284,422 @@ def init_db():
                 timezone TEXT,
                 status TEXT DEFAULT 'active', -- 'active', 'cancelled'
                 created_at TEXT,
-                updated_at TEXT
+                updated_at TEXT,
+                start_epoch INTEGER, -- UTC epoch seconds of start_time
+                end_epoch INTEGER,   -- UTC epoch seconds of end_time
+                attendees TEXT       -- comma separated attendee names
             )
         """)
-        conn.commit()
+        _migrate_epoch_columns(conn)
+        if "attendees" not in {row[1] for row in conn.execute("PRAGMA table_info(bookings)")}:
+            conn.execute("ALTER TABLE bookings ADD COLUMN attendees TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_status_start ON bookings (status, start_epoch)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_status_end ON bookings (status, end_epoch)")
+        _create_reference_index(conn)
+        # Local copy of Google Calendar events, kept current by src.calendar_sync. A full
+        # resync is built in events_mirror_staging and swapped in by replace_mirror()
+        for table in (MIRROR_TABLE, MIRROR_STAGING_TABLE):
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    calendar_id TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    summary TEXT,
+                    start_epoch INTEGER,
+                    end_epoch INTEGER,
+                    updated TEXT,
+                    resource TEXT, -- the event resource as JSON
+                    PRIMARY KEY (calendar_id, event_id)
+                )
+            """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_mirror_start ON events_mirror (calendar_id, start_epoch)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_mirror_end ON events_mirror (calendar_id, end_epoch)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                calendar_id TEXT PRIMARY KEY,
+                sync_token TEXT,
+                last_full_sync TEXT,
+                last_sync TEXT,
+                last_error TEXT
+            )
+        """)
+        # Conversation state for src.session_store's SQLite backend
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                context_event TEXT, -- last event the conversation was about, as JSON
+                messages TEXT,      -- bounded window of recent messages, as JSON
+                updated_at REAL NOT NULL -- epoch seconds of the last turn
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)")
+
+def _migrate_epoch_columns(conn):
+    """Add and backfill the epoch columns on databases created before they existed"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(bookings)")}
+    for column in ("start_epoch", "end_epoch"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE bookings ADD COLUMN {column} INTEGER")
+    conn.create_function("to_epoch", 1, to_epoch, deterministic=True)
+    conn.execute("""
+        UPDATE bookings SET start_epoch = to_epoch(start_time), end_epoch = to_epoch(end_time)
+        WHERE start_epoch IS NULL OR end_epoch IS NULL
+    """)
+
+def _create_reference_index(conn):
+    """
+    Trigram FTS5 index over summary, attendees and start_time for resolving "cancel
+    the standup" style references. It reads its text from bookings (external content)
+    and is kept current by triggers; an existing database is indexed once on upgrade.
+    Without FTS5 in the sqlite build, references fall back to LIKE scans.
+    """
+    global _fts_enabled
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookings_fts'").fetchone()
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5(
+                summary, attendees, start_time,
+                content = 'bookings', content_rowid = 'id', tokenize = 'trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        _fts_enabled = False
+        return
+    _fts_enabled = True
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings BEGIN
+            INSERT INTO bookings_fts (rowid, summary, attendees, start_time)
+            VALUES (new.id, new.summary, new.attendees, new.start_time);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings BEGIN
+            INSERT INTO bookings_fts (bookings_fts, rowid, summary, attendees, start_time)
+            VALUES ('delete', old.id, old.summary, old.attendees, old.start_time);
+        END
+    """)
+    # Status changes (cancel) do not touch the indexed text, so they skip the FTS update
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bookings_fts_update AFTER UPDATE OF summary, attendees, start_time ON bookings BEGIN
+            INSERT INTO bookings_fts (bookings_fts, rowid, summary, attendees, start_time)
+            VALUES ('delete', old.id, old.summary, old.attendees, old.start_time);
+            INSERT INTO bookings_fts (rowid, summary, attendees, start_time)
+            VALUES (new.id, new.summary, new.attendees, new.start_time);
+        END
+    """)
+    if not exists:
+        conn.execute("INSERT INTO bookings_fts (bookings_fts) VALUES ('rebuild')")
+
+def _check_overlap(start_time, end_time, exclude_id=None):
+    """Raise BookingConflict if active bookings other than exclude_id overlap [start_time, end_time)"""
+    booking_ids = overlapping_booking_ids(start_time, end_time, exclude_id)
+    if booking_ids:
+        raise BookingConflict(booking_ids)
 
-def save_booking(summary, event_id, start_time, end_time, timezone):
+@_operation
+def save_booking(summary, event_id, start_time, end_time, timezone, attendees=None, allow_overlap=False):
+    """
+    Insert an active booking and return its id. Unless allow_overlap, the overlap
+    check and the insert share one BEGIN IMMEDIATE transaction, so concurrent
+    writers (threads or processes) cannot both book the same time; an overlap
+    raises BookingConflict.
+    """
     now = datetime.utcnow().isoformat()
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO bookings (summary, event_id, start_time, end_time, timezone, status, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, 'active', ?, ?)
-        """, (summary, event_id, start_time, end_time, timezone, now, now))
-        conn.commit()
+    with transaction() as conn:
+        if not allow_overlap:
+            _check_overlap(start_time, end_time)
+        cursor = conn.execute(_INSERT_BOOKING, (summary, event_id, start_time, end_time, timezone, now, now,
+                                                to_epoch(start_time), to_epoch(end_time),
+                                                ", ".join(attendees) if attendees else None))
+    _index_booking(cursor.lastrowid, start_time, end_time)
+    return cursor.lastrowid
 
+@_operation
 def list_bookings(status='active'):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, summary, event_id, start_time, end_time, timezone, status
-            FROM bookings
-            WHERE status = ?
-            ORDER BY start_time ASC
-        """, (status,))
-        return cursor.fetchall()
+    return get_connection().execute(_LIST_BOOKINGS, (status,)).fetchall()
+
+@_operation
+def list_bookings_between(start, end, status='active'):
+    """
+    List bookings overlapping [start, end), ordered by start time.
+    start/end may be ISO strings, datetimes or epoch seconds.
+    """
+    return get_connection().execute(_LIST_BOOKINGS_BETWEEN, (status, to_epoch(start), to_epoch(end))).fetchall()
+
+def encode_cursor(start_epoch: int, booking_id: int) -> str:
+    return f"{start_epoch}:{booking_id}"
 
+def decode_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """(start_epoch, id) after which the next page starts; raises ValueError for a malformed cursor"""
+    if not cursor:
+        return -(2 ** 63), 0
+    start_epoch, _, booking_id = cursor.partition(":")
+    return int(start_epoch), int(booking_id)
+
+@_operation
+def list_bookings_page(status='active', cursor=None, limit=PAGE_SIZE, start=None, end=None):
+    """
+    One keyset page of bookings ordered by start time, optionally limited to those
+    overlapping [start, end). Returns (rows, next_cursor); next_cursor is None on the
+    last page. Bookings whose start time could not be parsed are not paged.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    after_epoch, after_id = decode_cursor(cursor)
+    if start is not None and end is not None:
+        rows = get_connection().execute(_LIST_BOOKINGS_PAGE_BETWEEN, (
+            status, after_epoch, after_id, to_epoch(start), to_epoch(end), limit + 1)).fetchall()
+    else:
+        rows = get_connection().execute(_LIST_BOOKINGS_PAGE, (status, after_epoch, after_id, limit + 1)).fetchall()
+    # One extra row tells whether another page follows without a COUNT
+    next_cursor = encode_cursor(rows[limit - 1][7], rows[limit - 1][0]) if len(rows) > limit else None
+    return [row[:7] for row in rows[:limit]], next_cursor
+
+def iter_bookings(status='active', start=None, end=None, page_size=PAGE_SIZE, cursor=None):
+    """
+    Yield bookings in start-time order, reading one keyset page at a time so memory
+    stays flat. Each page is its own query, so consecutive pages may be read from
+    different threads.
+    """
+    while True:
+        rows, cursor = list_bookings_page(status, cursor, page_size, start, end)
+        yield from rows
+        if cursor is None:
+            return
+
+@_operation
+def count_bookings_between(start, end, status='active'):
+    """Count bookings overlapping [start, end)"""
+    return get_connection().execute(_COUNT_BOOKINGS_BETWEEN, (status, to_epoch(start), to_epoch(end))).fetchone()[0]
+
+@_operation
+def overlapping_booking_ids(start, end, exclude_id=None):
+    """Ids of active bookings other than exclude_id overlapping [start, end), read from SQL"""
+    start, end = to_epoch(start), to_epoch(end)
+    if start is None or end is None:
+        return []
+    booking_ids = [row[0] for row in get_connection().execute(_OVERLAPPING_BOOKING_IDS, (start, end, exclude_id))]
+    _note_overlaps(booking_ids)
+    return booking_ids
+
+@_operation
+def find_overlapping_bookings(start, end):
+    """
+    Ids of active bookings overlapping [start, end) from the in-memory interval index:
+    a fast pre-check that can miss bookings written by another process. Writes are
+    checked again in SQL (save_booking, update_booking); use overlapping_booking_ids
+    where the answer must be authoritative.
+    """
+    start, end = to_epoch(start), to_epoch(end)
+    if start is None or end is None:
+        return []
+    return get_booking_index().overlapping(start, end)
+
+@_operation
 def get_booking_by_id(booking_id):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, summary, event_id, start_time, end_time, timezone, status
-            FROM bookings WHERE id = ?
-        """, (booking_id,))
-        return cursor.fetchone()
+    return get_connection().execute(_GET_BOOKING_BY_ID, (booking_id,)).fetchone()
 
+@_operation
 def get_last_booking():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, summary, event_id, start_time, end_time, timezone, status
-            FROM bookings
-            WHERE status = 'active'
-            ORDER BY id DESC LIMIT 1
-        """)
-        return cursor.fetchone()
+    return get_connection().execute(_GET_LAST_BOOKING).fetchone()
+
+@_operation
+def get_earliest_booking():
+    """Active booking with the earliest start time"""
+    return get_connection().execute(_GET_EARLIEST_BOOKING).fetchone()
+
+@_operation
+def get_latest_booking():
+    """Active booking with the latest start time"""
+    return get_connection().execute(_GET_LATEST_BOOKING).fetchone()
+
+@_operation
+def find_bookings_by_reference(text, near=None, limit=5):
+    """
+    Active bookings whose summary, attendees or start time contain text
+    (case-insensitive), best match first. Equal matches are ordered by distance
+    from near (ISO string, datetime or epoch; defaults to now).
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    anchor = to_epoch(near) if near is not None else None
+    if anchor is None:
+        anchor = int(datetime.now(dt_timezone.utc).timestamp())
+    if _fts_enabled and len(text) >= 3:
+        # A quoted FTS5 string is matched as a substring by the trigram tokenizer
+        query = '"' + text.replace('"', '""') + '"'
+        return get_connection().execute(_FIND_BY_REFERENCE, (query, REFERENCE_DAY_WEIGHT, anchor, limit)).fetchall()
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return get_connection().execute(_FIND_BY_REFERENCE_LIKE, (pattern, anchor, limit)).fetchall()
 
+@_operation
 def cancel_booking(booking_id):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE bookings SET status = 'cancelled', updated_at = ?
-            WHERE id = ? AND status = 'active'
-        """, (datetime.utcnow().isoformat(), booking_id))
-        conn.commit()
-
-def update_booking(booking_id, summary, start_time, end_time, timezone):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE bookings
-            SET summary = ?, start_time = ?, end_time = ?, timezone = ?, updated_at = ?
-            WHERE id = ? AND status = 'active'
-        """, (summary, start_time, end_time, timezone, datetime.utcnow().isoformat(), booking_id))
-        conn.commit()
+    with transaction() as conn:
+        cursor = conn.execute(_CANCEL_BOOKING, (datetime.utcnow().isoformat(), booking_id))
+    if cursor.rowcount:
+        _unindex_booking(booking_id)
+
+@_operation
+def update_booking(booking_id, summary, start_time, end_time, timezone, allow_overlap=False):
+    """
+    Move or rename an active booking; returns False if it is no longer active. The
+    new time is checked against the other active bookings in the same transaction
+    as the update, raising BookingConflict on an overlap unless allow_overlap.
+    """
+    with transaction() as conn:
+        if not allow_overlap:
+            _check_overlap(start_time, end_time, booking_id)
+        cursor = conn.execute(_UPDATE_BOOKING, (summary, start_time, end_time, timezone, datetime.utcnow().isoformat(),
+                                                to_epoch(start_time), to_epoch(end_time), booking_id))
+    if cursor.rowcount:
+        _index_booking(booking_id, start_time, end_time)
+    return cursor.rowcount > 0
+
+
+MIRROR_TABLE = "events_mirror"
+MIRROR_STAGING_TABLE = "events_mirror_staging"
+_MIRROR_COLUMNS = "calendar_id, event_id, summary, start_epoch, end_epoch, updated, resource"
+_UPSERT_MIRROR_EVENT = "INSERT OR REPLACE INTO {table} (" + _MIRROR_COLUMNS + ") VALUES (?, ?, ?, ?, ?, ?, ?)"
+_DELETE_MIRROR_EVENT = "DELETE FROM {table} WHERE calendar_id = ? AND event_id = ?"
+_CLEAR_MIRROR = "DELETE FROM {table} WHERE calendar_id = ?"
+_COPY_MIRROR_STAGING = (f"INSERT INTO {MIRROR_TABLE} ({_MIRROR_COLUMNS}) "
+                        f"SELECT {_MIRROR_COLUMNS} FROM {MIRROR_STAGING_TABLE} WHERE calendar_id = ?")
+_LIST_MIRROR_BETWEEN = """
+    SELECT resource FROM events_mirror
+    WHERE calendar_id = ? AND end_epoch > ? AND start_epoch < ?
+    ORDER BY start_epoch ASC
+"""
+_SEARCH_MIRROR = """
+    SELECT resource FROM events_mirror
+    WHERE calendar_id = ? AND summary LIKE ? ESCAPE '\\'
+    ORDER BY start_epoch ASC LIMIT ?
+"""
+_SELECT_SYNC_STATE = "SELECT calendar_id, sync_token, last_full_sync, last_sync, last_error FROM sync_state WHERE calendar_id = ?"
+
+
+def _event_epoch(when: dict) -> Optional[int]:
+    return to_epoch(when.get('dateTime') or when.get('date'))
+
+@_operation
+def apply_mirror_changes(calendar_id, events, reset=False, staging=False):
+    """
+    Apply one page of events().list results to the mirror in a single transaction.
+    Cancelled events are deleted; reset=True first empties the calendar's rows.
+    staging=True writes to the staging table a full resync is built in.
+    """
+    table = MIRROR_STAGING_TABLE if staging else MIRROR_TABLE
+    upsert, delete = _UPSERT_MIRROR_EVENT.format(table=table), _DELETE_MIRROR_EVENT.format(table=table)
+    with transaction() as conn:
+        if reset:
+            conn.execute(_CLEAR_MIRROR.format(table=table), (calendar_id,))
+        for event in events:
+            if event.get('status') == 'cancelled':
+                conn.execute(delete, (calendar_id, event['id']))
+            else:
+                conn.execute(upsert, (
+                    calendar_id, event['id'], event.get('summary'),
+                    _event_epoch(event.get('start', {})), _event_epoch(event.get('end', {})),
+                    event.get('updated'), json.dumps(event)
+                ))
+
+@_operation
+def replace_mirror(calendar_id, sync_token):
+    """
+    Swap a finished full resync from the staging table into the mirror and record
+    its sync token, in one transaction: readers see the old mirror or the new one.
+    """
+    with transaction() as conn:
+        conn.execute(_CLEAR_MIRROR.format(table=MIRROR_TABLE), (calendar_id,))
+        conn.execute(_COPY_MIRROR_STAGING, (calendar_id,))
+        conn.execute(_CLEAR_MIRROR.format(table=MIRROR_STAGING_TABLE), (calendar_id,))
+        save_sync_state(calendar_id, sync_token, full_sync=True)
+
+@_operation
+def list_mirror_events_between(calendar_id, start, end):
+    """Mirrored event resources overlapping [start, end), ordered by start"""
+    rows = get_connection().execute(_LIST_MIRROR_BETWEEN, (calendar_id, to_epoch(start), to_epoch(end)))
+    return [json.loads(row[0]) for row in rows]
+
+@_operation
+def search_mirror_events(calendar_id, text, limit=20):
+    """Mirrored event resources whose summary contains text (case-insensitive)"""
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rows = get_connection().execute(_SEARCH_MIRROR, (calendar_id, pattern, limit))
+    return [json.loads(row[0]) for row in rows]
+
+@_operation
+def count_mirror_events(calendar_id):
+    return get_connection().execute(
+        "SELECT COUNT(*) FROM events_mirror WHERE calendar_id = ?", (calendar_id,)).fetchone()[0]
+
+@_operation
+def get_sync_state(calendar_id) -> Optional[Dict[str, Any]]:
+    row = get_connection().execute(_SELECT_SYNC_STATE, (calendar_id,)).fetchone()
+    if not row:
+        return None
+    return dict(zip(("calendar_id", "sync_token", "last_full_sync", "last_sync", "last_error"), row))
+
+@_operation
+def save_sync_state(calendar_id, sync_token=None, full_sync=False, error=None):
+    """Record the outcome of a sync run; a failed run (error set) keeps the previous token and times"""
+    now = datetime.utcnow().isoformat()
+    with transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO sync_state (calendar_id) VALUES (?)", (calendar_id,))
+        if error is not None:
+            conn.execute("UPDATE sync_state SET last_error = ? WHERE calendar_id = ?", (error, calendar_id))
+        else:
+            conn.execute("""
+                UPDATE sync_state
+                SET sync_token = ?, last_sync = ?, last_error = NULL,
+                    last_full_sync = CASE WHEN ? THEN ? ELSE last_full_sync END
+                WHERE calendar_id = ?
+            """, (sync_token, now, full_sync, now, calendar_id))
+
+_SELECT_SESSION = "SELECT context_event, messages, updated_at FROM sessions WHERE session_id = ?"
+_UPSERT_SESSION = """
+    INSERT INTO sessions (session_id, context_event, messages, updated_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT (session_id) DO UPDATE SET
+        context_event = excluded.context_event, messages = excluded.messages, updated_at = excluded.updated_at
+"""
+_PURGE_EXPIRED_SESSIONS = "DELETE FROM sessions WHERE updated_at < ?"
+# Least recently used sessions beyond the newest `keep`
+_PURGE_LRU_SESSIONS = """
+    DELETE FROM sessions WHERE session_id IN (
+        SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+    )
+"""
+
+@_operation
+def load_session(session_id) -> Optional[Dict[str, Any]]:
+    row = get_connection().execute(_SELECT_SESSION, (session_id,)).fetchone()
+    if not row:
+        return None
+    return {
+        "session_id": session_id,
+        "context_event": json.loads(row[0]) if row[0] else None,
+        "messages": json.loads(row[1]) if row[1] else [],
+        "updated_at": row[2],
+    }
+
+@_operation
+def save_session(session_id, context_event, messages, updated_at):
+    with transaction() as conn:
+        conn.execute(_UPSERT_SESSION, (session_id, json.dumps(context_event) if context_event else None,
+                                       json.dumps(messages), updated_at))
+
+@_operation
+def delete_session(session_id):
+    with transaction() as conn:
+        return conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+@_operation
+def purge_sessions(expired_before, keep):
+    """Delete sessions last used before expired_before, then all but the `keep` most recent; returns rows removed"""
+    with transaction() as conn:
+        removed = conn.execute(_PURGE_EXPIRED_SESSIONS, (expired_before,)).rowcount
+        removed += conn.execute(_PURGE_LRU_SESSIONS, (keep,)).rowcount
+    return removed
+
+@_operation
+def count_sessions():
+    return get_connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
@@ -0,0 +1,93 @@
+# fast_datetime.py
+import datetime
+import re
+from typing import Optional, Tuple
+
+# Hand-rolled recognizer for the date/time forms most of our traffic uses, tried
+# before dateparser. Anything it does not fully recognize returns None so the
+# caller falls back to dateparser. Results follow dateparser.parse's defaults:
+# naive local datetimes, and a bare weekday means its most recent occurrence
+# (today included). "next <weekday>" (which dateparser.parse cannot read) is the
+# first occurrence after today. A time followed by a UTC offset or zone name
+# ("+05:00", "Z", "EST", "Europe/Berlin") is left to dateparser, which keeps the zone.
+
+WEEKDAYS = {name: index for index, name in enumerate(
+    ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"))}
+
+_TIME = (
+    r"(?:(?P<{p}word>noon|midnight)"
+    r"|(?P<{p}hour>\d{{1,2}})(?::(?P<{p}minute>\d{{2}})(?::(?P<{p}second>\d{{2}})(?:\.(?P<{p}fraction>\d{{1,6}}))?)?)?"
+    r"\s*(?P<{p}ampm>am|pm)?)"
+)
+
+_PATTERN = re.compile(
+    r"\b(?:"
+    # on 2025-01-02 at 14:30:00 / 2025-01-02 14:30 / 2025-01-02T14:30:00
+    r"(?:on\s+)?(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})(?:T|\s+at\s+|\s+)" + _TIME.format(p="iso_") +
+    # tomorrow at 3pm / today 14:30
+    r"|(?P<relday>today|tomorrow)\s+(?:at\s+)?" + _TIME.format(p="rel_") +
+    # next Monday 10am / friday at 3pm
+    r"|(?:(?P<next>next)\s+)?(?P<weekday>monday|tuesday|wednesday|thursday|friday|saturday|sunday)\s+(?:at\s+)?"
+    + _TIME.format(p="wd_") +
+    r")(?![\w:])",
+    re.IGNORECASE,
+)
+
+# Offsets and zone names after a time: +05:00, -0800, Z, UTC, GMT+2, EST, CEST, Europe/Berlin
+_ZONE_SUFFIX = re.compile(
+    r"\s*(?:[+-]\d{2}(?::?\d{2})?(?!\d)|Z\b|(?i:UTC|GMT)(?![a-z])|[A-Z]{1,4}T\b|[A-Za-z]+/[A-Za-z_]+)"
+)
+
+
+def _clock(match: re.Match, prefix: str) -> Optional[datetime.time]:
+    word = match.group(prefix + "word")
+    if word:
+        return datetime.time(12) if word.lower() == "noon" else datetime.time(0)
+    hour = int(match.group(prefix + "hour"))
+    minute = match.group(prefix + "minute")
+    ampm = match.group(prefix + "ampm")
+    if minute is None and ampm is None:
+        return None  # a bare number is not a time
+    second = int(match.group(prefix + "second") or 0)
+    fraction = match.group(prefix + "fraction")
+    microsecond = int(fraction.ljust(6, "0")) if fraction else 0
+    minute = int(minute or 0)
+    if ampm:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if ampm.lower() == "pm" else 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return datetime.time(hour, minute, second, microsecond)
+
+
+def search_common_datetime(text: str, now: Optional[datetime.datetime] = None) -> Optional[Tuple[str, datetime.datetime]]:
+    """Find the first common-form date/time in text; returns (matched text, naive datetime) or None"""
+    match = _PATTERN.search(text)
+    if not match or _ZONE_SUFFIX.match(text, match.end()):
+        return None
+    now = now or datetime.datetime.now()
+    if match.group("year"):
+        clock = _clock(match, "iso_")
+        try:
+            date = datetime.date(int(match.group("year")), int(match.group("month")), int(match.group("day")))
+        except ValueError:
+            return None
+    elif match.group("relday"):
+        clock = _clock(match, "rel_")
+        date = now.date() + datetime.timedelta(days=1 if match.group("relday").lower() == "tomorrow" else 0)
+    else:
+        clock = _clock(match, "wd_")
+        target = WEEKDAYS[match.group("weekday").lower()]
+        if match.group("next"):
+            date = now.date() + datetime.timedelta(days=(target - now.weekday() - 1) % 7 + 1)
+        else:
+            date = now.date() - datetime.timedelta(days=(now.weekday() - target) % 7)
+    if clock is None:
+        return None
+    return match.group(0), datetime.datetime.combine(date, clock)
+
+
+def parse_common_datetime(text: str, now: Optional[datetime.datetime] = None) -> Optional[datetime.datetime]:
+    found = search_common_datetime(text, now)
+    return found[1] if found else None
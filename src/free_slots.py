@@ -0,0 +1,83 @@
+# free_slots.py
+import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+Minutes = Union[int, float, datetime.timedelta]
+
+
+def _as_timedelta(value: Minutes) -> datetime.timedelta:
+    if isinstance(value, datetime.timedelta):
+        return value
+    return datetime.timedelta(minutes=value)
+
+
+def _like(dt: datetime.datetime, reference: datetime.datetime) -> datetime.datetime:
+    """Make dt comparable with reference: naive values are treated as UTC"""
+    if (dt.tzinfo is None) == (reference.tzinfo is None):
+        return dt
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=datetime.timezone.utc).astimezone(reference.tzinfo)
+    return dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort busy intervals once and merge the ones that overlap or touch"""
+    merged: List[List[datetime.datetime]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def iter_free_slots(window_start: datetime.datetime, window_end: datetime.datetime,
+                    busy: Iterable[Interval], duration: Minutes = 30,
+                    step: Optional[Minutes] = None,
+                    anchor: Optional[datetime.datetime] = None) -> Iterator[Interval]:
+    """
+    Lazily yield free (start, end) slots of `duration` inside [window_start, window_end).
+
+    Busy intervals are merged once, then a sweep line walks the gaps between them.
+    Candidate starts lie on a grid of `step` (defaults to `duration`) anchored at
+    `anchor` (defaults to window_start), so step=15 with an on-the-hour anchor gives
+    quarter-hour alignment. Intervals are half-open: a slot may end exactly when a
+    busy period starts. Naive datetimes are treated as UTC when mixed with aware ones.
+    """
+    duration = _as_timedelta(duration)
+    step = _as_timedelta(step) if step is not None else duration
+    if duration <= datetime.timedelta(0) or step <= datetime.timedelta(0):
+        raise ValueError("duration and step must be positive")
+    anchor = _like(anchor, window_start) if anchor is not None else window_start
+
+    clipped = []
+    for start, end in busy:
+        start, end = _like(start, window_start), _like(end, window_start)
+        if end > window_start and start < window_end:
+            clipped.append((max(start, window_start), min(end, window_end)))
+
+    gap_start = window_start
+    for busy_start, busy_end in merge_intervals(clipped) + [(window_end, window_end)]:
+        # First grid point at or after the gap start
+        offset = (gap_start - anchor) % step
+        current = gap_start if not offset else gap_start + (step - offset)
+        while current + duration <= busy_start:
+            yield current, current + duration
+            current += step
+        gap_start = max(gap_start, busy_end)
+
+
+def event_interval(event: dict) -> Optional[Interval]:
+    """(start, end) of a Calendar API event resource; all-day events span whole days"""
+    start, end = event.get('start', {}), event.get('end', {})
+    if 'dateTime' in start and 'dateTime' in end:
+        return (datetime.datetime.fromisoformat(start['dateTime']),
+                datetime.datetime.fromisoformat(end['dateTime']))
+    if 'date' in start and 'date' in end:
+        return (datetime.datetime.fromisoformat(start['date']),
+                datetime.datetime.fromisoformat(end['date']))
+    return None
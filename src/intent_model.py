@@ -0,0 +1,211 @@
+# intent_model.py
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Hashed bag-of-words intent classifier. Messages become word and word-bigram
+# features hashed into a fixed number of buckets; a (buckets x intents) NumPy weight
+# matrix scores them. Scoring a batch is a single gather and bincount per intent, so
+# thousands of messages are classified in one call. Whole-word tokens mean "address"
+# no longer counts as "add". Messages the model is unsure about fall back to
+# FALLBACK_KEYWORDS, so bare commands ("edit", "availability") are not "unknown".
+
+INTENTS = ("cancel", "edit", "book", "list", "check", "help", "unknown")
+N_FEATURES = 2 ** 14
+BUCKET_CACHE_SIZE = 100_000
+MIN_CONFIDENCE = 0.4
+
+# Command words that decide a message the model is not confident about, when they
+# point to exactly one intent ("edit", "availability", "Delete event")
+FALLBACK_KEYWORDS = {
+    "cancel": ("cancel", "delete", "remove", "unbook"),
+    "edit": ("edit", "reschedule", "move", "change", "modify", "postpone"),
+    "book": ("book", "schedule", "create", "add", "arrange"),
+    "list": ("list", "events", "bookings", "agenda", "appointments", "meetings", "upcoming"),
+    "check": ("check", "free", "available", "availability", "busy", "openings"),
+    "help": ("help", "commands", "instructions"),
+}
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+TRAIN_CORPUS = os.path.join(CORPUS_DIR, "intent_train.tsv")
+TEST_CORPUS = os.path.join(CORPUS_DIR, "intent_test.tsv")
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+def tokenize(message: str) -> List[str]:
+    """Lower-cased words plus adjacent word pairs ("set up", "what's on")"""
+    words = _TOKEN.findall(message.lower())
+    return words + list(map(" ".join, zip(words, words[1:])))
+
+
+def load_corpus(path: str) -> Tuple[List[str], List[str]]:
+    """Read a tab-separated `intent<TAB>message` file; '#' lines are comments"""
+    messages, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, message = line.split("\t", 1)
+            if label not in INTENTS:
+                raise ValueError(f"Unknown intent {label!r} in {path}")
+            labels.append(label)
+            messages.append(message)
+    return messages, labels
+
+
+class _BucketCache(dict):
+    """token -> feature bucket, hashed on first sight"""
+
+    def __init__(self, n_features: int):
+        super().__init__()
+        self.n_features = n_features
+
+    def __missing__(self, token: str) -> int:
+        if len(self) >= BUCKET_CACHE_SIZE:
+            self.clear()
+        # crc32 rather than hash(): str hashes are salted per process
+        bucket = self[token] = zlib.crc32(token.encode("utf-8")) % self.n_features
+        return bucket
+
+
+class IntentClassifier:
+    """Linear softmax model over hashed bag-of-words features"""
+
+    def __init__(self, n_features: int = N_FEATURES, intents: Sequence[str] = INTENTS,
+                 min_confidence: float = MIN_CONFIDENCE):
+        self.n_features = n_features
+        self.intents = tuple(intents)
+        self.min_confidence = min_confidence
+        self.unknown = self.intents.index("unknown")
+        self.weights = np.zeros((n_features, len(self.intents)), dtype=np.float32)
+        self.bias = np.zeros(len(self.intents), dtype=np.float32)
+        # Buckets seen in training; a message with none of them is "unknown"
+        self.known = np.zeros(n_features, dtype=bool)
+        # Trained rows as Python tuples, so classifying one message skips NumPy overhead
+        self._sparse = {}
+        self._buckets = _BucketCache(n_features)
+        self._fallback = {word: intent for intent, words in FALLBACK_KEYWORDS.items() for word in words}
+
+    def fallback(self, message: str) -> str:
+        """The one intent whose command words the message uses, else 'unknown'"""
+        matched = {self._fallback[word] for word in _TOKEN.findall(message.lower()) if word in self._fallback}
+        return matched.pop() if len(matched) == 1 else self.intents[self.unknown]
+
+    def featurize(self, messages: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Flattened (row, bucket) arrays for a batch, and the number of rows"""
+        lookup = self._buckets.__getitem__
+        lengths: List[int] = []
+        buckets: List[int] = []
+        for message in messages:
+            tokens = tokenize(message)
+            lengths.append(len(tokens))
+            buckets.extend(map(lookup, tokens))
+        rows = np.repeat(np.arange(len(lengths), dtype=np.intp), lengths)
+        return rows, np.asarray(buckets, dtype=np.intp), len(lengths)
+
+    def _scores(self, rows: np.ndarray, buckets: np.ndarray, count: int) -> np.ndarray:
+        gathered = self.weights[buckets]
+        scores = np.empty((count, len(self.intents)), dtype=np.float32)
+        for j in range(len(self.intents)):
+            scores[:, j] = np.bincount(rows, weights=gathered[:, j], minlength=count)
+        return scores + self.bias
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def fit(self, messages: Sequence[str], labels: Sequence[str], epochs: int = 300,
+            learning_rate: float = 1.0, l2: float = 1e-3) -> "IntentClassifier":
+        """Full-batch gradient descent on cross-entropy, over only the buckets the corpus uses"""
+        rows, buckets, count = self.featurize(messages)
+        used, columns = np.unique(buckets, return_inverse=True)
+        x = np.zeros((count, len(used)), dtype=np.float32)
+        np.add.at(x, (rows, columns), 1.0)
+        y = np.zeros((count, len(self.intents)), dtype=np.float32)
+        y[np.arange(count), [self.intents.index(label) for label in labels]] = 1.0
+
+        w = np.zeros((len(used), len(self.intents)), dtype=np.float32)
+        b = np.zeros(len(self.intents), dtype=np.float32)
+        for _ in range(epochs):
+            error = (self._softmax(x @ w + b) - y) / count
+            w -= learning_rate * (x.T @ error + l2 * w)
+            b -= learning_rate * error.sum(axis=0)
+
+        self.weights.fill(0.0)
+        self.weights[used] = w
+        self.bias = b
+        self.known[:] = False
+        self.known[used] = True
+        self._sparse = {int(bucket): tuple(map(float, row)) for bucket, row in zip(used, w)}
+        return self
+
+    def predict_proba(self, messages: Sequence[str]) -> np.ndarray:
+        """(len(messages) x len(intents)) probabilities, in self.intents order"""
+        return self._softmax(self._scores(*self.featurize(messages)))
+
+    def predict(self, messages: Sequence[str]) -> List[str]:
+        """Classify a batch; low-confidence or unrecognized messages go to fallback()"""
+        rows, buckets, count = self.featurize(messages)
+        if count == 0:
+            return [self.fallback(message) for message in messages]
+        probs = self._softmax(self._scores(rows, buckets, count))
+        best = probs.argmax(axis=1)
+        unsure = probs[np.arange(count), best] < self.min_confidence
+        unsure |= np.bincount(rows, weights=self.known[buckets], minlength=count) == 0
+        predicted = [self.intents[i] for i in best]
+        for i in np.flatnonzero(unsure):
+            predicted[i] = self.fallback(messages[i])
+        return predicted
+
+    def classify(self, message: str) -> str:
+        """Single-message predict(), summing only the trained rows the message hits"""
+        lookup = self._buckets.__getitem__
+        hits = [row for row in map(self._sparse.get, map(lookup, tokenize(message))) if row is not None]
+        if not hits:
+            return self.fallback(message)
+        scores = [float(b) + sum(column) for b, column in zip(self.bias, zip(*hits))]
+        top = max(scores)
+        best = scores.index(top)
+        if 1.0 / sum(math.exp(s - top) for s in scores) < self.min_confidence:
+            return self.fallback(message)
+        return self.intents[best]
+
+    def accuracy(self, messages: Sequence[str], labels: Sequence[str]) -> float:
+        predicted = self.predict(messages)
+        return sum(p == l for p, l in zip(predicted, labels)) / len(labels) if labels else 0.0
+
+    @classmethod
+    def from_corpus(cls, path: str = TRAIN_CORPUS, **kwargs) -> "IntentClassifier":
+        return cls(**kwargs).fit(*load_corpus(path))
+
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> IntentClassifier:
+    """The shared classifier, trained from the bundled corpus on first use"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier.from_corpus(os.getenv("INTENT_CORPUS", TRAIN_CORPUS))
+    return _classifier
+
+
+def classify_intent(message: str) -> str:
+    return get_classifier().classify(message)
+
+
+def classify_intents(messages: Sequence[str]) -> List[str]:
+    return get_classifier().predict(messages)
@@ -0,0 +1,121 @@
+# interval_index.py
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+# Intervals longer than this (all-day and multi-day events) are kept apart, so
+# they do not widen the scan for the short ones
+LONG_INTERVAL = 24 * 3600
+
+Item = Tuple[int, int, int]  # (start, end, id)
+
+
+class _SortedIntervals:
+    """Intervals sorted by start, with the exact longest length kept as the scan bound"""
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self.items: List[Item] = sorted(items)
+        self.starts: List[int] = [item[0] for item in self.items]
+        self.lengths = Counter(e - s for s, e, _ in self.items)
+        self.max_length = max(self.lengths, default=0)
+
+    def add(self, item: Item):
+        position = bisect_right(self.items, item)
+        self.items.insert(position, item)
+        self.starts.insert(position, item[0])
+        length = item[1] - item[0]
+        self.lengths[length] += 1
+        self.max_length = max(self.max_length, length)
+
+    def remove(self, item: Item):
+        position = bisect_left(self.items, item)
+        del self.items[position]
+        del self.starts[position]
+        length = item[1] - item[0]
+        self.lengths[length] -= 1
+        if not self.lengths[length]:
+            del self.lengths[length]
+            if length == self.max_length:
+                # Distinct lengths are few (durations are mostly whole quarter hours)
+                self.max_length = max(self.lengths, default=0)
+
+    def overlapping(self, start: int, end: int) -> List[Item]:
+        # Anything starting before start - max_length has ended by start
+        hi = bisect_left(self.starts, end)
+        lo = bisect_right(self.starts, start - self.max_length)
+        return [item for item in self.items[lo:hi] if item[1] > start]
+
+
+class IntervalIndex:
+    """
+    In-memory index of half-open [start, end) intervals keyed by an id.
+
+    Intervals are kept in two lists sorted by start: those up to LONG_INTERVAL long
+    and the longer ones. An overlap query for [start, end) bisects each list to the
+    intervals starting before `end` and walks back no further than `start` minus
+    that list's longest length, which is recomputed when the longest is removed.
+    The walk only passes intervals that end early while starting within one
+    longest length of `start`, so a query costs O(log n + k) for bookings of
+    similar lengths; one long event no longer widens every scan.
+    """
+
+    def __init__(self):
+        self._short = _SortedIntervals()
+        self._long = _SortedIntervals()
+        self._by_id: Dict[int, Item] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, item_id):
+        return item_id in self._by_id
+
+    def _bucket(self, item: Item) -> _SortedIntervals:
+        return self._long if item[1] - item[0] > LONG_INTERVAL else self._short
+
+    def add(self, item_id: int, start: int, end: int):
+        """Insert or replace the interval stored under item_id"""
+        with self._lock:
+            if item_id in self._by_id:
+                self.remove(item_id)
+            item = (start, end, item_id)
+            self._bucket(item).add(item)
+            self._by_id[item_id] = item
+
+    def remove(self, item_id: int) -> bool:
+        """Drop the interval stored under item_id; False if it was not indexed"""
+        with self._lock:
+            item = self._by_id.pop(item_id, None)
+            if item is None:
+                return False
+            self._bucket(item).remove(item)
+            return True
+
+    def overlapping(self, start: int, end: int) -> List[int]:
+        """Ids of intervals overlapping [start, end), in start order"""
+        with self._lock:
+            found = self._short.overlapping(start, end)
+            long_found = self._long.overlapping(start, end) if self._long.items else None
+            if long_found:
+                found = heapq.merge(found, long_found)
+            return [item_id for _, _, item_id in found]
+
+    def clear(self):
+        with self._lock:
+            self._short = _SortedIntervals()
+            self._long = _SortedIntervals()
+            self._by_id.clear()
+
+    @classmethod
+    def from_intervals(cls, intervals):
+        """Bulk-build from (id, start, end) rows; O(n log n)"""
+        index = cls()
+        items = [(start, end, item_id) for item_id, start, end in intervals
+                 if start is not None and end is not None]
+        index._short = _SortedIntervals(item for item in items if item[1] - item[0] <= LONG_INTERVAL)
+        index._long = _SortedIntervals(item for item in items if item[1] - item[0] > LONG_INTERVAL)
+        index._by_id = {item[2]: item for item in items}
+        return index
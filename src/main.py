@@ -1,24 +1,44 @@
 # main.py
 import os
 import sys
+import json
+import logging
+import time
+
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
 
 # Add the project root to PYTHONPATH
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from src.agent import parse_input_node, handle_user_message, BookingState, handle_booking, handle_availability, handle_cancellation, handle_edit, handle_list, handle_help
+from src.agent import (build_agent, node_timings, get_context_event_from_history, context_event_from_reply,
+                       format_booking_line, lookup_many, is_write)
+from src.async_exec import AsyncFacade, run_blocking, shutdown_executors
+from src.capture import chat_capture
 from src.calendar_utils import GoogleCalendarUtils
+from src.chat_batch import normalize_items, process_batch
+from src import metrics
+from src.nlu import parse_messages, warm_up
+from src.parse_cache import parse_cache
+from src.profiling import profiler
+from src.tracing import tracer
+from src.session_store import create_session_store, new_session_id
+from src import database
 from src.database import init_db
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize calendar
+# Initialize calendar; the API client is built and authenticated lazily on first use
 calendar_utils = GoogleCalendarUtils()
 
-calendar_available = calendar_utils.authenticate()
+# Awaitable views that run the blocking calendar client and SQLite calls on bounded pools
+async_calendar = AsyncFacade(calendar_utils, "calendar")
+async_db = AsyncFacade(database, "db")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -38,6 +58,54 @@ app.add_middleware(
     expose_headers=["Content-Type", "Authorization"],
 )
 
+# Request latency and in-flight count for /metrics, labelled by route template
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_REQUEST_SECONDS.labels(request.method, route, str(status)).observe(time.perf_counter() - started)
+
+# Opt-in profiling: X-Profile: sample|cprofile, or PROFILE_SAMPLE_RATE; see src.profiling
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    mode = profiler.mode_for(request.headers)
+    handle = profiler.begin(mode) if mode else None
+    if handle is None:
+        return await call_next(request)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        record = profiler.finish(handle, request.method, request.url.path, status)
+        logger.info(f"Profiled {request.method} {request.url.path} in {record['duration_ms']} ms: {record['name']}")
+    response.headers["X-Profile-Id"] = record["name"]
+    return response
+
+# Paths not traced: scrapes and the debug endpoints themselves
+UNTRACED_PATHS = ("/metrics", "/health", "/debug/")
+
+# A trace per request; NLU, database and calendar spans join it (see src.tracing)
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    path = request.url.path
+    if path.startswith(UNTRACED_PATHS) or not tracer.should_trace(request.headers):
+        return await call_next(request)
+    with tracer.trace(f"{request.method} {path}", request.headers.get("traceparent"),
+                      method=request.method, path=path) as root:
+        response = await call_next(request)
+        root.set(status=response.status_code)
+        response.headers["X-Trace-Id"] = root.trace.trace_id
+        return response
+
 # Initialize database
 try:
     init_db()
@@ -46,14 +114,161 @@ except Exception as e:
     logger.error(f"Failed to initialize database: {str(e)}")
     raise
 
+# Mirror Google Calendar into SQLite when a sync interval is configured
+sync_interval = os.getenv("CALENDAR_SYNC_INTERVAL")
+if sync_interval:
+    calendar_utils.start_mirror(interval_seconds=float(sync_interval))
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Train the intent model and load dateparser before the first chat request needs them
+@app.on_event("startup")
+async def warm_parsers():
+    await run_blocking("nlu", warm_up)
+
+@app.on_event("shutdown")
+def shutdown():
+    shutdown_executors(wait=False)
+    chat_capture.close()
+    tracer.close()
+
+# Calendar mirror sync status and lag
+@app.get("/sync/status")
+async def sync_status():
+    return await async_calendar.sync_status()
+
+# Calendar events whose title contains q, from the mirror while it is fresh
+@app.get("/calendar/search")
+async def search_calendar(q: str, limit: int = 20):
+    return {"events": await async_calendar.search_events(q, limit)}
+
+# Parse and calendar cache hit rates
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"parse": parse_cache.stats(), "calendar": calendar_utils.cache_stats(),
+            "sessions": await call_session_store("stats")}
+
+def _cache_stats():
+    return {"parse": parse_cache.stats(), "calendar": calendar_utils.cache_stats()}
+
+# Cache counters are read from the caches' own stats when /metrics is scraped
+metrics.CallbackMetric("calmate_cache_hits_total", "Cache lookups served from the cache", ["cache"],
+                       lambda: {(name, ): s["hits"] for name, s in _cache_stats().items()}, kind="counter")
+metrics.CallbackMetric("calmate_cache_misses_total", "Cache lookups that missed", ["cache"],
+                       lambda: {(name, ): s["misses"] for name, s in _cache_stats().items()}, kind="counter")
+metrics.CallbackMetric("calmate_cache_hit_ratio", "Hits over lookups since startup", ["cache"],
+                       lambda: {(name, ): s["hit_rate"] for name, s in _cache_stats().items()})
+metrics.CallbackMetric("calmate_cache_entries", "Entries held by the cache", ["cache"],
+                       lambda: {(name, ): s["entries"] for name, s in _cache_stats().items()})
+
+# Counters and latency histograms in the Prometheus text exposition format
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Clients the debug endpoints answer when PROFILE_TOKEN is not set
+LOCAL_CLIENTS = ("127.0.0.1", "::1")
+
+def _check_profile_token(request: Request):
+    """Profiles and traces hold message text: require PROFILE_TOKEN, or a local client when none is set"""
+    if profiler.token:
+        if request.headers.get("x-profile-token") != profiler.token:
+            raise HTTPException(status_code=403, detail="X-Profile-Token required")
+    elif request.client is None or request.client.host not in LOCAL_CLIENTS:
+        raise HTTPException(status_code=403, detail="Set PROFILE_TOKEN to read profiles and traces remotely")
+
+# Recent request profiles in the on-disk ring, newest first
+@app.get("/debug/profiles")
+async def list_profiles(request: Request):
+    _check_profile_token(request)
+    return {"profiles": profiler.recent(), "directory": profiler.directory, "skipped_busy": profiler.skipped}
+
+# One profile file: collapsed stacks (text) or pstats (binary)
+@app.get("/debug/profiles/{name}")
+async def get_profile(name: str, request: Request):
+    _check_profile_token(request)
+    file_path = profiler.path_of(name)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile")
+    media_type = "text/plain" if name.endswith(".collapsed") else "application/octet-stream"
+    return FileResponse(file_path, media_type=media_type, filename=name)
+
+# Finished traces, newest first; min_ms keeps only slow ones
+@app.get("/debug/traces")
+async def list_traces(request: Request, limit: int = 50, min_ms: float = 0.0):
+    _check_profile_token(request)
+    return {"traces": tracer.recent(limit, min_ms)}
+
+# One trace with all its spans and the critical path
+@app.get("/debug/traces/{trace_id}")
+async def get_trace(trace_id: str, request: Request):
+    _check_profile_token(request)
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace")
+    return trace
+
+# Conversation state per session_id; SESSION_STORE=sqlite keeps it in bookings.db
+session_store = create_session_store()
+
+async def call_session_store(method, *args):
+    """Session store call, on the db pool for the SQLite backend"""
+    fn = getattr(session_store, method)
+    if session_store.blocking:
+        return await run_blocking("db", fn, *args)
+    return fn(*args)
+
+# Drop a session's stored context
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    return {"deleted": await call_session_store("delete", session_id)}
+
+# The chat pipeline, compiled once and shared by every request
+chat_graph = build_agent()
+
+async def record_turn(session_id, user_msg, response, context_event):
+    """
+    Store a turn in its session and return the context event the session's next
+    message is parsed with: the event the reply is about, else the one it had.
+    Only the reply is parsed for a new context event, never the whole history.
+    """
+    reply = response.get("response")
+    reply_event = await run_blocking("nlu", context_event_from_reply, reply) if reply else None
+    context_event = reply_event or context_event
+    await call_session_store("record_turn", session_id, [
+        {"role": "user", "content": user_msg},
+        {"role": "assistant", "content": reply},
+    ], context_event)
+    return context_event
+
+async def respond(item, slots, context_event, lookups=None):
+    """
+    Run the pipeline on an item that was already parsed (chat batch), skipping the
+    lookups when they were made in bulk, and record the turn if the item has a session
+    """
+    state = {"user_msg": item["message"], "slots": slots, "context_event": context_event}
+    if lookups is not None:
+        state.update(lookups, looked_up=True)
+    state = await chat_graph.ainvoke(state)
+    response = state["result"]
+    if item["session_id"] is not None:
+        context_event = await record_turn(item["session_id"], item["message"], response, context_event)
+    return response, context_event
+
+# Per-node call counts and wall times of the chat pipeline
+@app.get("/pipeline/stats")
+async def pipeline_stats():
+    return node_timings.stats()
+
 # Chat endpoint
 @app.post("/chat")
 async def chat(request: Request):
+    started = time.perf_counter()
+    capture = chat_capture.should_capture()
+    user_msg, state = "", {}
     try:
         data = await request.json()
         user_msg = data.get("message", "")
@@ -61,44 +276,92 @@ async def chat(request: Request):
         if not user_msg:
             return {"response": "Please provide a message"}
             
-        # Get chat history
+        # Conversation context comes from the session store; a full history is only
+        # scanned for clients that do not send a session_id yet
+        session_id = data.get("session_id")
         messages = data.get("messages", [])
+        session = await call_session_store("get", session_id) if session_id else None
         
-        # Initialize LangGraph state
-        state = BookingState()
-        state.context_event = get_context_event_from_history(messages) if messages else None
-        
-        # Process input
-        state = parse_input_node(state, user_msg, messages)
+        if session is not None:
+            context_event = session["context_event"]
+        elif messages:
+            context_event = await run_blocking("nlu", get_context_event_from_history, messages)
+        else:
+            context_event = None
+        new_session = session is None
+        session_id = session_id or new_session_id()
         
-        # Handle response
-        if state.response:
-            return {"response": state.response}
-            
-        # Handle different intents
-        intent = state.slots.get("intent", "unknown")
+        # Parse, look up what the intent needs and reply; blocking steps run on the pools
+        state = await chat_graph.ainvoke({"user_msg": user_msg, "context_event": context_event})
+        response = state["result"]
+        if capture:
+            chat_capture.record(user_msg, session_id, new_session, messages if new_session else None,
+                                context_event, state.get("slots"), response, state["timings_ms"],
+                                (time.perf_counter() - started) * 1e3)
         
-        if intent == "book":
-            response = handle_booking(state.slots)
-        elif intent == "check":
-            response = handle_availability(state.slots)
-        elif intent == "cancel":
-            response = handle_cancellation(state.slots)
-        elif intent == "edit":
-            response = handle_edit(state.slots)
-        elif intent == "list":
-            response = handle_list(state.slots)
-        elif intent == "help":
-            response = handle_help()
-        else:
-            response = {"response": "I'm not sure what you want to do. Try asking for help."}
+        await record_turn(session_id, user_msg, response, state.get("context_event"))
             
-        logger.info(f"Processed message: {user_msg} -> {response}")
-        return response
+        logger.info(f"Processed message: {user_msg} -> {response} in {state['timings_ms']} ms")
+        return {**response, "session_id": session_id, "timing_ms": state["timings_ms"]}
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
+        if capture and user_msg:
+            chat_capture.record(user_msg, None, True, None, state.get("context_event"), state.get("slots"),
+                                None, state.get("timings_ms"), (time.perf_counter() - started) * 1e3, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+# Many messages per request: parsed and looked up in bulk, sessions run concurrently and in order,
+# bookings, cancels and edits one at a time
+@app.post("/chat/batch")
+async def chat_batch(request: Request):
+    try:
+        items = normalize_items(await request.json())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = await process_batch(items, parse=parse_messages, context_of=get_context_event_from_history,
+                                     load_session=lambda session_id: call_session_store("get", session_id),
+                                     lookup=lookup_many, respond=respond, is_write=is_write)
+        logger.info(f"Processed batch of {result['count']} messages in {result['timing_ms']['total']} ms")
+        return result
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+BOOKING_FIELDS = ("id", "summary", "event_id", "start_time", "end_time", "timezone", "status")
+
+def booking_json(row):
+    booking = dict(zip(BOOKING_FIELDS, row))
+    booking["text"] = format_booking_line(row).strip()
+    return booking
+
+# One keyset page of bookings; pass next_cursor back as cursor for the following page
+@app.get("/bookings")
+async def bookings_page(cursor: str = None, limit: int = database.PAGE_SIZE, status: str = "active",
+                        start: str = None, end: str = None):
+    try:
+        rows, next_cursor = await async_db.list_bookings_page(status, cursor, limit, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor or limit: {str(e)}")
+    return {"bookings": [booking_json(row) for row in rows], "next_cursor": next_cursor}
+
+# Bookings streamed as they are read from SQLite: NDJSON, or server-sent events with format=sse
+@app.get("/bookings/stream")
+async def bookings_stream(status: str = "active", start: str = None, end: str = None, format: str = "ndjson"):
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    # A sync generator is iterated on Starlette's threadpool, one keyset page per query
+    def lines():
+        for row in database.iter_bookings(status, start, end, page_size=database.PAGE_SIZE):
+            payload = json.dumps(booking_json(row))
+            yield f"data: {payload}\n\n" if format == "sse" else payload + "\n"
+        if format == "sse":
+            yield "event: end\ndata: {}\n\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(lines(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
 # Root endpoint with API information
 @app.get("/")
 async def root():
@@ -0,0 +1,280 @@
+# metrics.py
+import bisect
+import functools
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.tracing import span, tracing_active
+
+# Process-wide counters, gauges and histograms, rendered at GET /metrics in the
+# Prometheus text exposition format. Recording takes one lock per labelled series
+# and a bisect, about a microsecond; values that already live elsewhere (cache
+# hit counts) are read by callbacks only when /metrics is scraped.
+
+# Latency buckets in seconds, from a cached parse (~0.1 ms) to a slow Google call
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List[Any] = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def labels(self, *values: str):
+        """The series for these label values; hold on to it on hot paths"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, self.label_names, values)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, name, label_names, values):
+        yield f"{name}{_format_labels(label_names, values)} {_format_value(self.value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramSeries:
+    def __init__(self, bounds: Sequence[float]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def samples(self, name, label_names, values):
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = 0
+        for bound, count in zip(list(self._bounds) + [math.inf], counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            yield f"{name}_bucket{_format_labels(label_names, values, le)} {cumulative}"
+        yield f"{name}_sum{_format_labels(label_names, values)} {_format_value(total)}"
+        yield f"{name}_count{_format_labels(label_names, values)} {cumulative}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels)
+
+    def _new_child(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class CallbackMetric:
+    """
+    Samples read from fn() at scrape time: a mapping of label-value tuples to numbers.
+    For counts kept elsewhere (cache stats), so the hot path records nothing twice.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str],
+                 fn: Callable[[], Dict[Tuple[str, ...], float]], kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.kind = kind
+        self._fn = fn
+        _register(self)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self._fn().items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+def render() -> str:
+    """Every registered metric in the text exposition format (version 0.0.4)"""
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+def outcome_of(error: BaseException) -> str:
+    """'http_<status>' for API errors that carry a response status (HttpError), else 'error'"""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return f"http_{status}" if status else "error"
+
+
+def timed(histogram: Histogram, *labels: str):
+    """
+    Decorator timing every call into histogram, labelled with labels plus an
+    outcome: 'ok', or the outcome_of() the exception it raised.
+    """
+    series_ok = histogram.labels(*labels, "ok")
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                histogram.labels(*labels, outcome_of(e)).observe(time.perf_counter() - started)
+                raise
+            series_ok.observe(time.perf_counter() - started)
+            return result
+        return call
+    return decorate
+
+
+NLU_PARSE_SECONDS = Histogram(
+    "calmate_nlu_parse_seconds", "Time to parse messages into intent and slots", ["function", "outcome"])
+DB_OPERATION_SECONDS = Histogram(
+    "calmate_db_operation_seconds", "Time per src.database operation", ["operation", "outcome"])
+CALENDAR_API_SECONDS = Histogram(
+    "calmate_calendar_api_seconds", "Time per Google Calendar API request", ["method", "outcome"])
+CHAT_STAGE_SECONDS = Histogram(
+    "calmate_chat_stage_seconds", "Time per /chat pipeline node", ["stage"])
+HTTP_REQUEST_SECONDS = Histogram(
+    "calmate_http_request_seconds", "Time to produce an HTTP response (streamed bodies excluded)",
+    ["method", "route", "status"])
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "calmate_http_requests_in_flight", "HTTP requests being handled")
+
+
+def _api_attributes(request, response) -> Dict[str, Any]:
+    """Time range and result count of a Calendar API request, for its trace span"""
+    attributes: Dict[str, Any] = {}
+    query = parse_qs(urlparse(getattr(request, "uri", "") or "").query)
+    body = getattr(request, "body", None)
+    try:
+        body = json.loads(body) if body else {}
+    except (TypeError, ValueError):
+        body = {}
+    for key in ("timeMin", "timeMax"):
+        value = query.get(key, [None])[0] or (body.get(key) if isinstance(body, dict) else None)
+        if value:
+            attributes[key] = value
+    if isinstance(response, dict):
+        if "items" in response:
+            attributes["items"] = len(response["items"])
+        elif "calendars" in response:
+            attributes["busy"] = sum(len(c.get("busy", [])) for c in response["calendars"].values())
+    return attributes
+
+
+def execute_api(method: str, request):
+    """request.execute() for a googleapiclient request, timed into CALENDAR_API_SECONDS and traced"""
+    if not tracing_active():
+        return _execute_timed(method, request)
+    with span(f"calendar.{method}") as s:
+        response = _execute_timed(method, request)
+        s.set(**_api_attributes(request, response))
+        return response
+
+
+def _execute_timed(method: str, request):
+    started = time.perf_counter()
+    try:
+        response = request.execute()
+    except BaseException as e:
+        CALENDAR_API_SECONDS.labels(method, outcome_of(e)).observe(time.perf_counter() - started)
+        raise
+    CALENDAR_API_SECONDS.labels(method, "ok").observe(time.perf_counter() - started)
+    return response
@@ -0,0 +1,221 @@
+# nlu.py
+import copy
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import dateparser
+from dateparser.search import search_dates
+
+from src.fast_datetime import search_common_datetime
+from src.intent_model import FALLBACK_KEYWORDS, classify_intent, classify_intents, get_classifier
+from src.metrics import NLU_PARSE_SECONDS, timed
+from src.tracing import traced
+
+# Single-pass extraction of every slot the agent needs from a message. The intent
+# comes from the hashed bag-of-words model in src.intent_model; the rest from one
+# scan by _POINT_TOKENS (all patterns compiled at import). Only the free-text spans
+# (summary, attendees) use their own searches.
+
+VAGUE_PHRASES = ("next week", "someday", "later", "soon", "whenever", "some time", "not sure")
+
+# Scanned over the lower-cased message; every token starts on a word boundary, so
+# the alternation is only tried there. Timezones need the original case and are
+# searched separately, only when the message contains a "/"
+_POINT_TOKENS = re.compile(
+    r"\b(?:(?P<duration>(?P<amount>\d+)\s*(?P<unit>hours?|hrs?|minutes?|mins?)\b)"
+    r"|(?P<clock>\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|\d{1,2}:\d{2}\b)"
+    r"|(?P<vague>" + "|".join(re.escape(p) for p in VAGUE_PHRASES) + r")"
+    r"|(?P<last>last\b)|(?P<next>next\b)|(?P<pronoun>(?:it|that|this)\b))"
+)
+_TIMEZONE = re.compile(r"\b[A-Za-z]+/[A-Za-z_]+")
+_TITLED = re.compile(r"titled\s+['\"]([^'\"]+)['\"]", re.IGNORECASE)
+_SUMMARY = re.compile(r"\bfor ([^,\\.;]+)", re.IGNORECASE)
+_ATTENDEES = re.compile(r"with ([A-Za-z ,and]+)", re.IGNORECASE)
+_ATTENDEE_SPLIT = re.compile(r",| and ")
+_REFERENCE_SUMMARY = re.compile(r"(event|call|appointment) (about|on|for) ([^,\\.]+)", re.IGNORECASE)
+# The words a cancel/edit verb is applied to, up to a preposition or time word:
+# "cancel the design review tomorrow" -> "the design review"
+_REFERENCE_PHRASE = re.compile(
+    r"\b(?:" + "|".join(FALLBACK_KEYWORDS["cancel"] + FALLBACK_KEYWORDS["edit"]) + r")\s+"
+    r"((?:(?!(?:to|at|on|for|from|with|by|in|into|until|about|today|tomorrow|tonight|next|this|that"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b)[a-z0-9'&-]+\s*)+)"
+)
+# Words of such a phrase that do not name a booking
+_REFERENCE_FILLER = frozenset((
+    "the", "my", "our", "a", "an", "it", "last", "first", "upcoming", "all", "please", "one",
+    "meeting", "meetings", "event", "events", "call", "calls", "appointment", "appointments",
+    "booking", "bookings", "title", "name", "time", "date", "am", "pm",
+))
+_AMPM_TIME = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)", re.IGNORECASE)
+
+DEFAULT_DURATION = 30
+
+
+def _scan_points(lower_msg: str) -> Dict[str, Any]:
+    """One pass over the lower-cased message collecting the first duration, clock time and reference words"""
+    found: Dict[str, Any] = {}
+    for match in _POINT_TOKENS.finditer(lower_msg):
+        kind = match.lastgroup
+        if kind == "duration" and "duration" not in found:
+            amount = int(match.group("amount"))
+            found["duration"] = amount * 60 if match.group("unit").startswith("h") else amount
+        elif kind == "vague":
+            found["vague"] = True
+            if match.group(0).startswith("next"):
+                found.setdefault("next", True)
+        elif kind not in found:
+            found[kind] = match.span()
+    return found
+
+
+def _timezone(user_msg: str) -> Optional[str]:
+    if "/" not in user_msg:
+        return None
+    match = _TIMEZONE.search(user_msg)
+    return match.group(0) if match else None
+
+
+def _attendees(user_msg: str) -> List[str]:
+    match = _ATTENDEES.search(user_msg)
+    if match:
+        return [n.strip().title() for n in _ATTENDEE_SPLIT.split(match.group(1)) if n.strip()]
+    return []
+
+
+def _reference_phrase(lower_msg: str) -> Optional[str]:
+    """The booking a cancel/edit names ("cancel the standup" -> "standup"), without filler words and times"""
+    match = _REFERENCE_PHRASE.search(lower_msg)
+    if not match:
+        return None
+    words = [w for w in match.group(1).split() if w not in _REFERENCE_FILLER and not any(c.isdigit() for c in w)]
+    return " ".join(words) or None
+
+
+def _reference(user_msg: str, points: Dict[str, Any]) -> Optional[str]:
+    """
+    What a cancel/edit refers to: a named event ("the standup", "the call about
+    budget"), else a clock time, else "last", "next" or "context" (a pronoun)
+    """
+    phrase = _reference_phrase(user_msg.lower())
+    if phrase:
+        return phrase
+    summary_match = _REFERENCE_SUMMARY.search(user_msg)
+    if summary_match:
+        return summary_match.group(3).strip()
+    if "clock" in points:
+        # Spans index the lower-cased text, which has the same length for ASCII input
+        start, end = points["clock"]
+        return user_msg[start:end] if len(user_msg.lower()) == len(user_msg) else user_msg.lower()[start:end]
+    if "last" in points:
+        return "last"
+    if "next" in points:
+        return "next"
+    if "pronoun" in points:
+        return "context"
+    return None
+
+
+def _datetime(user_msg: str):
+    # Common forms are recognized without dateparser; localized to match RETURN_AS_TIMEZONE_AWARE
+    fast = search_common_datetime(user_msg)
+    found = [(fast[0], fast[1].astimezone())] if fast else \
+        search_dates(user_msg, settings={"RETURN_AS_TIMEZONE_AWARE": True, "DATE_ORDER": "DMY"})
+    if not found:
+        return None
+    dt = found[0][1]
+    # If time is missing, try to extract it manually
+    if dt.hour == 0 and dt.minute == 0:
+        time_match = _AMPM_TIME.search(user_msg)
+        if time_match:
+            hour = int(time_match.group(1))
+            minute = int(time_match.group(2) or 0)
+            ampm = time_match.group(3).lower()
+            if ampm == 'pm' and hour != 12:
+                hour += 12
+            elif ampm == 'am' and hour == 12:
+                hour = 0
+            dt = dt.replace(hour=hour, minute=minute)
+    return dt
+
+
+@traced("nlu.parse_message", lambda args, kwargs, slots: {"intent": slots["intent"]})
+@timed(NLU_PARSE_SECONDS, "parse_message")
+def parse_message(user_msg: str, context_event: Optional[Dict[str, Any]] = None,
+                  with_datetime: bool = True, intent: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract intent, datetime, duration, summary, timezone, attendees, ambiguity and
+    reference from a message in one structured result. Slots missing from the message
+    fall back to context_event (the event the conversation is about). An intent
+    already classified by the caller (see parse_messages) is used as given.
+    """
+    context_event = context_event or {}
+    lower_msg = user_msg.lower()
+    points = _scan_points(lower_msg)
+    dt = _datetime(user_msg) if with_datetime else None
+
+    titled = _TITLED.search(user_msg)
+    summary_match = titled or _SUMMARY.search(user_msg)
+    summary = summary_match.group(1).strip() if summary_match else (context_event.get("summary") or "Event")
+
+    slots = {
+        "intent": intent or classify_intent(user_msg),
+        "datetime": dt.isoformat() if dt else None,
+        "duration": points.get("duration") or context_event.get("duration") or DEFAULT_DURATION,
+        "summary": summary,
+        "timezone": _timezone(user_msg) or context_event.get("timezone") or "UTC",
+        "attendees": _attendees(user_msg) or context_event.get("attendees") or [],
+        "ambiguity": (with_datetime and dt is None) or bool(points.get("vague")),
+        "reference": _reference(user_msg, points),
+    }
+    logging.info("Parsed datetime: %s, duration: %s, timezone: %s, ambiguity: %s",
+                 dt, slots["duration"], slots["timezone"], slots["ambiguity"])
+    return slots
+
+
+@traced("nlu.parse_messages", lambda args, kwargs, results: {"messages": len(results)})
+@timed(NLU_PARSE_SECONDS, "parse_messages")
+def parse_messages(user_msgs: Sequence[str], context_events: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+                   with_datetime: bool = True) -> List[Dict[str, Any]]:
+    """parse_message for a batch: intents are classified in one vectorized call, and
+    repeated messages without a context event are parsed once"""
+    context_events = context_events or [None] * len(user_msgs)
+    intents = classify_intents(user_msgs)
+    parsed: Dict[str, Dict[str, Any]] = {}
+    results = []
+    for user_msg, context_event, intent in zip(user_msgs, context_events, intents):
+        if context_event:
+            results.append(parse_message(user_msg, context_event, with_datetime, intent))
+            continue
+        if user_msg not in parsed:
+            parsed[user_msg] = parse_message(user_msg, None, with_datetime, intent)
+        results.append(copy.deepcopy(parsed[user_msg]))
+    return results
+
+
+def warm_up():
+    """
+    Train the intent model and load dateparser's language data (several seconds on
+    first use) for both parse and search_dates, so the first message does not wait
+    """
+    get_classifier()
+    dateparser.parse("tomorrow at 3pm")
+    search_dates("book a call tomorrow at 3pm", settings={"RETURN_AS_TIMEZONE_AWARE": True, "DATE_ORDER": "DMY"})
+
+
+def extract_intent(user_msg: str) -> str:
+    """Returns one of: 'cancel', 'edit', 'book', 'list', 'check', 'help', 'unknown'"""
+    return classify_intent(user_msg)
+
+
+def extract_duration(user_msg: str) -> int:
+    """Duration in minutes, 30 if none is given"""
+    return _scan_points(user_msg.lower()).get("duration") or DEFAULT_DURATION
+
+
+def extract_attendees(user_msg: str) -> List[str]:
+    return _attendees(user_msg)
+
+
+def extract_reference(user_msg: str) -> Optional[str]:
+    return _reference(user_msg, _scan_points(user_msg.lower()))
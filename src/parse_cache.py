@@ -0,0 +1,117 @@
+# parse_cache.py
+import copy
+import datetime
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+# A clock time or absolute date pins the parse to the calendar day. Without one,
+# dateparser fills in the current time ("tomorrow" -> tomorrow at the current time),
+# and offsets such as "in 2 hours" move every minute, so those parses are not cached.
+_CLOCK_TIME = re.compile(r"\d{1,2}:\d{2}|\b\d{1,2}\s*(?:am|pm)\b|\bnoon\b|\bmidnight\b", re.I)
+_DATE_ONLY = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+_RELATIVE_OFFSET = re.compile(r"\bnow\b|\bago\b|\bin\s+(?:a|an|\d+)\s+(?:sec|min|hour|hr|day|week)", re.I)
+_DATE_WORDS = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|next|last|this|mon|tue|wed|thu|fri|sat|sun|"
+    r"jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Trim and collapse whitespace; the parse is run on this form so cached and fresh results agree"""
+    return _WHITESPACE.sub(" ", message).strip()
+
+
+def fingerprint(value: Any) -> str:
+    """Stable key for a context event (or any JSON-like value)"""
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def is_time_stable(message: str) -> bool:
+    """True if parsing message gives the same answer all day"""
+    if _RELATIVE_OFFSET.search(message):
+        return False
+    return bool(_CLOCK_TIME.search(message) or _DATE_ONLY.search(message)) or not _mentions_date(message)
+
+
+def _mentions_date(message: str) -> bool:
+    return bool(_DATE_WORDS.search(message) or re.search(r"\d", message))
+
+
+class ParseCache:
+    """
+    LRU + TTL cache for message parsing, keyed on (function, normalized message,
+    day bucket, fingerprint of the other arguments). Messages whose parse depends
+    on the time of day (see is_time_stable) bypass the cache.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600,
+                 clock: Callable[[], float] = time.monotonic,
+                 today: Callable[[], datetime.date] = datetime.date.today):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._today = today
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def memoize(self, fn: Callable) -> Callable:
+        """Decorate fn(message, *args, **kwargs) so repeated parses are served from the cache"""
+        @functools.wraps(fn)
+        def wrapper(message, *args, **kwargs):
+            message = normalize_message(message)
+            if not is_time_stable(message):
+                with self._lock:
+                    self.bypasses += 1
+                return fn(message, *args, **kwargs)
+            key = (fn.__qualname__, message, self._today().isoformat(), fingerprint([args, kwargs]))
+            now = self._clock()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[0] <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                self.misses += 1
+            result = fn(message, *args, **kwargs)
+            with self._lock:
+                self._entries[key] = (now, copy.deepcopy(result))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return result
+
+        wrapper.cache = self
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+parse_cache = ParseCache(
+    max_entries=int(os.getenv("PARSE_CACHE_SIZE", "2048")),
+    ttl_seconds=float(os.getenv("PARSE_CACHE_TTL", "3600")),
+)
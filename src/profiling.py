@@ -0,0 +1,196 @@
+# profiling.py
+import cProfile
+import collections
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Opt-in profiling of single requests. A request is profiled when it sends
+# X-Profile (and PROFILE_TOKEN, if set, as X-Profile-Token) or is picked by
+# PROFILE_SAMPLE_RATE. Profiles are written to PROFILE_DIR, keeping the newest
+# PROFILE_KEEP files. One request is profiled at a time; others run unprofiled.
+# /debug/profiles (and /debug/traces) need X-Profile-Token when PROFILE_TOKEN is
+# set; without it they only answer requests from localhost.
+#
+# Modes (the X-Profile value; sampled requests use PROFILE_MODE):
+#   sample   - a thread samples every thread's stack each PROFILE_INTERVAL_MS and
+#              writes collapsed stacks (flamegraph.pl / speedscope input). Sees the
+#              calendar, db and nlu pools, and any other request running meanwhile.
+#   cprofile - cProfile on the event loop thread, written as pstats. Deterministic,
+#              but work handed to the pools shows up only as the await.
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+
+MODES = {"sample": ".collapsed", "cprofile": ".pstats"}
+
+# Leaf frames of threads that are parked, left out of samples (a pool worker
+# waiting for work blocks in C, so its own loop is the leaf)
+_IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"), ("thread.py", "_worker")}
+
+
+class StackSampler:
+    """Counts collapsed stacks of every other thread, sampled on a background thread"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: "collections.Counter[str]" = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _collapse(frame)
+                if stack:
+                    self.stacks[f"{names.get(ident, ident)};{stack}"] += 1
+            self.samples += 1
+            self._stop.wait(self.interval_seconds)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _collapse(frame) -> Optional[str]:
+    leaf = frame.f_code
+    if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+        return None
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profiler:
+    """Decides which requests to profile, runs the profiler and keeps the on-disk ring"""
+
+    def __init__(self, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, default_mode: str = PROFILE_MODE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, token: Optional[str] = PROFILE_TOKEN):
+        self.directory = directory
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.default_mode = default_mode if default_mode in MODES else "sample"
+        self.interval_seconds = interval_ms / 1000
+        self.token = token
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._recent: "collections.deque[Dict[str, Any]]" = collections.deque(maxlen=keep)
+        self.skipped = 0
+
+    def mode_for(self, headers) -> Optional[str]:
+        """The mode to profile a request with, or None to run it unprofiled"""
+        requested = headers.get("x-profile")
+        if requested:
+            if self.token and headers.get("x-profile-token") != self.token:
+                return None
+            return requested if requested in MODES else self.default_mode
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.default_mode
+        return None
+
+    def begin(self, mode: str):
+        """Start profiling; returns a handle for finish(), or None if another request holds the profiler"""
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        try:
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                profiler = StackSampler(self.interval_seconds)
+                profiler.start()
+        except BaseException:
+            self._busy.release()
+            raise
+        return mode, profiler, time.perf_counter()
+
+    def finish(self, handle, method: str, path: str, status: int) -> Dict[str, Any]:
+        """Stop the profiler, write its file into the ring and return the profile's record"""
+        mode, profiler, started = handle
+        try:
+            if mode == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+        finally:
+            self._busy.release()
+        elapsed_ms = (time.perf_counter() - started) * 1e3
+
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        name = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}-{slug}{MODES[mode]}"
+        file_path = os.path.join(self.directory, name)
+        if mode == "cprofile":
+            profiler.dump_stats(file_path)
+        else:
+            with open(file_path, "w") as f:
+                f.write(profiler.collapsed())
+
+        record = {
+            "name": name,
+            "mode": mode,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(elapsed_ms, 3),
+            "created": time.time(),
+            "bytes": os.path.getsize(file_path),
+        }
+        if mode == "sample":
+            record["samples"] = profiler.samples
+        with self._lock:
+            self._recent.appendleft(record)
+        self._prune()
+        return record
+
+    def _prune(self):
+        """Delete the oldest profile files beyond keep"""
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.endswith(tuple(MODES.values())))
+        except FileNotFoundError:
+            return
+        for name in names[:-self.keep] if self.keep else names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Records of profiles still on disk, newest first"""
+        with self._lock:
+            return [r for r in self._recent if os.path.exists(os.path.join(self.directory, r["name"]))]
+
+    def path_of(self, name: str) -> Optional[str]:
+        """Path of a profile in the ring, or None; names are only looked up, never joined blindly"""
+        with self._lock:
+            known = any(r["name"] == name for r in self._recent)
+        file_path = os.path.join(self.directory, name)
+        return file_path if known and os.path.exists(file_path) else None
+
+
+profiler = Profiler()
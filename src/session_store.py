@@ -0,0 +1,160 @@
+# session_store.py
+import copy
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from src import database
+
+# Server-side conversation state keyed by session id: the structured context event
+# (what "it" / "that" refers to) and a bounded window of recent messages. /chat reads
+# and writes one session per turn instead of rescanning the client's full history.
+# Both backends expire sessions idle longer than ttl_seconds and evict the least
+# recently used ones beyond max_sessions.
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _new_session(session_id: str) -> Dict[str, Any]:
+    return {"session_id": session_id, "context_event": None, "messages": [], "updated_at": None}
+
+
+class MemorySessionStore:
+    """Sessions in an OrderedDict, most recently used last"""
+
+    blocking = False  # cheap enough to call on the event loop
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl_seconds: float = SESSION_TTL,
+                 max_messages: int = SESSION_MAX_MESSAGES, clock: Callable[[], float] = time.time):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the session, or None if it is unknown or expired"""
+        now = self._clock()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session["updated_at"] > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return copy.deepcopy(session)
+
+    def record_turn(self, session_id: str, messages: List[Dict[str, Any]],
+                    context_event: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Append messages to the session's window and replace its context event when one is given"""
+        now = self._clock()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or now - session["updated_at"] > self.ttl_seconds:
+                session = _new_session(session_id)
+            session["messages"] = (session["messages"] + list(messages))[-self.max_messages:]
+            if context_event is not None:
+                session["context_event"] = context_event
+            session["updated_at"] = now
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            return copy.deepcopy(session)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in the sessions table, so they survive restarts and are shared by
+    worker processes. Expired and least recently used rows are purged every
+    purge_every turns rather than on each write.
+    """
+
+    blocking = True  # run on the db pool
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl_seconds: float = SESSION_TTL,
+                 max_messages: int = SESSION_MAX_MESSAGES, clock: Callable[[], float] = time.time,
+                 purge_every: int = 100):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.purge_every = purge_every
+        self._clock = clock
+        self._turns = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = database.load_session(session_id)
+        if session is None or self._clock() - session["updated_at"] > self.ttl_seconds:
+            return None
+        return session
+
+    def record_turn(self, session_id: str, messages: List[Dict[str, Any]],
+                    context_event: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        session = self.get(session_id) or _new_session(session_id)
+        session["messages"] = (session["messages"] + list(messages))[-self.max_messages:]
+        if context_event is not None:
+            session["context_event"] = context_event
+        session["updated_at"] = self._clock()
+        database.save_session(session_id, session["context_event"], session["messages"], session["updated_at"])
+        with self._lock:
+            self._turns += 1
+            purge = self._turns % self.purge_every == 0
+        if purge:
+            self.purge()
+        return session
+
+    def purge(self) -> int:
+        removed = database.purge_sessions(self._clock() - self.ttl_seconds, self.max_sessions)
+        self.evictions += removed
+        return removed
+
+    def delete(self, session_id: str) -> bool:
+        return database.delete_session(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "sessions": database.count_sessions(),
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+        }
+
+
+def create_session_store(backend: Optional[str] = None):
+    """Store for SESSION_STORE ('memory', the default, or 'sqlite')"""
+    backend = (backend or os.getenv("SESSION_STORE", "memory")).lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown session store backend: {backend}")
@@ -0,0 +1,291 @@
+# tracing.py
+import collections
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# In-process request tracing. The HTTP middleware in src.main opens a trace per
+# request; spans opened while it is current (on the event loop, or on a pool
+# thread via run_blocking, which carries the context over) join it as children of
+# the innermost open span. Outside a trace span() costs one ContextVar lookup.
+# Finished traces go to an in-memory ring (GET /debug/traces) and, with
+# TRACE_FILE set, are appended to that file as JSON lines by a writer thread.
+# A trace's critical path is worked out when it is read or written, not when
+# the request ends.
+# TRACE_SAMPLE_RATE traces a fraction of requests; X-Trace or a traceparent
+# header always traces one.
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_RING_SIZE = int(os.getenv("TRACE_RING_SIZE", "200"))
+TRACE_FILE = os.getenv("TRACE_FILE")
+# Spans kept per trace; a large /chat/batch stops recording beyond this
+MAX_SPANS_PER_TRACE = int(os.getenv("TRACE_MAX_SPANS", "2000"))
+
+# Timestamps of spans on different threads can be this far out of order
+CLOCK_SLACK_MS = 0.1
+
+# W3C traceparent: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("calmate_span", default=None)
+
+
+class Trace:
+    def __init__(self, trace_id: str, remote_parent: Optional[str] = None):
+        self.trace_id = trace_id
+        self.remote_parent = remote_parent
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> bool:
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped += 1
+                return False
+            self.spans.append(span)
+            return True
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes", "status", "thread")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.thread = threading.current_thread().name
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.time()
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - origin) * 1e3, 3),
+            "duration_ms": round((end - self.start) * 1e3, 3),
+            "status": self.status,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span outside a trace"""
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace.trace_id if span is not None else None
+
+
+def tracing_active() -> bool:
+    return _current.get() is not None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """A child span of the current one; a no-op when no trace is active"""
+    parent = _current.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    if not parent.trace.add(child):
+        yield NOOP_SPAN
+        return
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        child.end = time.time()
+        _current.reset(token)
+
+
+def traced(name: str, describe: Optional[Callable[[tuple, dict, Any], Dict[str, Any]]] = None):
+    """
+    Decorator running each call in a span. describe(args, kwargs, result), if
+    given, returns attributes for the span; it only runs inside a trace.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(name) as s:
+                result = fn(*args, **kwargs)
+                if describe is not None:
+                    s.set(**describe(args, kwargs, result))
+                return result
+        return call
+    return decorate
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[str]:
+    """
+    Names of the spans the request waited on, in order. Walking back from a span's
+    end, its chain is the child that finished last, then the latest-ending child
+    that finished before that one started, and so on; each child on the chain is
+    expanded the same way. A slow early step is on the path, not only the last one.
+    Children are sorted by end once per parent, so a trace costs O(n log n).
+    """
+    children: Dict[Optional[str], List[Dict[str, Any]]] = collections.defaultdict(list)
+    for s in spans:
+        children[s["parent_id"]].append(s)
+
+    def end(s):
+        return s["start_ms"] + s["duration_ms"]
+
+    def walk(s):
+        chain, limit = [], end(s) + CLOCK_SLACK_MS
+        # Latest-ending first; the limit only moves back, so one pass finds the chain
+        for child in sorted(children.get(s["span_id"], []), key=end, reverse=True):
+            if end(child) <= limit:
+                chain.append(child)
+                limit = min(limit, child["start_ms"] + CLOCK_SLACK_MS)
+        path = [s["name"]]
+        for child in reversed(chain):
+            path.extend(walk(child))
+        return path
+
+    ids = {s["span_id"] for s in spans}
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    return walk(max(roots, key=end)) if roots else []
+
+
+def _with_critical_path(record: Dict[str, Any]) -> Dict[str, Any]:
+    """record with its critical path filled in; computed on first read, off the request path"""
+    if "critical_path" not in record:
+        record["critical_path"] = critical_path(record["spans"])
+    return record
+
+
+class Tracer:
+    """Starts request traces and keeps the finished ones"""
+
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, ring_size: int = TRACE_RING_SIZE,
+                 export_path: Optional[str] = TRACE_FILE):
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self._ring: "collections.deque[Dict[str, Any]]" = collections.deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        # Records waiting for the writer thread, so the event loop never touches the file
+        self._pending: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    def should_trace(self, headers) -> bool:
+        if headers.get("x-trace") or headers.get("traceparent"):
+            return True
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Root span of a new trace, made current; the trace is exported when it closes"""
+        match = _TRACEPARENT.match(traceparent or "")
+        trace = Trace(match.group(1) if match else uuid.uuid4().hex, match.group(2) if match else None)
+        root = Span(trace, name, None, attributes)
+        trace.add(root)
+        token = _current.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            root.end = time.time()
+            _current.reset(token)
+            self._export(trace)
+
+    def _export(self, trace: Trace):
+        root = trace.spans[0]
+        spans = [s.to_dict(root.start) for s in list(trace.spans)]
+        record = {
+            "trace_id": trace.trace_id,
+            "remote_parent": trace.remote_parent,
+            "name": root.name,
+            "start": root.start,
+            "duration_ms": spans[0]["duration_ms"],
+            "status": root.status,
+            "span_count": len(spans),
+            "dropped_spans": trace.dropped,
+            "spans": spans,  # critical_path is added when the record is first read or written
+        }
+        with self._lock:
+            self._ring.append(record)
+            if self.export_path and self._writer is None:
+                self._writer = threading.Thread(target=self._write_exports, name="trace-export", daemon=True)
+                self._writer.start()
+        if self.export_path:
+            self._pending.put(record)
+
+    def _write_exports(self):
+        """Writer thread: append queued records to export_path until close() sends None"""
+        while True:
+            records = [self._pending.get()]
+            while not self._pending.empty():
+                records.append(self._pending.get())
+            lines = [json.dumps(_with_critical_path(record), default=str) + "\n"
+                     for record in records if record is not None]
+            try:
+                with open(self.export_path, "a") as f:
+                    f.writelines(lines)
+            except OSError as e:
+                logging.error(f"Failed to export traces to {self.export_path}: {str(e)}")
+            if None in records:
+                return
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued exports and stop the writer thread"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._pending.put(None)
+            writer.join(timeout)
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """Summaries of finished traces, newest first"""
+        with self._lock:
+            records = list(self._ring)
+        summaries = []
+        for record in reversed(records):
+            if record["duration_ms"] < min_duration_ms:
+                continue
+            summaries.append({k: v for k, v in _with_critical_path(record).items() if k != "spans"})
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            found = next((record for record in reversed(self._ring) if record["trace_id"] == trace_id), None)
+        return _with_critical_path(found) if found is not None else None
+
+
+tracer = Tracer()
@@ -2,53 +2,10 @@ import re
 import dateparser
 import pytz
 from datetime import datetime, timedelta
+from dateparser.search import search_dates
 
-
-def extract_intent(user_msg):
-    """
-    Extracts the intent from the user's message.
-    Returns one of: 'book', 'cancel', 'edit', 'list', 'help'
-    """
-    lower_msg = user_msg.lower()
-    
-    if any(word in lower_msg for word in ['book', 'schedule', 'create', 'add', 'make']):
-        return 'book'
-    elif any(word in lower_msg for word in ['cancel', 'delete', 'remove']):
-        return 'cancel'
-    elif any(word in lower_msg for word in ['edit', 'change', 'modify']):
-        return 'edit'
-    elif any(word in lower_msg for word in ['list', 'show', 'view']):
-        return 'list'
-    else:
-        return 'help'
-
-
-def extract_attendees(user_msg):
-    """
-    Extracts attendees from the user's message.
-    """
-    # Simple pattern to extract names after "with" or "and"
-    attendees = []
-    words = user_msg.lower().split()
-    
-    for i, word in enumerate(words):
-        if word in ['with', 'and']:
-            # Take the next word as attendee
-            if i + 1 < len(words):
-                attendees.append(words[i + 1])
-                
-    return attendees
-
-
-def extract_reference(user_msg):
-    """
-    Extracts a reference number from the user's message.
-    """
-    # Look for numbers that could be reference numbers
-    numbers = re.findall(r'\b\d{3,}\b', user_msg)
-    if numbers:
-        return numbers[0]
-    return None
+# Message parsing lives in src.nlu; these names are kept for existing importers
+from src.nlu import extract_intent, extract_attendees, extract_reference
 
 
 def extract_slots(user_msg, context_event=None):
@@ -0,0 +1,81 @@
+# conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.fake_calendar import ApiError, FakeCalendar
+from src import database
+
+# src.main creates its tables on import; point it at a scratch file so tests never touch bookings.db
+database.DB_FILE = os.path.join(tempfile.mkdtemp(prefix="calmate-tests-"), "bookings.db")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """src.database on a fresh, initialized database file"""
+    database.close_connections()
+    database.DB_FILE = str(tmp_path / "bookings.db")
+    database.init_db()
+    yield database
+    database.close_connections()
+
+
+class _FakeRequest:
+    """A googleapiclient request stand-in; FakeCalendar errors surface as HttpError"""
+
+    def __init__(self, call):
+        self._call = call
+
+    def execute(self):
+        try:
+            return self._call()
+        except ApiError as e:
+            raise HttpError(Response({"status": e.status}), str(e).encode())
+
+
+class _FakeEvents:
+    def __init__(self, calendar):
+        self._calendar = calendar
+        self.requests = []
+
+    def list(self, calendarId, **params):
+        self.requests.append(params)
+        query = {k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in params.items()}
+        return _FakeRequest(lambda: self._calendar.list(calendarId, query))
+
+    def insert(self, calendarId, body):
+        return _FakeRequest(lambda: self._calendar.insert(calendarId, body))
+
+    def update(self, calendarId, eventId, body):
+        return _FakeRequest(lambda: self._calendar.update(calendarId, eventId, body))
+
+    def delete(self, calendarId, eventId):
+        return _FakeRequest(lambda: self._calendar.delete(calendarId, eventId))
+
+
+class FakeService:
+    """The slice of the Calendar API client CalMate calls, backed by benchmarks.fake_calendar.FakeCalendar"""
+
+    def __init__(self, calendar):
+        self.calendar = calendar
+        self._events = _FakeEvents(calendar)
+
+    def events(self):
+        return self._events
+
+    @property
+    def list_requests(self):
+        return self._events.requests
+
+
+@pytest.fixture
+def fake_service():
+    return FakeService(FakeCalendar())
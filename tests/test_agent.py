@@ -0,0 +1,50 @@
+# test_agent.py
+import asyncio
+
+import httpx
+
+from src.agent import extract_slots, reply_for, resolve_booking
+from src.main import app
+
+SLOT = "2030-01-02T14:30:00"
+
+
+async def _post_all(path, bodies):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.post(path, json=body) for body in bodies))
+    return [r.json() for r in responses]
+
+
+def test_concurrent_bookings_of_one_slot_store_one(db):
+    """Overlap check and insert share a transaction, so only one of many simultaneous bookings lands"""
+    replies = asyncio.run(_post_all("/chat", [{"message": f"book standup on {SLOT}"}] * 8))
+    assert len(db.list_bookings()) == 1
+    booked = [r for r in replies if "booked" in r["response"]]
+    busy = [r for r in replies if r["response"].startswith("You already have an event")]
+    assert len(booked) == 1 and len(busy) == 7
+
+
+def test_edit_into_a_booked_slot_is_refused(db):
+    db.save_booking("Standup", "evt_1", "2030-01-02T14:30:00", "2030-01-02T15:00:00", "UTC")
+    moved = db.save_booking("Retro", "evt_2", "2030-01-02T16:00:00", "2030-01-02T16:30:00", "UTC")
+    try:
+        db.update_booking(moved, "Retro", "2030-01-02T14:45:00", "2030-01-02T15:15:00", "UTC")
+    except db.BookingConflict as e:
+        assert e.booking_ids == [1]
+    else:
+        raise AssertionError("update_booking accepted an overlapping time")
+    # Moving a booking within its own old time is not a conflict
+    assert db.update_booking(moved, "Retro", "2030-01-02T16:15:00", "2030-01-02T16:45:00", "UTC")
+
+
+
+def test_cancel_with_a_stale_lookup_resolves_again(db):
+    """Two turns that looked up the same booking before either cancelled must not both report it"""
+    for i, summary in enumerate(["A", "B", "C"]):
+        db.save_booking(summary, f"evt_{i}", f"2030-01-0{i + 1}T09:00:00", f"2030-01-0{i + 1}T09:30:00", "UTC")
+    slots = extract_slots("cancel my last meeting")
+    looked_up = [resolve_booking(slots), resolve_booking(slots)]
+    replies = [reply_for("cancel my last meeting", slots, booking)["response"] for booking in looked_up]
+    assert replies == ["Cancelled event: 'C' at 2030-01-03T09:00:00", "Cancelled event: 'B' at 2030-01-02T09:00:00"]
+    assert [b[1] for b in db.list_bookings()] == ["A"]
@@ -0,0 +1,102 @@
+# test_bookings_paging.py
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+# Several bookings share a start time, so pages must break ties on id
+STARTS = ["2030-01-02T09:00:00", "2030-01-02T10:00:00", "2030-01-02T10:00:00", "2030-01-02T10:00:00",
+          "2030-01-02T11:00:00", "2030-01-03T09:00:00", "2030-01-03T09:00:00"]
+
+
+def _seed(db, starts=STARTS):
+    ids = []
+    for n, start in enumerate(starts):
+        end = start[:11] + f"{int(start[11:13]) + 1:02d}" + start[13:]
+        ids.append(db.save_booking(f"Meeting {n}", f"evt_{n}", start, end, "UTC", allow_overlap=True))
+    return ids
+
+
+def _all_pages(db, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = db.list_bookings_page(cursor=cursor, limit=limit, **kwargs)
+        pages.append([row[0] for row in rows])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 50])
+def test_pages_cover_every_booking_once_in_start_order(db, limit):
+    ids = _seed(db)
+    pages = _all_pages(db, limit)
+
+    assert [i for page in pages for i in page] == ids
+    assert all(len(page) == limit for page in pages[:-1])
+    # The look-ahead row means an exact multiple ends without an empty trailing page
+    assert pages[-1]
+
+
+def test_cursor_skips_bookings_inserted_before_it(db):
+    _seed(db)
+    rows, cursor = db.list_bookings_page(limit=3)
+    early = db.save_booking("Early", "evt_early", "2030-01-01T08:00:00", "2030-01-01T09:00:00", "UTC")
+    late = db.save_booking("Late", "evt_late", "2030-01-04T08:00:00", "2030-01-04T09:00:00", "UTC")
+
+    rest = [row[0] for row in db.iter_bookings(cursor=cursor, page_size=2)]
+    assert early not in rest and rest[-1] == late
+    assert not set(rest) & {row[0] for row in rows}
+
+
+def test_range_and_status_filters(db):
+    ids = _seed(db)
+    db.cancel_booking(ids[1])
+
+    between = [row[0] for row in db.iter_bookings(start="2030-01-02T10:30:00", end="2030-01-03T00:00:00",
+                                                  page_size=1)]
+    assert between == [ids[2], ids[3], ids[4]]
+    assert [row[0] for row in db.iter_bookings(status="cancelled")] == [ids[1]]
+
+
+def test_limit_is_clamped_and_bad_cursors_raise(db):
+    _seed(db, ["2030-01-02T09:00:00"] * 3)
+    assert len(db.list_bookings_page(limit=0)[0]) == 1
+    assert len(db.list_bookings_page(limit=db.MAX_PAGE_SIZE + 1)[0]) == 3
+    assert db.decode_cursor(db.encode_cursor(1893574800, 12)) == (1893574800, 12)
+    with pytest.raises(ValueError):
+        db.list_bookings_page(cursor="not-a-cursor")
+
+
+def test_bookings_endpoint_pages_with_next_cursor(db):
+    ids = _seed(db)
+    client = TestClient(app)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/bookings", params=params).json()
+        seen += [booking["id"] for booking in body["bookings"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ids
+    assert client.get("/bookings", params={"cursor": "x:y"}).status_code == 400
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "sse"])
+def test_stream_endpoint_yields_every_booking(db, fmt):
+    ids = _seed(db)
+    response = TestClient(app).get("/bookings/stream", params={"format": fmt})
+
+    if fmt == "ndjson":
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+    else:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = response.text.strip().split("\n\n")
+        assert events[-1] == "event: end\ndata: {}"
+        records = [json.loads(event[len("data: "):]) for event in events[:-1]]
+    assert [record["id"] for record in records] == ids
+    assert records[0]["summary"] == "Meeting 0"
@@ -0,0 +1,140 @@
+# test_calendar_cache.py
+import datetime
+
+from src.calendar_cache import RangeCache, busy_in_range, events_in_range
+from src.calendar_utils import GoogleCalendarUtils
+
+UTC = datetime.timezone.utc
+DAY = datetime.datetime(2025, 3, 10, tzinfo=UTC)
+SCOPE = ('events', 'primary')
+
+
+def _at(hours):
+    return DAY + datetime.timedelta(hours=hours)
+
+
+def _event(event_id, start_hours, end_hours):
+    return {"id": event_id, "start": {"dateTime": _at(start_hours).isoformat()},
+            "end": {"dateTime": _at(end_hours).isoformat()}}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_covering_entry_serves_narrower_ranges():
+    cache = RangeCache()
+    events = [_event("a", 9, 10), _event("b", 14, 15)]
+    cache.put(SCOPE, _at(0), _at(24), events)
+
+    assert cache.get(SCOPE, _at(0), _at(24), events_in_range) is events
+    assert [e["id"] for e in cache.get(SCOPE, _at(13), _at(16), events_in_range)] == ["b"]
+    assert cache.get(SCOPE, _at(10), _at(14), events_in_range) == []
+    assert cache.get(SCOPE, _at(20), _at(25), events_in_range) is None
+    assert cache.get(('events', 'other'), _at(9), _at(10), events_in_range) is None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_smallest_covering_entry_wins():
+    cache = RangeCache()
+    cache.put(SCOPE, _at(0), _at(48), [_event("wide", 9, 10)])
+    cache.put(SCOPE, _at(8), _at(12), [_event("narrow", 9, 10)])
+
+    assert [e["id"] for e in cache.get(SCOPE, _at(9), _at(10), events_in_range)] == ["narrow"]
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = RangeCache(ttl_seconds=60, clock=clock)
+    cache.put(SCOPE, _at(0), _at(24), [])
+
+    clock.now = 60
+    assert cache.get(SCOPE, _at(0), _at(24), events_in_range) == []
+    clock.now = 61
+    assert cache.get(SCOPE, _at(0), _at(24), events_in_range) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RangeCache(max_entries=2)
+    cache.put(SCOPE, _at(0), _at(1), ["first"])
+    cache.put(SCOPE, _at(1), _at(2), ["second"])
+    cache.get(SCOPE, _at(0), _at(1), events_in_range)
+    cache.put(SCOPE, _at(2), _at(3), ["third"])
+
+    assert cache.get(SCOPE, _at(0), _at(1), events_in_range) == ["first"]
+    assert cache.get(SCOPE, _at(1), _at(2), events_in_range) is None
+    assert cache.evictions == 1
+
+
+def test_invalidate_drops_only_overlapping_ranges_of_that_calendar():
+    cache = RangeCache()
+    cache.put(SCOPE, _at(0), _at(12), [])
+    cache.put(SCOPE, _at(12), _at(24), [])
+    cache.put(('freebusy', 'primary', 'UTC'), _at(0), _at(24), [])
+    cache.put(('events', 'team'), _at(0), _at(24), [])
+
+    # Half-open: a write in [12, 13) does not touch the range ending at 12
+    cache.invalidate('primary', _at(12), _at(13))
+
+    assert cache.get(SCOPE, _at(0), _at(12), events_in_range) == []
+    assert cache.get(SCOPE, _at(12), _at(24), events_in_range) is None
+    assert cache.get(('freebusy', 'primary', 'UTC'), _at(0), _at(24), busy_in_range) is None
+    assert cache.get(('events', 'team'), _at(0), _at(24), events_in_range) == []
+    assert cache.invalidations == 2
+
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+
+
+def test_busy_in_range_clips_to_the_lookup():
+    busy = [(_at(8), _at(10)), (_at(11), _at(12)), (_at(15), _at(16))]
+    lo, hi = _at(9).timestamp(), _at(11.5).timestamp()
+    assert busy_in_range(busy, lo, hi) == [(_at(9), _at(10)), (_at(11), _at(11.5))]
+
+    naive = [(s.replace(tzinfo=None), e.replace(tzinfo=None)) for s, e in busy]
+    assert busy_in_range(naive, lo, hi) == [(_at(9).replace(tzinfo=None), _at(10).replace(tzinfo=None)),
+                                            (_at(11).replace(tzinfo=None), _at(11.5).replace(tzinfo=None))]
+
+
+def _calendar(fake_service):
+    utils = GoogleCalendarUtils()
+    utils.service = fake_service
+    return utils
+
+
+def _body(summary, start_hours, end_hours):
+    return {"summary": summary, "start": {"dateTime": _at(start_hours).isoformat()},
+            "end": {"dateTime": _at(end_hours).isoformat()}}
+
+
+def test_reads_within_a_cached_range_skip_the_api(fake_service):
+    utils = _calendar(fake_service)
+    fake_service.calendar.insert("primary", _body("Standup", 9, 10))
+    day = _at(0).replace(tzinfo=None), _at(24).replace(tzinfo=None)
+
+    assert [e["summary"] for e in utils.get_calendar_events(*day)] == ["Standup"]
+    assert [e["summary"] for e in utils.get_calendar_events(_at(8).replace(tzinfo=None),
+                                                            _at(12).replace(tzinfo=None))] == ["Standup"]
+    assert len(fake_service.list_requests) == 1
+
+
+def test_own_writes_invalidate_the_ranges_they_touch(fake_service):
+    utils = _calendar(fake_service)
+    day = _at(0).replace(tzinfo=None), _at(24).replace(tzinfo=None)
+    next_day = _at(24).replace(tzinfo=None), _at(48).replace(tzinfo=None)
+    utils.get_calendar_events(*day)
+    utils.get_calendar_events(*next_day)
+
+    created = utils.create_event(_body("Review", 14, 15))
+    assert [e["summary"] for e in utils.get_calendar_events(*day)] == ["Review"]
+    utils.get_calendar_events(*next_day)
+    assert len(fake_service.list_requests) == 3
+
+    assert utils.delete_event(created["id"])
+    assert utils.get_calendar_events(*day) == []
+    assert len(fake_service.list_requests) == 4
@@ -0,0 +1,125 @@
+# test_calendar_sync.py
+import datetime
+
+from benchmarks.fake_calendar import ApiError
+from src import calendar_sync
+from src.calendar_sync import CalendarMirror
+from src.calendar_utils import GoogleCalendarUtils
+
+UTC = datetime.timezone.utc
+DAY = datetime.datetime(2025, 3, 10, tzinfo=UTC)
+
+
+def _at(hours):
+    return DAY + datetime.timedelta(hours=hours)
+
+
+def _body(summary, start_hours, end_hours):
+    return {"summary": summary, "start": {"dateTime": _at(start_hours).isoformat()},
+            "end": {"dateTime": _at(end_hours).isoformat()}}
+
+
+def _mirror(fake_service):
+    utils = GoogleCalendarUtils()
+    utils.service = fake_service
+    return CalendarMirror(utils)
+
+
+def _summaries(mirror):
+    return sorted(e["summary"] for e in mirror.events_between(_at(0), _at(48)))
+
+
+def test_first_sync_is_full_and_later_syncs_send_the_token(db, fake_service):
+    calendar = fake_service.calendar
+    standup = calendar.insert("primary", _body("Standup", 9, 10))
+    lunch = calendar.insert("primary", _body("Lunch", 12, 13))
+    mirror = _mirror(fake_service)
+
+    status = mirror.sync()
+    assert "syncToken" not in fake_service.list_requests[0]
+    assert status["has_sync_token"] and status["fresh"] and status["last_full_sync"]
+    assert status["events"] == 2
+
+    calendar.insert("primary", _body("Review", 14, 15))
+    calendar.update("primary", standup["id"], _body("Standup (moved)", 10, 11))
+    calendar.delete("primary", lunch["id"])
+    status = mirror.sync()
+
+    assert "syncToken" in fake_service.list_requests[-1]
+    assert _summaries(mirror) == ["Review", "Standup (moved)"]
+    assert status["events"] == 2
+    assert [e["summary"] for e in mirror.events_between(_at(9), _at(10))] == []
+
+
+def test_expired_token_rebuilds_the_mirror_with_a_full_sync(db, fake_service):
+    calendar = fake_service.calendar
+    calendar.insert("primary", _body("Standup", 9, 10))
+    mirror = _mirror(fake_service)
+    mirror.sync()
+
+    # reset() starts a new generation: the stored token now gets 410 Gone
+    calendar.reset()
+    calendar.insert("primary", _body("Planning", 11, 12))
+    status = mirror.sync()
+
+    assert "syncToken" in fake_service.list_requests[-2]
+    assert "syncToken" not in fake_service.list_requests[-1]
+    assert status["last_error"] is None and status["has_sync_token"]
+    assert _summaries(mirror) == ["Planning"]
+
+
+def test_full_sync_pages_through_every_event(db, fake_service, monkeypatch):
+    monkeypatch.setattr(calendar_sync, "SYNC_PAGE_SIZE", 2)
+    for hour in range(5):
+        fake_service.calendar.insert("primary", _body(f"Event {hour}", hour, hour + 1))
+    mirror = _mirror(fake_service)
+
+    assert mirror.sync()["events"] == 5
+    assert len(fake_service.list_requests) == 3
+
+
+def test_failed_full_sync_keeps_the_previous_mirror(db, fake_service, monkeypatch):
+    monkeypatch.setattr(calendar_sync, "SYNC_PAGE_SIZE", 2)
+    calendar = fake_service.calendar
+    calendar.insert("primary", _body("Standup", 9, 10))
+    mirror = _mirror(fake_service)
+    previous = mirror.sync()
+
+    calendar.reset()
+    for hour in range(5):
+        calendar.insert("primary", _body(f"Event {hour}", hour, hour + 1))
+    list_page = calendar.list
+
+    def fail_second_page(calendar_id, query):
+        if query.get("pageToken"):
+            raise ApiError(503, "Backend Error")
+        return list_page(calendar_id, query)
+
+    monkeypatch.setattr(calendar, "list", fail_second_page)
+    status = mirror.sync()
+
+    assert status["last_error"]
+    assert status["last_full_sync"] == previous["last_full_sync"]
+    assert _summaries(mirror) == ["Standup"]
+
+
+def test_sync_drops_cached_reads(db, fake_service):
+    mirror = _mirror(fake_service)
+    utils = mirror.calendar_utils
+    day = _at(0).replace(tzinfo=None), _at(24).replace(tzinfo=None)
+    assert utils.get_calendar_events(*day) == []
+
+    mirror.sync()
+    assert utils.cache.stats()["entries"] == 0
+
+
+def test_busy_between_merges_blocking_events(db, fake_service):
+    calendar = fake_service.calendar
+    calendar.insert("primary", _body("Standup", 9, 10))
+    calendar.insert("primary", _body("Review", 9.5, 11))
+    calendar.insert("primary", dict(_body("Focus", 13, 14), transparency="transparent"))
+    calendar.insert("primary", {"summary": "Holiday", "start": {"date": "2025-03-11"}, "end": {"date": "2025-03-12"}})
+    mirror = _mirror(fake_service)
+    mirror.sync()
+
+    assert mirror.busy_between(_at(0), _at(48)) == [(_at(9), _at(11)), (_at(24), _at(48))]
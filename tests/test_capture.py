@@ -0,0 +1,41 @@
+# test_capture.py
+import json
+
+from src.capture import ChatCapture, hash_session, sanitize
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_sanitize_replaces_personal_data_but_keeps_dates():
+    text = "book with ann@example.com on 2025-03-04, call +44 20 7946 0958 or see https://x.test/a"
+    assert sanitize({"m": [text]}) == {"m": ["book with <email> on 2025-03-04, call <phone> or see <url>"]}
+
+
+def test_turns_are_written_sanitized_by_the_writer_thread(tmp_path):
+    capture = ChatCapture(str(tmp_path / "chat.jsonl"), sample_rate=1, version="abc")
+    capture.record("mail bob@example.com", "session-1", True, None, None, {"intent": "book"},
+                   {"response": "ok"}, {"parse": 1.0}, 2.5)
+    capture.close()
+    [entry] = _read(tmp_path / "chat.jsonl")
+    assert entry["message"] == "mail <email>"
+    assert entry["session"] == hash_session("session-1") != "session-1"
+    assert entry["version"] == "abc" and entry["total_ms"] == 2.5
+
+
+def test_rotation_keeps_the_configured_backups(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    capture = ChatCapture(str(path), sample_rate=1, max_bytes=300, backups=2)
+    for i in range(20):
+        capture.write({"i": i, "padding": "x" * 100})
+    capture.close()
+    files = [path.with_name("chat.jsonl.2"), path.with_name("chat.jsonl.1"), path]
+    assert not path.with_name("chat.jsonl.3").exists()
+    kept = [entry["i"] for f in files for entry in _read(f)]
+    assert kept == list(range(20 - len(kept), 20))
+    assert capture.written == 20
+
+
+def test_disabled_capture_never_samples():
+    assert not ChatCapture(None, sample_rate=1).should_capture()
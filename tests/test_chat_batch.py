@@ -0,0 +1,59 @@
+# test_chat_batch.py
+import pytest
+from fastapi.testclient import TestClient
+
+from src.chat_batch import normalize_items
+from src.main import app
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as client:
+        yield client
+
+
+def _batch(client, items):
+    response = client.post("/chat/batch", json={"items": items})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_overlapping_bookings_in_one_batch_store_one(client, db):
+    result = _batch(client, [f"book an event titled '{summary}' on 2030-01-02T{time}:00"
+                             for summary, time in [("Standup", "14:30"), ("Review", "14:30"), ("Retro", "14:45")]])
+    replies = [r["response"]["response"] for r in result["results"]]
+    assert replies[0].startswith("Event 'Standup' booked")
+    assert all(reply.startswith("You already have an event") for reply in replies[1:])
+    assert [b[1] for b in db.list_bookings()] == ["Standup"]
+
+
+def test_repeated_cancels_in_one_batch_cancel_different_bookings(client, db):
+    for i, summary in enumerate(["A", "B", "C"]):
+        db.save_booking(summary, f"evt_{i}", f"2030-01-0{i + 1}T09:00:00", f"2030-01-0{i + 1}T09:30:00", "UTC")
+    result = _batch(client, ["cancel my last meeting", "cancel my last meeting"])
+    replies = [r["response"]["response"] for r in result["results"]]
+    assert replies == ["Cancelled event: 'C' at 2030-01-03T09:00:00", "Cancelled event: 'B' at 2030-01-02T09:00:00"]
+    assert [b[1] for b in db.list_bookings()] == ["A"]
+
+
+def test_session_items_run_in_order_with_carried_context(client, db):
+    items = [{"message": "book an event titled 'Standup' on 2030-01-02T09:00:00", "session_id": "s"},
+             {"message": "what is on my calendar", "session_id": "t"},
+             {"message": "cancel it", "session_id": "s"}]
+    result = _batch(client, items)
+    assert [r["index"] for r in result["results"]] == [0, 1, 2]
+    assert result["sessions"] == 2
+    assert result["results"][2]["response"]["response"] == "Cancelled event: 'Standup' at 2030-01-02T09:00:00+00:00"
+    assert db.list_bookings() == []
+
+
+def test_empty_items_are_reported_not_run(client):
+    result = _batch(client, ["", "help"])
+    assert result["results"][0]["status"] == "error"
+    assert result["results"][1]["status"] == "ok"
+
+
+@pytest.mark.parametrize("payload", [{}, {"items": []}, {"items": [1]}, "text"])
+def test_malformed_batches_are_rejected(payload):
+    with pytest.raises(ValueError):
+        normalize_items(payload)
@@ -0,0 +1,66 @@
+# test_fast_datetime.py
+import datetime
+import os
+import sys
+
+import dateparser
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.fast_datetime import search_common_datetime
+
+NOW = datetime.datetime(2025, 6, 18, 9, 41, 7)  # a Wednesday
+
+
+@pytest.mark.parametrize("message", [
+    "Book a meeting titled 'Team Meeting' on 2025-07-03 at 14:30:00 for 30 minutes",
+    "Book a call tomorrow at 3 pm",
+    "am I free today at 16:45",
+    "tomorrow at noon works",
+    "today at midnight",
+    "move it to Monday at 2:30pm",
+    "wednesday 10am",
+    "2025-01-02T09:15:00.250",
+    "2025-03-04 07:05",
+])
+def test_matches_dateparser_on_the_recognized_span(message):
+    """The fast path reads the span it recognizes as dateparser.parse does"""
+    span, value = search_common_datetime(message, NOW)
+    assert value == dateparser.parse(span, settings={"RELATIVE_BASE": NOW})
+
+
+@pytest.mark.parametrize("message", [
+    "List my upcoming events",
+    "book a room for 20 people on friday",
+    "tomorrow at 25:00",
+    "meet on the 3rd of July",
+])
+def test_unrecognized_messages_are_left_to_dateparser(message):
+    assert search_common_datetime(message, NOW) is None
+
+
+@pytest.mark.parametrize("message", [
+    "2025-01-02T14:30:00+05:00",
+    "2025-01-02T14:30:00Z",
+    "book on 2025-01-02 at 14:30 Europe/Berlin",
+    "today at 3 pm EST",
+    "meet monday 10am PST",
+    "tomorrow at 3pm utc",
+    "tomorrow at 3pm GMT+2",
+])
+def test_offsets_and_zones_fall_back(message):
+    assert search_common_datetime(message, NOW) is None
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Book a call tomorrow at 3pm", ("tomorrow at 3pm", datetime.datetime(2025, 6, 19, 15, 0))),
+    ("on 2025-01-02 at 14:30:00 for 30 minutes", ("on 2025-01-02 at 14:30:00", datetime.datetime(2025, 1, 2, 14, 30))),
+    ("schedule standup next Monday 10am", ("next Monday 10am", datetime.datetime(2025, 6, 23, 10, 0))),
+    ("friday at 3pm - 4pm", ("friday at 3pm", datetime.datetime(2025, 6, 13, 15, 0))),
+    ("tomorrow at 3pm with Ted", ("tomorrow at 3pm", datetime.datetime(2025, 6, 19, 15, 0))),
+])
+def test_common_forms(message, expected):
+    assert search_common_datetime(message, NOW) == expected
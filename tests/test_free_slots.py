@@ -0,0 +1,88 @@
+# test_free_slots.py
+import datetime
+import random
+
+import pytest
+
+from src.availability_grid import find_slots
+from src.free_slots import iter_free_slots, merge_intervals
+
+DAY = datetime.datetime(2025, 3, 4, 8, 0)
+
+
+def _brute_force(window_start, window_end, busy, duration, step):
+    """Every step-aligned start whose slot overlaps no busy interval"""
+    duration, step = datetime.timedelta(minutes=duration), datetime.timedelta(minutes=step)
+    slots, current = [], window_start
+    while current + duration <= window_end:
+        if all(not (s < current + duration and e > current) for s, e in busy):
+            slots.append((current, current + duration))
+        current += step
+    return slots
+
+
+def _random_busy(rng, count, quarter_hours=False):
+    busy = []
+    for _ in range(count):
+        unit = 15 if quarter_hours else 1
+        start = DAY + datetime.timedelta(minutes=unit * rng.randrange(-4, 10 * 60 // unit))
+        busy.append((start, start + datetime.timedelta(minutes=unit * rng.randrange(1, 120 // unit))))
+    return busy
+
+
+def test_merge_intervals_joins_overlapping_and_touching():
+    a, b, c, d = (DAY + datetime.timedelta(hours=h) for h in range(4))
+    assert merge_intervals([(c, d), (a, b), (b, c), (d, d)]) == [(a, d)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sweep_matches_brute_force(seed):
+    rng = random.Random(seed)
+    busy = _random_busy(rng, rng.randrange(0, 12))
+    duration, step = rng.choice([15, 30, 45, 60]), rng.choice([5, 15, 30])
+    window_end = DAY + datetime.timedelta(hours=9)
+    assert list(iter_free_slots(DAY, window_end, busy, duration, step)) == \
+        _brute_force(DAY, window_end, busy, duration, step)
+
+
+def test_slots_may_end_exactly_when_busy_starts():
+    busy = [(DAY + datetime.timedelta(minutes=30), DAY + datetime.timedelta(minutes=60))]
+    slots = list(iter_free_slots(DAY, DAY + datetime.timedelta(hours=1, minutes=30), busy, 30))
+    assert slots == [(DAY, DAY + datetime.timedelta(minutes=30)),
+                     (DAY + datetime.timedelta(minutes=60), DAY + datetime.timedelta(minutes=90))]
+
+
+def test_naive_busy_times_are_utc_against_an_aware_window():
+    start = DAY.replace(tzinfo=datetime.timezone(datetime.timedelta(hours=1)))
+    busy = [(DAY - datetime.timedelta(hours=1), DAY)]  # 07:00-08:00 UTC is 08:00-09:00 at +01:00
+    first = next(iter_free_slots(start, start + datetime.timedelta(hours=3), busy, 30))
+    assert first[0] == start + datetime.timedelta(hours=1)
+
+
+def test_invalid_duration_is_rejected():
+    with pytest.raises(ValueError):
+        list(iter_free_slots(DAY, DAY + datetime.timedelta(hours=1), [], 0))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_grid_agrees_with_the_sweep_on_grid_aligned_busy_times(seed):
+    rng = random.Random(seed)
+    people = {name: _random_busy(rng, rng.randrange(0, 6), quarter_hours=True) for name in ("ann", "bob", "cy")}
+    duration = rng.choice([15, 30, 60])
+    window_end = DAY + datetime.timedelta(hours=10)
+    everyone = [interval for busy in people.values() for interval in busy]
+    assert find_slots(people, DAY, window_end, duration, granularity_minutes=15, step_minutes=15) == \
+        list(iter_free_slots(DAY, window_end, everyone, duration, step=15))
+
+
+def test_grid_rounds_unaligned_busy_times_outward():
+    busy = {"ann": [(DAY + datetime.timedelta(minutes=20), DAY + datetime.timedelta(minutes=25))]}
+    slots = find_slots(busy, DAY, DAY + datetime.timedelta(hours=1), 15, granularity_minutes=15)
+    assert [s[0] for s in slots] == [DAY, DAY + datetime.timedelta(minutes=30), DAY + datetime.timedelta(minutes=45)]
+
+
+def test_grid_any_needs_one_free_participant():
+    hour = datetime.timedelta(hours=1)
+    busy = {"ann": [(DAY, DAY + hour)], "bob": [(DAY + hour, DAY + 2 * hour)]}
+    assert find_slots(busy, DAY, DAY + 2 * hour, 60, require="all") == []
+    assert len(find_slots(busy, DAY, DAY + 2 * hour, 60, require="any")) == 2
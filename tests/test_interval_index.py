@@ -0,0 +1,67 @@
+# test_interval_index.py
+import random
+import sqlite3
+
+import pytest
+
+from src.interval_index import LONG_INTERVAL, IntervalIndex
+
+
+def _brute_force(intervals, start, end):
+    return sorted((s, e, i) for i, (s, e) in intervals.items() if s < end and e > start)
+
+
+def test_matches_brute_force_through_adds_moves_and_removes():
+    rng = random.Random(7)
+    index, intervals = IntervalIndex(), {}
+    for step in range(3000):
+        item_id = rng.randrange(300)
+        if rng.random() < 0.3:
+            assert index.remove(item_id) == (intervals.pop(item_id, None) is not None)
+        else:
+            start = rng.randrange(0, 40 * 86400, 900)
+            # Mostly short bookings, some all-day and multi-day events
+            length = rng.choice([900, 1800, 3600, 86400, 3 * 86400, 30 * 86400])
+            index.add(item_id, start, start + length)
+            intervals[item_id] = (start, start + length)
+        if step % 50 == 0:
+            start = rng.randrange(0, 40 * 86400)
+            end = start + rng.randrange(1, 2 * 86400)
+            assert index.overlapping(start, end) == [i for _, _, i in _brute_force(intervals, start, end)]
+    assert len(index) == len(intervals)
+
+
+def test_half_open_bounds():
+    index = IntervalIndex.from_intervals([(1, 100, 200), (2, 200, 300)])
+    assert index.overlapping(200, 250) == [2]
+    assert index.overlapping(50, 100) == []
+    assert index.overlapping(199, 201) == [1, 2]
+
+
+def test_removing_the_longest_interval_narrows_the_scan():
+    index = IntervalIndex()
+    index.add(1, 0, 10 * LONG_INTERVAL)
+    index.add(2, 100, 200)
+    assert index._long.max_length == 10 * LONG_INTERVAL
+    index.remove(1)
+    assert index._long.max_length == 0
+    assert index.overlapping(150, 160) == [2]
+
+
+def test_from_intervals_skips_unparsed_times():
+    index = IntervalIndex.from_intervals([(1, None, 10), (2, 0, 10)])
+    assert 1 not in index and index.overlapping(0, 5) == [2]
+
+
+def test_bookings_from_another_process_are_caught_by_the_write_check(db):
+    db.save_booking("Standup", "evt_1", "2030-01-02T09:00:00", "2030-01-02T09:30:00", "UTC")
+    assert db.find_overlapping_bookings("2030-01-02T10:00:00", "2030-01-02T10:30:00") == []
+    # Written behind the in-process index's back, as another worker would
+    with sqlite3.connect(db.DB_FILE) as other:
+        other.execute("INSERT INTO bookings (summary, start_time, end_time, status, start_epoch, end_epoch) "
+                      "VALUES ('Other', '2030-01-02T10:00:00', '2030-01-02T10:30:00', 'active', ?, ?)",
+                      (db.to_epoch("2030-01-02T10:00:00"), db.to_epoch("2030-01-02T10:30:00")))
+    with pytest.raises(db.BookingConflict):
+        db.save_booking("Retro", "evt_3", "2030-01-02T10:15:00", "2030-01-02T10:45:00", "UTC")
+    # The conflict made the index reload, so the pre-check now sees the row too
+    assert db.find_overlapping_bookings("2030-01-02T10:00:00", "2030-01-02T10:30:00") == [2]
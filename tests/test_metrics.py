@@ -0,0 +1,110 @@
+# test_metrics.py
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+
+from src import metrics
+from src.main import app
+
+# One sample line of the text exposition format: name{labels} value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\]|\\.)*",?)*\})? [-+]?(\d[\d.e+-]*|Inf)$')
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Metrics created by a test go to a scratch registry instead of the process-wide one"""
+    monkeypatch.setattr(metrics, "_registry", [])
+    return metrics
+
+
+def test_counters_and_gauges_render_per_label_set(registry):
+    requests = registry.Counter("test_requests_total", "Requests", ["route"])
+    requests.labels("/chat").inc()
+    requests.labels("/chat").inc(2)
+    requests.labels('/say "hi"\n').inc()
+    in_flight = registry.Gauge("test_in_flight", "In flight")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert registry.render().splitlines() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/chat"} 3.0',
+        'test_requests_total{route="/say \\"hi\\"\\n"} 1.0',
+        "# HELP test_in_flight In flight",
+        "# TYPE test_in_flight gauge",
+        "test_in_flight 1.0",
+    ]
+    with pytest.raises(ValueError):
+        requests.labels("/chat", "extra")
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive(registry):
+    latency = registry.Histogram("test_seconds", "Latency", buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="0.5"} 3',
+        'test_seconds_bucket{le="1.0"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        "test_seconds_sum 2.45",
+        "test_seconds_count 4",
+    ]
+
+
+def test_timed_labels_outcomes(registry):
+    calls = registry.Histogram("test_call_seconds", "Calls", ["function", "outcome"])
+
+    @registry.timed(calls, "fetch")
+    def fetch(status=None):
+        if status:
+            raise HttpError(Response({"status": status}), b"")
+        if status == 0:
+            raise RuntimeError("boom")
+        return "ok"
+
+    assert fetch() == "ok"
+    for status in (404, 0):
+        with pytest.raises(Exception):
+            fetch(status)
+
+    text = registry.render()
+    assert 'test_call_seconds_count{function="fetch",outcome="ok"} 1' in text
+    assert 'test_call_seconds_count{function="fetch",outcome="http_404"} 1' in text
+    assert 'test_call_seconds_count{function="fetch",outcome="error"} 1' in text
+
+
+def test_callback_metrics_are_read_at_scrape_time(registry):
+    stats = {"hits": 1}
+    registry.CallbackMetric("test_hits_total", "Hits", ["cache"], lambda: {("parse",): stats["hits"]},
+                            kind="counter")
+    stats["hits"] = 5
+
+    assert registry.render().splitlines()[1:] == ["# TYPE test_hits_total counter",
+                                                  'test_hits_total{cache="parse"} 5']
+
+
+def test_metrics_endpoint_exposes_requests_and_caches(db):
+    client = TestClient(app)
+    client.get("/bookings")
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE.match(line), line
+    assert re.search(r'^calmate_http_request_seconds_count\{method="GET",route="/bookings",status="200"\} [1-9]',
+                     text, re.MULTILINE)
+    assert re.search(r'^calmate_db_operation_seconds_count\{operation="list_bookings_page",outcome="ok"\} [1-9]',
+                     text, re.MULTILINE)
+    assert 'calmate_cache_hit_ratio{cache="calendar"}' in text
+    # The scrape itself is the one request in flight
+    assert "calmate_http_requests_in_flight 1.0" in text
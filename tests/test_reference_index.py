@@ -0,0 +1,67 @@
+# test_reference_index.py
+import pytest
+
+from src.agent import find_booking_by_reference, handle_user_message
+from src.nlu import extract_reference
+
+
+@pytest.mark.parametrize("message, reference", [
+    ("cancel the standup", "standup"),
+    ("Cancel the Design Review tomorrow", "design review"),
+    ("move standup to 3pm", "standup"),
+    ("cancel the dentist appointment on friday", "dentist"),
+    ("delete the call about budget", "budget"),
+    ("cancel my last meeting", "last"),
+    ("cancel my next meeting", "next"),
+    ("cancel it", "context"),
+    ("cancel this meeting", "context"),
+])
+def test_cancel_and_edit_references(message, reference):
+    assert extract_reference(message) == reference
+
+
+def _book(db, summary, day, attendees=None):
+    return db.save_booking(summary, f"evt_{summary}", f"2030-01-{day:02d}T09:00:00", f"2030-01-{day:02d}T09:30:00",
+                           "UTC", attendees)
+
+
+def test_cancel_by_name_resolves_through_the_index(db):
+    """The named booking is cancelled, not the most recently created one"""
+    _book(db, "Standup", 2)
+    _book(db, "Sync", 3)
+    reply = handle_user_message("cancel the standup")
+    assert reply["response"] == "Cancelled event: 'Standup' at 2030-01-02T09:00:00"
+    assert [b[1] for b in db.list_bookings()] == ["Sync"]
+
+
+def test_summary_hits_outrank_attendee_hits(db):
+    _book(db, "Lunch", 2, ["Review Board"])
+    review = _book(db, "Design review", 20)
+    # Both nine days from the anchor, so only the text rank differs
+    assert db.find_bookings_by_reference("review", near="2030-01-11T09:00:00")[0][0] == review
+
+
+def test_equal_matches_rank_by_distance_from_the_anchor(db):
+    _book(db, "Standup", 2)
+    later = _book(db, "Standup", 20)
+    assert db.find_bookings_by_reference("standup", near="2030-01-19T09:00:00", limit=1)[0][0] == later
+
+
+def test_short_references_and_cancelled_bookings(db):
+    one_on_one = _book(db, "1:1", 4)
+    assert db.find_bookings_by_reference("1:1")[0][0] == one_on_one
+    db.cancel_booking(one_on_one)
+    assert db.find_bookings_by_reference("1:1") == []
+
+
+def test_renamed_bookings_are_found_by_their_new_summary(db):
+    booking_id = _book(db, "Standup", 2)
+    db.update_booking(booking_id, "Retro", "2030-01-02T09:00:00", "2030-01-02T09:30:00", "UTC")
+    assert db.find_bookings_by_reference("standup") == []
+    assert db.find_bookings_by_reference("retro")[0][0] == booking_id
+
+
+def test_a_pronoun_without_context_resolves_to_nothing(db):
+    _book(db, "Context review", 2)
+    assert find_booking_by_reference("context") is None
+    assert find_booking_by_reference("context", {"summary": "Context review"})[1] == "Context review"
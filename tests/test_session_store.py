@@ -0,0 +1,105 @@
+# test_session_store.py
+import pytest
+
+from src.session_store import MemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, db, clock):
+    if request.param == "memory":
+        store = MemorySessionStore(max_sessions=3, ttl_seconds=60, max_messages=4, clock=clock)
+    else:
+        store = SQLiteSessionStore(max_sessions=3, ttl_seconds=60, max_messages=4, clock=clock, purge_every=1)
+    return store
+
+
+def _turn(text):
+    return [{"role": "user", "content": text}, {"role": "assistant", "content": f"re: {text}"}]
+
+
+def test_turns_keep_a_bounded_window_and_the_last_context(store):
+    event = {"id": 1, "summary": "Standup"}
+    store.record_turn("s1", _turn("one"), event)
+    store.record_turn("s1", _turn("two"))
+    session = store.record_turn("s1", _turn("three"))
+
+    assert [m["content"] for m in session["messages"]] == ["two", "re: two", "three", "re: three"]
+    assert session["context_event"] == event
+    assert store.get("s1")["messages"] == session["messages"]
+    assert store.get("unknown") is None
+
+
+def test_idle_sessions_expire(store, clock):
+    store.record_turn("s1", _turn("one"), {"id": 1})
+    clock.now += 60
+    assert store.get("s1") is not None
+
+    clock.now += 61
+    assert store.get("s1") is None
+    # A turn on an expired session starts over
+    session = store.record_turn("s1", _turn("two"))
+    assert session["context_event"] is None
+    assert [m["content"] for m in session["messages"]] == ["two", "re: two"]
+
+
+def test_least_recently_used_sessions_are_evicted(store, clock):
+    for n in range(4):
+        store.record_turn(f"s{n}", _turn(str(n)))
+        clock.now += 1
+
+    assert store.get("s0") is None
+    assert all(store.get(f"s{n}") for n in range(1, 4))
+    assert store.stats()["sessions"] == 3
+    assert store.stats()["evictions"] == 1
+
+
+def test_memory_reads_count_as_use(clock):
+    store = MemorySessionStore(max_sessions=2, clock=clock)
+    store.record_turn("a", _turn("a"))
+    store.record_turn("b", _turn("b"))
+    store.get("a")
+    store.record_turn("c", _turn("c"))
+
+    assert store.get("a") is not None and store.get("b") is None
+
+
+def test_returned_sessions_are_copies():
+    store = MemorySessionStore()
+    store.record_turn("s1", _turn("one"))
+    store.get("s1")["messages"].clear()
+    assert len(store.get("s1")["messages"]) == 2
+
+
+def test_sqlite_purge_runs_every_purge_every_turns(db, clock):
+    store = SQLiteSessionStore(max_sessions=1, ttl_seconds=60, clock=clock, purge_every=3)
+    for n in range(2):
+        store.record_turn(f"s{n}", _turn(str(n)))
+        clock.now += 1
+    assert store.stats()["sessions"] == 2
+
+    store.record_turn("s2", _turn("2"))
+    assert store.stats()["sessions"] == 1 and store.get("s2")
+
+
+def test_delete_and_backend_selection(store):
+    store.record_turn("s1", _turn("one"))
+    assert store.delete("s1") and not store.delete("s1")
+    assert store.get("s1") is None
+
+    assert isinstance(create_session_store("memory"), MemorySessionStore)
+    assert isinstance(create_session_store("SQLite"), SQLiteSessionStore)
+    with pytest.raises(ValueError):
+        create_session_store("redis")
@@ -0,0 +1,80 @@
+# test_tracing.py
+import json
+import time
+
+from src.tracing import Tracer, critical_path, span, traced
+
+
+def _span(span_id, parent_id, start_ms, duration_ms, name=None):
+    return {"name": name or span_id, "span_id": span_id, "parent_id": parent_id,
+            "start_ms": start_ms, "duration_ms": duration_ms}
+
+
+def test_critical_path_follows_sequential_steps_not_only_the_last():
+    spans = [
+        _span("root", None, 0, 100),
+        _span("parse", "root", 0, 60),        # slow first step
+        _span("lookup", "root", 60, 30),
+        _span("lookup.sql", "lookup", 62, 20),
+        _span("respond", "root", 90, 10),
+    ]
+    assert critical_path(spans) == ["root", "parse", "lookup", "lookup.sql", "respond"]
+
+
+def test_critical_path_takes_the_slower_of_parallel_branches():
+    spans = [
+        _span("root", None, 0, 50),
+        _span("resolve", "root", 1, 10),
+        _span("check", "root", 1, 40),
+        _span("respond", "root", 41, 9),
+    ]
+    assert critical_path(spans) == ["root", "check", "respond"]
+
+
+def test_critical_path_of_a_wide_trace_is_quick():
+    spans = [_span("root", None, 0, 4000)] + [_span(f"s{i}", "root", 2 * i, 2) for i in range(2000)]
+    started = time.perf_counter()
+    path = critical_path(spans)
+    assert len(path) == 2001
+    assert time.perf_counter() - started < 0.5
+
+
+def test_spans_join_the_request_trace_and_export_with_their_path(tmp_path):
+    export = tmp_path / "traces.jsonl"
+    tracer = Tracer(sample_rate=0, export_path=str(export))
+
+    @traced("db.query", lambda args, kwargs, result: {"rows": len(result)})
+    def query():
+        return [1, 2]
+
+    with tracer.trace("POST /chat") as root:
+        with span("chat.parse"):
+            pass
+        query()
+    trace_id = root.trace.trace_id
+    record = tracer.get(trace_id)
+    assert [s["name"] for s in record["spans"]] == ["POST /chat", "chat.parse", "db.query"]
+    assert record["spans"][2]["attributes"] == {"rows": 2}
+    assert record["critical_path"] == ["POST /chat", "chat.parse", "db.query"]
+    tracer.close()
+    exported = json.loads(export.read_text())
+    assert exported["trace_id"] == trace_id and exported["critical_path"] == record["critical_path"]
+
+
+def test_sampling_and_explicit_requests():
+    assert not Tracer(sample_rate=0).should_trace({})
+    assert Tracer(sample_rate=0).should_trace({"x-trace": "1"})
+    assert Tracer(sample_rate=1).should_trace({})
+
+
+def test_debug_endpoints_need_a_token_or_a_local_client(db, monkeypatch):
+    from fastapi.testclient import TestClient
+    from src.main import app, profiler
+
+    monkeypatch.setattr(profiler, "token", None)
+    assert TestClient(app).get("/debug/traces").status_code == 403
+    assert TestClient(app, client=("127.0.0.1", 50000)).get("/debug/traces").status_code == 200
+    monkeypatch.setattr(profiler, "token", "secret")
+    local = TestClient(app, client=("127.0.0.1", 50000))
+    assert local.get("/debug/profiles").status_code == 403
+    assert TestClient(app).get("/debug/profiles", headers={"X-Profile-Token": "secret"}).status_code == 200